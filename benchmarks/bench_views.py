@@ -0,0 +1,76 @@
+"""
+Бенчмарки представлений: число SQL-запросов, задержка и память.
+
+Запуск (файлы bench_*.py не входят в обычный прогон тестов):
+
+    pytest benchmarks/bench_views.py --bench-scale=small,medium
+    pytest benchmarks/bench_views.py --bench-save
+
+Без --bench-save результаты сравниваются с benchmarks/baseline.json
+для текущей СУБД и масштаба, см. measure.regressions().
+"""
+import pytest
+from django.urls import reverse
+
+from cart.models import Cart
+from catalog.models import Product
+from .measure import measure
+
+ORDER_FORM = {
+    'full_name': 'Иван Иванов',
+    'email': 'bench@example.com',
+    'phone': '89991234567',
+    'address': 'Москва',
+    'payment': 'cash',
+}
+
+
+@pytest.fixture
+def rounds(request):
+    return request.config.getoption('bench_rounds')
+
+
+@pytest.fixture
+def customer(client, dataset):
+    """Авторизованный клиент пользователя bench с наполненной корзиной."""
+    cart, _ = Cart.objects.get_or_create(user=dataset['user'])
+    cart.add_products(dataset['cart'])
+    client.force_login(dataset['user'])
+    return cart
+
+
+@pytest.mark.django_db
+class TestViewBenchmarks:
+    """Замеры основных страниц магазина на данных seed_shop()."""
+
+    def test_product_list(self, client, bench, rounds):
+        url = reverse('catalog:product_list')
+        bench('product_list', measure(lambda: client.get(url), rounds))
+
+    def test_product_detail(self, client, bench, dataset, rounds):
+        url = reverse('catalog:product_detail',
+                      args=[dataset['product'].slug])
+        bench('product_detail', measure(lambda: client.get(url), rounds))
+
+    def test_cart_view(self, client, customer, bench, rounds):
+        url = reverse('cart:view')
+        bench('cart_view', measure(lambda: client.get(url), rounds))
+
+    def test_profile(self, client, customer, bench, rounds):
+        url = reverse('users:profile')
+        bench('profile', measure(lambda: client.get(url), rounds))
+
+    def test_create_order(self, client, customer, bench, dataset, rounds):
+        url = reverse('orders:create')
+        Product.objects.filter(pk__in=dataset['cart']).update(stock=10 ** 6)
+
+        def refill_cart():
+            customer.items.all().delete()
+            customer.add_products(dataset['cart'])
+
+        def post():
+            response = client.post(url, ORDER_FORM)
+            assert response.status_code == 302
+            assert response.url.startswith('/orders/')
+
+        bench('create_order', measure(post, rounds, setup=refill_cart))
@@ -0,0 +1,137 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+
+from catalog.models import Product
+from catalog.seed import DEFAULT_SIZES, seed_shop
+from .measure import load_baseline, regressions, save_baseline
+
+SCALES = {
+    'small': {
+        'categories': 10, 'brands': 10, 'products': 500, 'users': 100,
+        'reviews': 2000, 'carts': 20, 'orders': 200,
+    },
+    'medium': DEFAULT_SIZES,
+    'large': {
+        'categories': 50, 'brands': 200, 'products': 100000,
+        'users': 10000, 'reviews': 1000000, 'carts': 3000,
+        'orders': 20000,
+    },
+}
+CART_LINES = 10
+
+results_key = pytest.StashKey[dict]()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('benchmarks')
+    group.addoption(
+        '--bench-scale', default='small',
+        help=f'Масштабы данных через запятую: {", ".join(SCALES)}.')
+    group.addoption(
+        '--bench-rounds', type=int, default=20,
+        help='Количество замеров времени на представление.')
+    group.addoption(
+        '--bench-threshold', type=float, default=1.5,
+        help='Допустимый рост задержки и памяти относительно базовых '
+             'значений.')
+    group.addoption(
+        '--bench-save', action='store_true',
+        help='Сохранить результаты как базовые значения.')
+
+
+def pytest_configure(config):
+    config.stash[results_key] = {}
+
+
+def pytest_generate_tests(metafunc):
+    if 'scale' in metafunc.fixturenames:
+        scales = metafunc.config.getoption('bench_scale').split(',')
+        unknown = set(scales) - set(SCALES)
+        if unknown:
+            raise pytest.UsageError(
+                f'Неизвестные масштабы: {", ".join(sorted(unknown))}')
+        metafunc.parametrize('scale', scales, scope='session')
+
+
+@pytest.fixture(scope='session')
+def dataset(scale, django_db_setup, django_db_blocker):
+    """
+    Заполняет тестовую БД данными заданного масштаба.
+
+    Кроме данных seed_shop() создаёт пользователя bench с корзиной
+    из CART_LINES популярных товаров. После тестов масштаба БД
+    очищается.
+
+    Returns:
+        dict: {'scale', 'user', 'product', 'cart'}.
+    """
+    with django_db_blocker.unblock():
+        seed_shop(SCALES[scale], token=scale)
+        user = get_user_model().objects.create_user(
+            'bench', 'bench@example.com', 'bench-password')
+        products = list(Product.objects.filter(stock__gt=0).order_by(
+            '-rating_count', 'pk')[:CART_LINES])
+    yield {
+        'scale': scale,
+        'user': user,
+        'product': products[0],
+        'cart': {product.pk: 1 for product in products},
+    }
+    with django_db_blocker.unblock():
+        call_command('flush', interactive=False, verbosity=0)
+        cache.clear()
+
+
+@pytest.fixture
+def bench(request, dataset):
+    """
+    Возвращает функцию, сохраняющую и проверяющую результат замера.
+
+    Результат выводится в итоговой таблице, при --bench-save
+    записывается в baseline.json, иначе сравнивается с базовым
+    значением для текущей СУБД и масштаба.
+    """
+    config = request.config
+    cache.clear()
+
+    def record(name, result):
+        results = config.stash[results_key]
+        results.setdefault(connection.vendor, {}).setdefault(
+            dataset['scale'], {})[name] = result
+        if config.getoption('bench_save'):
+            baseline = None
+        else:
+            baseline = load_baseline().get(connection.vendor, {}).get(
+                dataset['scale'], {}).get(name)
+        problems = regressions(name, result, baseline,
+                               config.getoption('bench_threshold'))
+        if problems:
+            pytest.fail('\n'.join(problems), pytrace=False)
+
+    return record
+
+
+def pytest_sessionfinish(session, exitstatus):
+    results = session.config.stash[results_key]
+    if results and session.config.getoption('bench_save'):
+        save_baseline(results)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    results = config.stash[results_key]
+    if not results:
+        return
+    terminalreporter.section('benchmarks')
+    terminalreporter.write_line(
+        f'{"СУБД":<11}{"масштаб":<9}{"представление":<16}'
+        f'{"запросы":>8}{"p50, мс":>10}{"p95, мс":>10}{"память, КБ":>12}')
+    for vendor, scales in results.items():
+        for scale, views in scales.items():
+            for name, result in views.items():
+                terminalreporter.write_line(
+                    f'{vendor:<11}{scale:<9}{name:<16}'
+                    f'{result["queries"]:>8}{result["p50_ms"]:>10.2f}'
+                    f'{result["p95_ms"]:>10.2f}{result["memory_kb"]:>12.1f}')
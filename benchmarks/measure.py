@@ -0,0 +1,162 @@
+import json
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.db import connection
+
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+
+# Максимум SQL-запросов на один запрос к представлению. Бюджет
+# не зависит от объёма данных: рост числа запросов вместе с данными
+# означает N+1.
+QUERY_BUDGETS = {
+    'product_list': 4,
+    'product_detail': 1,
+    'cart_view': 5,
+    'create_order': 14,
+    'profile': 5,
+}
+
+
+def percentile(values, percent):
+    """
+    Возвращает перцентиль выборки с линейной интерполяцией.
+
+    Args:
+        values (list): Значения.
+        percent (float): Перцентиль от 0 до 100.
+
+    Returns:
+        float: Значение перцентиля.
+    """
+    values = sorted(values)
+    position = (len(values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (
+        position - lower)
+
+
+def measure(call, rounds=20, setup=None):
+    """
+    Измеряет число SQL-запросов, задержку и память одного вызова.
+
+    Первый вызов прогревает кеши и не учитывается. Запросы
+    (через execute_wrapper, независимо от DEBUG) и пик выделенной
+    памяти (tracemalloc) снимаются в отдельном прогоне,
+    чтобы инструментирование не искажало замеры времени.
+
+    Args:
+        call (callable): Измеряемый вызов (например, запрос клиента).
+        rounds (int): Количество замеров времени.
+        setup (callable): Вызывается перед каждым прогоном вне замера
+            (например, чтобы заново наполнить корзину).
+
+    Returns:
+        dict: {'queries', 'p50_ms', 'p95_ms', 'memory_kb'}.
+    """
+    setup = setup or (lambda: None)
+    setup()
+    call()
+
+    queries = []
+
+    def count(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    setup()
+    tracemalloc.start()
+    try:
+        with connection.execute_wrapper(count):
+            call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+    for _ in range(rounds):
+        setup()
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return {
+        'queries': len(queries),
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'memory_kb': round(peak / 1024, 1),
+    }
+
+
+def load_baseline(path=BASELINE_PATH):
+    """
+    Загружает сохранённые результаты замеров.
+
+    Args:
+        path (Path): Путь к файлу с результатами.
+
+    Returns:
+        dict: {СУБД: {масштаб: {представление: результат}}}.
+    """
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    """
+    Дописывает результаты замеров в файл с базовыми значениями.
+
+    Замеры для других СУБД и масштабов сохраняются.
+
+    Args:
+        results (dict): {СУБД: {масштаб: {представление: результат}}}.
+        path (Path): Путь к файлу с результатами.
+    """
+    baseline = load_baseline(path)
+    for vendor, scales in results.items():
+        for scale, views in scales.items():
+            baseline.setdefault(vendor, {}).setdefault(scale, {}).update(
+                views)
+    path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+
+
+def regressions(name, result, baseline, threshold):
+    """
+    Сравнивает результат замера с бюджетом и базовым значением.
+
+    Число запросов не должно превышать бюджет из QUERY_BUDGETS
+    и базовое значение. Медиана задержки и пик памяти не должны
+    превышать базовые значения больше чем в threshold раз
+    (p95 на малом числе замеров слишком шумный и только выводится).
+
+    Args:
+        name (str): Имя представления.
+        result (dict): Результат measure().
+        baseline (dict): Базовый результат или None.
+        threshold (float): Допустимый коэффициент роста.
+
+    Returns:
+        list: Описания нарушений (пустой, если их нет).
+    """
+    problems = []
+    budget = QUERY_BUDGETS[name]
+    if result['queries'] > budget:
+        problems.append(
+            f'{name}: {result["queries"]} запросов при бюджете {budget}')
+    if not baseline:
+        return problems
+    if result['queries'] > baseline['queries']:
+        problems.append(
+            f'{name}: {result["queries"]} запросов, '
+            f'в базовом замере {baseline["queries"]}')
+    for metric in ('p50_ms', 'memory_kb'):
+        limit = baseline[metric] * threshold
+        if result[metric] > limit:
+            problems.append(
+                f'{name}: {metric} = {result[metric]}, '
+                f'базовое значение {baseline[metric]} (предел {limit:.1f})')
+    return problems
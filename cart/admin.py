@@ -1,9 +1,19 @@
+from decimal import Decimal
+
 from django.contrib import admin
+from django.db.models import (
+    Count, DecimalField, F, OuterRef, Subquery, Sum, Value,
+)
+from django.db.models.functions import Coalesce
+
+from catalog.admin_utils import (
+    BoundedRelatedFieldListFilter, EstimatedCountMixin,
+)
 from .models import Cart, CartItem
 
 
 @admin.register(Cart)
-class CartAdmin(admin.ModelAdmin):
+class CartAdmin(EstimatedCountMixin, admin.ModelAdmin):
     """
     Админ-класс для модели Cart.
 
@@ -11,13 +21,46 @@ class CartAdmin(admin.ModelAdmin):
         list_display (list): Поля для отображения в списке.
         list_filter (list): Поля для фильтрации.
         search_fields (list): Поля для поиска.
+        raw_id_fields (list): Связи, выбираемые по ID, а не списком.
 
     Методы:
+        get_queryset(): Добавляет к корзинам итоги одним запросом.
         item_count(): Возвращает количество товаров в корзине.
         total(): Возвращает общую стоимость корзины.
     """
     list_display = ['id', 'user', 'session', 'item_count', 'total']
-    list_filter = ['user']
+    # вместо всех пользователей фильтр выводит самых частых
+    list_filter = [('user', admin.EmptyFieldListFilter),
+                   ('user', BoundedRelatedFieldListFilter)]
+    search_fields = ['user__username', 'session']
+    raw_id_fields = ['user']
+
+    def get_queryset(self, request):
+        """
+        Возвращает корзины с посчитанными в БД итогами.
+
+        Итоги считаются коррелированными подзапросами, а не JOIN
+        с GROUP BY: подзапросы выполняются только для строк страницы,
+        а COUNT(*) для пагинации не соединяет корзины с позициями.
+
+        Args:
+            request (HttpRequest): Объект запроса.
+
+        Returns:
+            QuerySet: Корзины с аннотациями items_count и items_total.
+        """
+        items = CartItem.objects.filter(
+            cart=OuterRef('pk')).order_by().values('cart')
+        return super().get_queryset(request).select_related('user').annotate(
+            items_count=Coalesce(
+                Subquery(items.annotate(n=Count('pk')).values('n')),
+                Value(0)),
+            items_total=Coalesce(
+                Subquery(items.annotate(
+                    s=Sum(F('quantity') * F('product__price'))).values('s')),
+                Value(Decimal('0.00')),
+                output_field=DecimalField(max_digits=12, decimal_places=2)),
+        )
 
     def item_count(self, obj):
         """
@@ -29,9 +72,10 @@ class CartAdmin(admin.ModelAdmin):
         Returns:
             int: Количество товаров.
         """
-        return obj.items.count()
+        return obj.items_count
 
     item_count.short_description = 'Товаров'  # просто назыание в админке
+    item_count.admin_order_field = 'items_count'
 
     def total(self, obj):
         """
@@ -43,14 +87,15 @@ class CartAdmin(admin.ModelAdmin):
         Returns:
             Decimal: Общая стоимость.
         """
-        return obj.total()
+        return obj.items_total
 
     total.short_description = 'Сумма'
+    total.admin_order_field = 'items_total'
 
 
 # рег в админке класс без него не будет отображеия новых методов
 @admin.register(CartItem)
-class CartItemAdmin(admin.ModelAdmin):
+class CartItemAdmin(EstimatedCountMixin, admin.ModelAdmin):
     """
     Админ-класс для модели CartItem.
 
@@ -58,12 +103,31 @@ class CartItemAdmin(admin.ModelAdmin):
         list_display (list): Поля для отображения в списке.
         list_filter (list): Поля для фильтрации.
         search_fields (list): Поля для поиска.
+        raw_id_fields (list): Связи, выбираемые по ID, а не списком.
 
     Методы:
+        get_queryset(): Добавляет к позициям стоимость.
         total(): Возвращает стоимость позиции.
     """
     list_display = ['product', 'cart', 'quantity', 'total']
-    list_filter = ['cart__user']
+    list_filter = [('cart__user', admin.EmptyFieldListFilter),
+                   ('product', BoundedRelatedFieldListFilter)]
+    search_fields = ['product__product_name', 'cart__user__username']
+    list_select_related = ['product__brand', 'cart__user']
+    raw_id_fields = ['cart', 'product']
+
+    def get_queryset(self, request):
+        """
+        Возвращает позиции со стоимостью, посчитанной в БД.
+
+        Args:
+            request (HttpRequest): Объект запроса.
+
+        Returns:
+            QuerySet: Позиции с аннотацией line_total.
+        """
+        return super().get_queryset(request).annotate(
+            line_total=F('quantity') * F('product__price'))
 
     def total(self, obj):
         """
@@ -75,6 +139,7 @@ class CartItemAdmin(admin.ModelAdmin):
         Returns:
             Decimal: Стоимость товара с учетом количества.
         """
-        return obj.total()
+        return obj.line_total
 
     total.short_description = 'Сумма'  # названия поля в бд
+    total.admin_order_field = 'line_total'
@@ -8,6 +8,15 @@ class CartConfig(AppConfig):
     Атрибуты:
         default_auto_field (str): Тип поля для автоматического создания первичного ключа.
         name (str): Имя приложения.
+
+    Методы:
+        ready(): Подключает сигнал переноса корзины при входе.
     """
     default_auto_field = 'django.db.models.BigAutoField'  # поле для первичных ключей
     name = 'cart'
+
+    def ready(self):
+        """
+        Подключает обработчики сигналов приложения.
+        """
+        from . import signals  # noqa: F401
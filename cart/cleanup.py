@@ -0,0 +1,102 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import Cart
+
+DB_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+def abandoned_carts():
+    """
+    Возвращает анонимные корзины, сессия которых истекла или удалена.
+
+    Returns:
+        QuerySet: Корзины без пользователя и без живой сессии.
+    """
+    alive = Session.objects.filter(session_key=OuterRef('session'),
+                                   expire_date__gt=timezone.now())
+    return Cart.objects.filter(user__isnull=True).exclude(Exists(alive))
+
+
+def expired_sessions():
+    """
+    Возвращает истёкшие сессии.
+
+    Returns:
+        QuerySet: Сессии с прошедшим сроком действия.
+    """
+    return Session.objects.filter(expire_date__lt=timezone.now())
+
+
+def delete_in_batches(queryset, batch_size, sleep=0, progress=None):
+    """
+    Удаляет строки пакетами по первичному ключу.
+
+    Каждый пакет удаляется в своей транзакции, между пакетами
+    выдерживается пауза, чтобы не держать блокировки долго
+    и не перегружать БД.
+
+    Args:
+        queryset (QuerySet): Удаляемые строки.
+        batch_size (int): Количество строк в одной транзакции.
+        sleep (float): Пауза между пакетами в секундах.
+        progress (callable): Вызывается после каждого пакета
+            с числом удалённых строк.
+
+    Returns:
+        dict: Количество удалённых строк по моделям (с учётом каскада).
+    """
+    deleted = {}
+    last_pk = None
+    while True:
+        batch = queryset.order_by('pk')
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        pks = list(batch.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+        with transaction.atomic():
+            _, counts = queryset.model.objects.filter(pk__in=pks).delete()
+        for label, count in counts.items():
+            deleted[label] = deleted.get(label, 0) + count
+        if progress:
+            progress(len(pks))
+        last_pk = pks[-1]
+        if len(pks) < batch_size:
+            break
+        if sleep:
+            time.sleep(sleep)
+    return deleted
+
+
+def cleanup_carts(batch_size=10000, sleep=0.1, progress=None):
+    """
+    Удаляет брошенные анонимные корзины и истёкшие сессии.
+
+    Точка входа для планировщика (cron, Celery beat и т.п.).
+    Сессии удаляются только при хранении сессий в БД.
+
+    Args:
+        batch_size (int): Количество строк в одной транзакции.
+        sleep (float): Пауза между пакетами в секундах.
+        progress (callable): Вызывается после каждого пакета
+            с числом удалённых строк.
+
+    Returns:
+        dict: {'deleted': {модель: строк}, 'seconds': длительность}.
+    """
+    started = time.monotonic()
+    deleted = delete_in_batches(abandoned_carts(), batch_size, sleep,
+                                progress)
+    if settings.SESSION_ENGINE in DB_SESSION_ENGINES:
+        deleted.update(delete_in_batches(expired_sessions(), batch_size,
+                                         sleep, progress))
+    return {'deleted': deleted, 'seconds': time.monotonic() - started}
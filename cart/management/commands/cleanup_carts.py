@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from cart.cleanup import cleanup_carts
+
+
+class Command(BaseCommand):
+    """
+    Команда удаления брошенных анонимных корзин и истёкших сессий.
+
+    Удаляет строки пакетами по первичному ключу, каждый пакет
+    в отдельной транзакции, с паузой между пакетами. Для запуска
+    по расписанию можно вызывать cart.cleanup.cleanup_carts().
+
+    Пример:
+        python manage.py cleanup_carts --batch-size 10000 --sleep 0.1
+    """
+    help = 'Удаляет брошенные анонимные корзины и истёкшие сессии'
+
+    def add_arguments(self, parser):
+        """
+        Добавляет аргументы командной строки.
+
+        Args:
+            parser (ArgumentParser): Парсер аргументов.
+        """
+        parser.add_argument('--batch-size', type=int, default=10000,
+                            help='Количество строк в одной транзакции')
+        parser.add_argument('--sleep', type=float, default=0.1,
+                            help='Пауза между пакетами в секундах')
+
+    def handle(self, *args, **options):
+        """
+        Выполняет очистку и выводит её скорость.
+
+        Args:
+            *args: Позиционные аргументы.
+            **options: Опции командной строки.
+        """
+        def progress(count):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Удалено в пакете: {count}')
+
+        result = cleanup_carts(options['batch_size'], options['sleep'],
+                               progress)
+        seconds = result['seconds']
+        for label, count in sorted(result['deleted'].items()):
+            rate = count / seconds if seconds else 0
+            self.stdout.write(f'{label}: {count} ({rate:.0f} строк/с)')
+        self.stdout.write(self.style.SUCCESS(
+            f'Очистка завершена за {seconds:.1f} с'))
@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 15:10
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_items(apps, schema_editor):
+    CartItem = apps.get_model('cart', 'CartItem')
+    duplicates = (CartItem.objects.values('cart_id', 'product_id')
+                  .annotate(n=Count('pk'), keep=Min('pk'),
+                            quantity=Sum('quantity'))
+                  .filter(n__gt=1).order_by())
+    for row in duplicates:
+        items = CartItem.objects.filter(
+            cart_id=row['cart_id'], product_id=row['product_id'])
+        items.exclude(pk=row['keep']).delete()
+        items.update(quantity=row['quantity'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_items,
+                             migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(
+                fields=('cart', 'product'),
+                name='cart_cartitem_unique_product'),
+        ),
+    ]
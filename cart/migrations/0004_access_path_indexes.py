@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0003_cartitem_unique_product'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(condition=models.Q(('session__isnull', False)),
+                               fields=['session'], name='cart_cart_session'),
+        ),
+    ]
@@ -1,4 +1,8 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import connections, models, router, transaction
+from django.db.models import Count, DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
 
 
@@ -15,6 +19,8 @@ class Cart(models.Model):
         session (CharField): Идентификатор сессии (может быть None).
 
     Методы:
+        add_products(): Добавляет товары в корзину одним upsert.
+        summary(): Возвращает итоги корзины одним запросом.
         total(): Возвращает общую стоимость всех товаров в корзине.
         item_count(): Возвращает количество позиций в корзине.
         __str__(): Возвращает строковое представление корзины.
@@ -27,14 +33,78 @@ class Cart(models.Model):
         blank=True)
     session = models.CharField(max_length=100, null=True, blank=True)
 
+    def add_products(self, quantities):
+        """
+        Добавляет товары в корзину, увеличивая количество уже лежащих.
+
+        На PostgreSQL и SQLite выполняется одним запросом
+        INSERT ... ON CONFLICT (cart_id, product_id) DO UPDATE
+        SET quantity = quantity + EXCLUDED.quantity, опираясь на
+        уникальность пары (корзина, товар). Параллельные добавления
+        одного товара не создают дублей позиций и не теряют количество.
+
+        Args:
+            quantities (dict): Отображение ID товара -> количество.
+        """
+        if not quantities:
+            return
+        self.__dict__.pop('_summary', None)
+        using = router.db_for_write(CartItem)
+        connection = connections[using]
+        if not connection.features.supports_update_conflicts_with_target:
+            with transaction.atomic(using=using):
+                for product_id, quantity in quantities.items():
+                    items = CartItem.objects.using(using).filter(
+                        cart=self, product_id=product_id)
+                    if not items.update(quantity=F('quantity') + quantity):
+                        CartItem.objects.using(using).create(
+                            cart=self, product_id=product_id,
+                            quantity=quantity)
+            return
+
+        quote = connection.ops.quote_name
+        table = quote(CartItem._meta.db_table)
+        placeholders = ', '.join(['(%s, %s, %s)'] * len(quantities))
+        params = []
+        for product_id, quantity in quantities.items():
+            params += [self.pk, product_id, quantity]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} ({quote("cart_id")}, '
+                f'{quote("product_id")}, {quote("quantity")}) '
+                f'VALUES {placeholders} '
+                f'ON CONFLICT ({quote("cart_id")}, {quote("product_id")}) '
+                f'DO UPDATE SET {quote("quantity")} = '
+                f'{table}.{quote("quantity")} + EXCLUDED.{quote("quantity")}',
+                params)
+
+    def summary(self, refresh=False):
+        """
+        Возвращает итоги корзины.
+
+        Итоги считаются одним агрегирующим запросом и запоминаются
+        в экземпляре, поэтому повторные вызовы total() и item_count()
+        в рамках одного запроса не обращаются к БД. Сохранение
+        и удаление элемента корзины сбрасывают запомненные итоги.
+
+        Args:
+            refresh (bool): Пересчитать итоги после изменения корзины.
+
+        Returns:
+            dict: {'total': сумма, 'lines': позиций, 'units': единиц}.
+        """
+        if refresh or not hasattr(self, '_summary'):
+            self._summary = self.items.summary()
+        return self._summary
+
     def total(self):
         """
         Рассчитывает общую стоимость всех товаров в корзине.
 
         Returns:
-            float: Сумма стоимости всех товаров с учетом количества.
+            Decimal: Сумма стоимости всех товаров с учетом количества.
         """
-        return sum(item.total() for item in self.items.all())
+        return self.summary()['total']
 
     def item_count(self):
         """
@@ -43,7 +113,7 @@ class Cart(models.Model):
         Returns:
             int: Количество уникальных товаров в корзине.
         """
-        return self.items.count()
+        return self.summary()['lines']
 
     def __str__(self):
         """
@@ -59,6 +129,36 @@ class Cart(models.Model):
     class Meta:
         verbose_name = 'Корзина'
         verbose_name_plural = 'Корзины'
+        indexes = [
+            models.Index(fields=['session'],
+                         condition=models.Q(session__isnull=False),
+                         name='cart_cart_session'),
+        ]
+
+
+class CartItemQuerySet(models.QuerySet):
+    """
+    QuerySet элементов корзины.
+
+    Методы:
+        summary(): Итоги по элементам одним запросом.
+    """
+
+    def summary(self):
+        """
+        Считает сумму, число позиций и число единиц товара в БД.
+
+        Returns:
+            dict: {'total': Decimal, 'lines': int, 'units': int}.
+        """
+        return self.aggregate(
+            total=Coalesce(
+                Sum(F('quantity') * F('product__price')),
+                Value(Decimal('0.00')),
+                output_field=DecimalField(max_digits=12, decimal_places=2)),
+            lines=Count('pk'),
+            units=Coalesce(Sum('quantity'), 0),
+        )
 
 
 class CartItem(models.Model):
@@ -74,6 +174,9 @@ class CartItem(models.Model):
 
     Методы:
         total(): Возвращает стоимость позиции (цена * количество).
+        reset_cart_summary(): Сбрасывает запомненные итоги корзины.
+        save(): Сохраняет элемент и сбрасывает итоги корзины.
+        delete(): Удаляет элемент и сбрасывает итоги корзины.
         __str__(): Возвращает строковое представление элемента.
     """
     cart = models.ForeignKey(
@@ -83,6 +186,8 @@ class CartItem(models.Model):
     product = models.ForeignKey('catalog.Product', on_delete=models.CASCADE)
     quantity = models.IntegerField(default=1)
 
+    objects = CartItemQuerySet.as_manager()
+
     def total(self):
         """
         Рассчитывает стоимость позиции.
@@ -92,6 +197,39 @@ class CartItem(models.Model):
         """
         return self.product.price * self.quantity
 
+    def reset_cart_summary(self):
+        """
+        Сбрасывает запомненные итоги загруженной корзины.
+        """
+        if CartItem.cart.is_cached(self):
+            self.cart.__dict__.pop('_summary', None)
+
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет элемент корзины.
+
+        Args:
+            *args: Аргументы для родительского метода save.
+            **kwargs: Ключевые аргументы для родительского метода save.
+        """
+        super().save(*args, **kwargs)
+        self.reset_cart_summary()
+
+    def delete(self, *args, **kwargs):
+        """
+        Удаляет элемент корзины.
+
+        Args:
+            *args: Аргументы для родительского метода delete.
+            **kwargs: Ключевые аргументы для родительского метода delete.
+
+        Returns:
+            tuple: Результат родительского метода delete.
+        """
+        result = super().delete(*args, **kwargs)
+        self.reset_cart_summary()
+        return result
+
     def __str__(self):
         """
         Возвращает строковое представление элемента корзины.
@@ -104,3 +242,8 @@ class CartItem(models.Model):
     class Meta:
         verbose_name = 'Элемент корзины'
         verbose_name_plural = 'Элементы корзины'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['cart', 'product'],
+                name='cart_cartitem_unique_product'),
+        ]
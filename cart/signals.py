@@ -0,0 +1,18 @@
+from django.contrib.auth.signals import user_logged_in
+from django.dispatch import receiver
+from .storage import merge_session_cart
+
+
+@receiver(user_logged_in)
+def merge_cart_on_login(sender, request, user, **kwargs):
+    """
+    Переносит корзину анонимного посетителя в корзину пользователя.
+
+    Args:
+        sender (type): Класс пользователя.
+        request (HttpRequest): Объект запроса.
+        user (User): Вошедший пользователь.
+        **kwargs: Дополнительные аргументы сигнала.
+    """
+    if request is not None and hasattr(request, 'session'):
+        merge_session_cart(request, user)
@@ -0,0 +1,213 @@
+from decimal import Decimal
+
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+
+from catalog.models import Product
+from .models import Cart, CartItem
+
+CART_SESSION_KEY = 'cart'
+
+
+class DatabaseCart:
+    """
+    Хранилище корзины авторизованного пользователя в БД.
+
+    Атрибуты:
+        cart (Cart): Корзина пользователя.
+
+    Методы:
+        add(): Добавляет товар в корзину.
+        remove(): Удаляет позицию корзины.
+        items(): Возвращает позиции корзины с товарами.
+        summary(): Возвращает итоги корзины.
+    """
+
+    def __init__(self, request):
+        self.cart, _ = Cart.objects.get_or_create(user=request.user)
+
+    def add(self, product, quantity):
+        """
+        Добавляет товар в корзину или увеличивает его количество.
+
+        Args:
+            product (Product): Добавляемый товар.
+            quantity (int): Количество.
+        """
+        self.cart.add_products({product.pk: quantity})
+
+    def remove(self, item_id):
+        """
+        Удаляет позицию корзины.
+
+        Args:
+            item_id (int): ID элемента корзины.
+
+        Raises:
+            Http404: Если позиции нет в корзине.
+        """
+        get_object_or_404(CartItem, id=item_id, cart=self.cart).delete()
+
+    def items(self):
+        """
+        Возвращает позиции корзины вместе с товарами и брендами.
+
+        Returns:
+            QuerySet: Элементы корзины.
+        """
+        return self.cart.items.select_related('product', 'product__brand')
+
+    def summary(self):
+        """
+        Возвращает итоги корзины.
+
+        Returns:
+            dict: {'total': сумма, 'lines': позиций, 'units': единиц}.
+        """
+        return self.cart.summary()
+
+
+class SessionCart:
+    """
+    Хранилище корзины анонимного посетителя в сессии.
+
+    Позиции хранятся в сессии словарём {ID товара: количество},
+    поэтому для посетителя не создаются строки Cart и CartItem,
+    а просмотр пустой корзины не создаёт сессию. Роль ID позиции
+    играет ID товара.
+
+    Атрибуты:
+        session (SessionBase): Сессия посетителя.
+
+    Методы:
+        add(): Добавляет товар в корзину.
+        remove(): Удаляет позицию корзины.
+        items(): Возвращает позиции корзины с товарами.
+        summary(): Возвращает итоги корзины.
+    """
+
+    def __init__(self, request):
+        self.session = request.session
+        self._items = None
+
+    @property
+    def lines(self):
+        """
+        Возвращает позиции корзины из сессии.
+
+        Returns:
+            dict: {ID товара (str): количество}.
+        """
+        return self.session.get(CART_SESSION_KEY, {})
+
+    def save(self, lines):
+        """
+        Записывает позиции корзины в сессию.
+
+        Args:
+            lines (dict): {ID товара (str): количество}.
+        """
+        self.session[CART_SESSION_KEY] = lines
+        self._items = None
+
+    def add(self, product, quantity):
+        """
+        Добавляет товар в корзину или увеличивает его количество.
+
+        Args:
+            product (Product): Добавляемый товар.
+            quantity (int): Количество.
+        """
+        lines = dict(self.lines)
+        key = str(product.pk)
+        lines[key] = lines.get(key, 0) + quantity
+        self.save(lines)
+
+    def remove(self, item_id):
+        """
+        Удаляет позицию корзины.
+
+        Args:
+            item_id (int): ID товара.
+
+        Raises:
+            Http404: Если позиции нет в корзине.
+        """
+        lines = dict(self.lines)
+        if lines.pop(str(item_id), None) is None:
+            raise Http404('Товара нет в корзине')
+        self.save(lines)
+
+    def items(self):
+        """
+        Возвращает позиции корзины.
+
+        Товары загружаются одним запросом, позиции не сохраняются в БД.
+        Удалённые из каталога товары пропускаются.
+
+        Returns:
+            list: Несохранённые элементы CartItem.
+        """
+        if self._items is None:
+            lines = self.lines
+            products = Product.objects.filter(
+                pk__in=lines).select_related('brand').order_by('pk')
+            self._items = [
+                CartItem(id=product.pk, product=product,
+                         quantity=lines[str(product.pk)])
+                for product in products
+            ]
+        return self._items
+
+    def summary(self):
+        """
+        Возвращает итоги корзины.
+
+        Returns:
+            dict: {'total': сумма, 'lines': позиций, 'units': единиц}.
+        """
+        items = self.items()
+        return {
+            'total': sum((item.total() for item in items), Decimal('0.00')),
+            'lines': len(items),
+            'units': sum(item.quantity for item in items),
+        }
+
+
+def get_cart(request):
+    """
+    Возвращает хранилище корзины для текущего посетителя.
+
+    Args:
+        request (HttpRequest): Объект запроса.
+
+    Returns:
+        DatabaseCart | SessionCart: Корзина в БД для авторизованного
+        пользователя, корзина в сессии для анонимного посетителя.
+    """
+    if request.user.is_authenticated:
+        return DatabaseCart(request)
+    return SessionCart(request)
+
+
+def merge_session_cart(request, user):
+    """
+    Переносит корзину из сессии в корзину пользователя в БД.
+
+    Все позиции переносятся одним upsert (см. Cart.add_products()):
+    количество уже лежащих в корзине товаров увеличивается.
+
+    Args:
+        request (HttpRequest): Объект запроса.
+        user (User): Вошедший пользователь.
+    """
+    lines = request.session.pop(CART_SESSION_KEY, None)
+    if not lines:
+        return
+    quantities = {
+        pk: lines[str(pk)]
+        for pk in Product.objects.filter(pk__in=lines).values_list(
+            'pk', flat=True)
+    }
+    cart, _ = Cart.objects.get_or_create(user=user)
+    cart.add_products(quantities)
@@ -1,8 +1,21 @@
+from datetime import timedelta
+from io import StringIO
+
 import pytest
-from django.test import TestCase
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
+from .cleanup import cleanup_carts
 from .models import Cart, CartItem
+from .storage import CART_SESSION_KEY, SessionCart
 from catalog.models import Product, Category, Brand
 from users.models import User
 
@@ -115,6 +128,219 @@ class CartBasicTests(TestCase):
         self.assertEqual(cart.total(), 0)
         self.assertEqual(cart.item_count(), 0)
 
+    def test_cart_summary_single_query(self):
+        """Тест 6: Итоги корзины считаются одним запросом"""
+        cart = Cart.objects.create(user=self.user)
+        product2 = Product.objects.create(
+            product_name='Test Product 2',
+            slug='test-product-2',
+            price=50.00,
+            category=self.category,
+            brand=self.brand,
+            stock=5
+        )
+        CartItem.objects.create(cart=cart, product=self.product, quantity=2)
+        CartItem.objects.create(cart=cart, product=product2, quantity=3)
+        cart = Cart.objects.get(pk=cart.pk)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(cart.summary(),
+                             {'total': 350, 'lines': 2, 'units': 5})
+            self.assertEqual(cart.total(), 350)
+            self.assertEqual(cart.item_count(), 2)
+
+    def test_ajax_add_constant_queries(self):
+        """Тест 7: Число запросов AJAX-добавления не зависит от корзины"""
+        self.client.force_login(self.user)
+        cart = Cart.objects.create(user=self.user)
+        products = Product.objects.bulk_create(
+            Product(product_name=f'Товар {i}', slug=f'product-{i}',
+                    price=10, stock=10, category=self.category,
+                    brand=self.brand)
+            for i in range(10))
+        url = reverse('cart:add', args=[self.product.pk])
+        headers = {'X-Requested-With': 'XMLHttpRequest'}
+
+        self.client.post(url, headers=headers)
+        with CaptureQueriesContext(connection) as empty_cart:
+            self.client.post(url, headers=headers)
+        CartItem.objects.bulk_create(
+            CartItem(cart=cart, product=product) for product in products)
+        with CaptureQueriesContext(connection) as full_cart:
+            response = self.client.post(url, headers=headers)
+
+        self.assertEqual(len(empty_cart), len(full_cart))
+        self.assertEqual(response.json()['cart_count'], 11)
+        self.assertEqual(response.json()['total'], 400.0)
+
+
+
+class SessionCartTests(TestCase):
+    """Тесты корзины анонимного посетителя в сессии"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(
+            name='Test Category',
+            slug='test-category'
+        )
+        self.brand = Brand.objects.create(name='Test Brand', slug='test-brand')
+        self.product = Product.objects.create(
+            product_name='Test Product',
+            slug='test-product',
+            price=100.00,
+            category=self.category,
+            brand=self.brand,
+            stock=10
+        )
+        self.product2 = Product.objects.create(
+            product_name='Test Product 2',
+            slug='test-product-2',
+            price=50.00,
+            category=self.category,
+            brand=self.brand,
+            stock=10
+        )
+        self.headers = {'X-Requested-With': 'XMLHttpRequest'}
+
+    def add(self, product, quantity=1):
+        return self.client.post(reverse('cart:add', args=[product.pk]),
+                                {'quantity': quantity}, headers=self.headers)
+
+    def test_anonymous_add_without_db_cart(self):
+        """Тест 1: Анонимная корзина не создаёт строк Cart и CartItem"""
+        response = self.add(self.product, 2)
+        self.add(self.product)
+
+        self.assertEqual(response.json()['cart_count'], 1)
+        self.assertFalse(Cart.objects.exists())
+        self.assertFalse(CartItem.objects.exists())
+        self.assertEqual(self.client.session[CART_SESSION_KEY],
+                         {str(self.product.pk): 3})
+
+    def test_anonymous_remove(self):
+        """Тест 2: Удаление позиции из анонимной корзины"""
+        self.add(self.product)
+        self.add(self.product2)
+
+        response = self.client.post(
+            reverse('cart:remove', args=[self.product.pk]),
+            headers=self.headers)
+
+        self.assertEqual(response.json()['cart_count'], 1)
+        self.assertEqual(response.json()['total'], 50.0)
+
+    def test_empty_cart_view_without_session(self):
+        """Тест 3: Просмотр пустой корзины не создаёт сессию"""
+        request = RequestFactory().get('/')
+        request.session = SessionStore()
+        cart = SessionCart(request)
+
+        self.assertEqual(cart.items(), [])
+        self.assertEqual(cart.summary()['total'], 0)
+        self.assertFalse(request.session.modified)
+        self.assertIsNone(request.session.session_key)
+
+    def test_merge_on_login(self):
+        """Тест 4: При входе корзина из сессии переносится в БД"""
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=1)
+        self.add(self.product, 2)
+        self.add(self.product2, 3)
+
+        self.client.post(reverse('users:login'), {
+            'username': 'testuser', 'password': 'testpass123'})
+
+        self.assertEqual(
+            dict(cart.items.values_list('product_id', 'quantity')),
+            {self.product.pk: 3, self.product2.pk: 3})
+        self.assertNotIn(CART_SESSION_KEY, self.client.session)
+
+    def test_add_products_upsert(self):
+        """Тест 5: Повторное добавление увеличивает количество одним запросом"""
+        cart = Cart.objects.create(user=self.user)
+        cart.add_products({self.product.pk: 1})
+
+        with self.assertNumQueries(1):
+            cart.add_products({self.product.pk: 2, self.product2.pk: 1})
+
+        self.assertEqual(
+            dict(cart.items.values_list('product_id', 'quantity')),
+            {self.product.pk: 3, self.product2.pk: 1})
+        self.assertEqual(cart.item_count(), 2)
+
+    def test_duplicate_line_rejected(self):
+        """Тест 6: Две позиции одного товара в корзине запрещены"""
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.product)
+
+        with self.assertRaises(IntegrityError):
+            CartItem.objects.create(cart=cart, product=self.product)
+
+
+
+class CleanupCartsTests(TestCase):
+    """Тесты очистки брошенных корзин"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        category = Category.objects.create(name='Test Category',
+                                           slug='test-category')
+        brand = Brand.objects.create(name='Test Brand', slug='test-brand')
+        self.product = Product.objects.create(
+            product_name='Test Product',
+            slug='test-product',
+            price=100.00,
+            category=category,
+            brand=brand,
+            stock=10
+        )
+
+    def make_session(self, key, days):
+        Session.objects.create(
+            session_key=key, session_data='',
+            expire_date=timezone.now() + timedelta(days=days))
+
+    def test_cleanup_abandoned_carts(self):
+        """Тест 1: Удаляются только анонимные корзины без живой сессии"""
+        self.make_session('alive', 1)
+        self.make_session('expired', -1)
+        user_cart = Cart.objects.create(user=self.user)
+        alive_cart = Cart.objects.create(session='alive')
+        for key in ['expired', 'missing-1', 'missing-2']:
+            cart = Cart.objects.create(session=key)
+            CartItem.objects.create(cart=cart, product=self.product)
+
+        out = StringIO()
+        call_command('cleanup_carts', batch_size=2, sleep=0, stdout=out)
+
+        self.assertEqual(set(Cart.objects.all()), {user_cart, alive_cart})
+        self.assertFalse(CartItem.objects.exists())
+        self.assertEqual(
+            list(Session.objects.values_list('session_key', flat=True)),
+            ['alive'])
+        self.assertIn('cart.Cart: 3', out.getvalue())
+        self.assertIn('cart.CartItem: 3', out.getvalue())
+
+    def test_cleanup_batches(self):
+        """Тест 2: Корзины удаляются пакетами заданного размера"""
+        Cart.objects.bulk_create(Cart(session=f'old-{i}') for i in range(5))
+        batches = []
+
+        result = cleanup_carts(batch_size=2, sleep=0,
+                               progress=batches.append)
+
+        self.assertEqual(batches, [2, 2, 1])
+        self.assertEqual(result['deleted'], {'cart.Cart': 5})
+
 
 # Pytest тесты для запуска через pytest
 @pytest.mark.django_db
@@ -160,3 +386,72 @@ def test_pytest_cart_workflow():
     assert cart_item.total() == 150.00  # 2 * 75
     assert cart.total() == 150.00
     assert cart.item_count() == 1
+
+
+class CartAdminTests(TestCase):
+    """Тесты списков корзин в админ-панели"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            'admin', 'admin@shop.ru', 'pass123')
+        self.client.force_login(self.admin)
+        self.category = Category.objects.create(name='Телефоны',
+                                                slug='phones')
+        self.brand = Brand.objects.create(name='Apple', slug='apple')
+        self.products = [
+            Product.objects.create(
+                product_name=f'Телефон {i}', slug=f'phone-{i}',
+                price=100 * (i + 1), stock=10, category=self.category,
+                brand=self.brand)
+            for i in range(3)
+        ]
+
+    def add_carts(self, count):
+        start = Cart.objects.count()
+        for i in range(start, start + count):
+            user = User.objects.create(username=f'user{i}')
+            cart = Cart.objects.create(user=user)
+            cart.add_products({product.pk: i + 1
+                               for product in self.products[:i % 3 + 1]})
+
+    def changelist_queries(self, model):
+        url = reverse(f'admin:cart_{model}_changelist')
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_constant(self):
+        """Тест 1: корзины и позиции выводятся без N+1"""
+        self.add_carts(2)
+        small = [self.changelist_queries('cart'),
+                 self.changelist_queries('cartitem')]
+        self.add_carts(10)
+        large = [self.changelist_queries('cart'),
+                 self.changelist_queries('cartitem')]
+
+        self.assertEqual(small, large)
+
+    def test_cart_totals_and_sorting(self):
+        """Тест 2: итоги корзин считаются в БД и по ним можно сортировать"""
+        self.add_carts(3)
+        Cart.objects.create(session='anonymous')
+        response = self.client.get(reverse('admin:cart_cart_changelist'),
+                                   {'o': '-5'})
+
+        rows = [(cart.items_count, cart.items_total)
+                for cart in response.context['cl'].result_list]
+        self.assertEqual(rows[:3], [(3, 1800), (2, 600), (1, 100)])
+        self.assertEqual(rows[3], (0, 0))
+
+    def test_count_query_skips_items(self):
+        """Тест 3: подсчёт строк для пагинации не соединяет позиции"""
+        self.add_carts(1)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('admin:cart_cart_changelist'))
+
+        counts = [query['sql'] for query in queries
+                  if 'COUNT(*)' in query['sql']]
+        self.assertTrue(counts)
+        self.assertFalse(any('cart_cartitem' in sql for sql in counts))
@@ -1,34 +1,12 @@
+import logging
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from catalog.models import Product
-from .models import Cart, CartItem
-
-
-def get_cart(request):
-    """
-    Возвращает корзину для текущего пользователя или сессии.
+from .storage import get_cart
 
-    Если пользователь авторизован - возвращает корзину пользователя.
-    Если не авторизован - возвращает корзину по ключу сессии.
-
-    Args:
-        request (HttpRequest): Объект запроса.
-
-    Returns:
-        Cart: Объект корзины.
-    """
-    if request.user.is_authenticated:
-        # гет он креате может создать новую корзину если нету (возвращает
-        # кортеж и 2 объектов, второй это просто будево создан не создан)
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-    else:
-        session_key = request.session.session_key
-        if not session_key:
-            request.session.create()  # если нету ключа сесси то создаем
-            session_key = request.session.session_key
-        cart, _ = Cart.objects.get_or_create(session=session_key)
-    return cart
+logger = logging.getLogger(__name__)
 
 
 @require_POST
@@ -58,21 +36,16 @@ def add(request, product_id):
         elif product.stock < quantity:
             message = f"Недостаточно товара. Доступно: {product.stock} шт."
         else:
-            item, created = CartItem.objects.get_or_create(
-                cart=cart, product=product)
-            if not created:  # проверка на был ли товар в корзине
-                item.quantity += quantity
-            else:
-                item.quantity = quantity
-            item.save()
+            cart.add(product, quantity)
 
             # проверяем в заголвке (request.headers) методом get(получаем) ajax
             # ли это запрос
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                summary = cart.summary()
                 return JsonResponse({
                     'success': True,
-                    'cart_count': cart.items.count(),
-                    'total': float(cart.total()),
+                    'cart_count': summary['lines'],
+                    'total': float(summary['total']),
                     # JS получает этот json обновляет счетчик корзины и
                     # показывает сообщение
                     'message': f'Товар "{product.product_name}" добавлен в корзину'
@@ -89,7 +62,7 @@ def add(request, product_id):
         return redirect('catalog:product_detail', product_id=product_id)
 
     except Exception as e:
-        print(f"Ошибка при добавлении в корзину: {e}")  # в консоль сервера
+        logger.exception('Ошибка при добавлении в корзину')
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({
                 'success': False,
@@ -112,20 +85,20 @@ def remove(request, item_id):
     """
     try:
         cart = get_cart(request)
-        item = get_object_or_404(CartItem, id=item_id, cart=cart)
-        item.delete()
+        cart.remove(item_id)
 
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            summary = cart.summary()
             return JsonResponse({
                 'success': True,
-                'cart_count': cart.items.count(),
-                'total': float(cart.total()),
+                'cart_count': summary['lines'],
+                'total': float(summary['total']),
                 'message': 'Товар удален из корзины'
             })
 
         return redirect('cart:view')
-    except Exception as e:
-        print(f"Ошибка при удалении из корзины: {e}")
+    except Exception:
+        logger.exception('Ошибка при удалении из корзины')
         return redirect('cart:view')
 
 
@@ -140,9 +113,8 @@ def view(request):
         HttpResponse: Рендер шаблона cart/view.html с данными корзины.
     """
     cart = get_cart(request)
-    cart_items = cart.items.all()
     return render(request, 'cart/view.html', {
         'cart': cart,
-        'cart_items': cart_items,
-        'cart_total': cart.total()
+        'cart_items': cart.items(),
+        'cart_total': cart.summary()['total']
     })
@@ -1,6 +1,35 @@
-from django.contrib import admin
+import io
+
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.shortcuts import redirect, render
+from django.urls import path
+from .admin_utils import (
+    EstimatedCountMixin, ExportMixin, PriceRangeListFilter,
+)
+from .forms import ProductImportForm
+from .importer import detect_format, import_catalog
 from .models import Category, Product, Brand
 
+IMPORT_ERRORS_SHOWN = 100
+
+
+def product_count_subquery(field):
+    """
+    Возвращает подзапрос количества товаров, ссылающихся на объект.
+
+    Args:
+        field (str): Поле товара со ссылкой ('category' или 'brand').
+
+    Returns:
+        Coalesce: Выражение для annotate() (0, если товаров нет).
+    """
+    products = Product.objects.filter(**{field: OuterRef('pk')}).order_by()
+    counts = products.values(field).annotate(n=Count('pk')).values('n')
+    return Coalesce(Subquery(counts), Value(0))
+
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -13,12 +42,30 @@ class CategoryAdmin(admin.ModelAdmin):
         prepopulated_fields (dict): Автозаполнение slug на основе name.
 
     Методы:
+        get_queryset(): Добавляет к категориям количество товаров.
         product_count(): Возвращает количество товаров в категории.
     """
     list_display = ('name', 'slug', 'product_count')
     search_fields = ('name', 'slug')
     prepopulated_fields = {'slug': ('name',)}
 
+    def get_queryset(self, request):
+        """
+        Возвращает категории с посчитанным в БД количеством товаров.
+
+        Количество считается коррелированным подзапросом, а не JOIN
+        с GROUP BY: подзапрос выполняется только для строк страницы,
+        а COUNT(*) для пагинации не трогает таблицу товаров.
+
+        Args:
+            request (HttpRequest): Объект запроса.
+
+        Returns:
+            QuerySet: Категории с аннотацией products_count.
+        """
+        return super().get_queryset(request).annotate(
+            products_count=product_count_subquery('category'))
+
     def product_count(self, obj):
         """
         Возвращает количество товаров в категории.
@@ -29,12 +76,13 @@ class CategoryAdmin(admin.ModelAdmin):
         Returns:
             int: Количество товаров.
         """
-        return Product.objects.filter(category=obj).count()
+        return obj.products_count
     product_count.short_description = 'Кол-во товаров'
+    product_count.admin_order_field = 'products_count'
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(EstimatedCountMixin, ExportMixin, admin.ModelAdmin):
     """
     Админ-класс для модели Product.
 
@@ -46,18 +94,26 @@ class ProductAdmin(admin.ModelAdmin):
         list_editable (tuple): Поля для редактирования прямо в списке.
         readonly_fields (tuple): Только для чтения.
         fieldsets (tuple): Группировка полей в форме редактирования.
+        export_name (str): Выгрузка товаров.
 
     Методы:
+        get_queryset(): Подгружает категорию и бренд вместе с товарами.
         get_brand(): Возвращает название бренда или 'Без бренда'.
+        get_urls(): Добавляет страницу импорта товаров.
+        import_view(): Импортирует товары из загруженного файла.
     """
+    export_name = 'products'
+    change_list_template = 'admin/catalog/product/change_list.html'
     list_display = ('product_name', 'category', 'get_brand',
                     'price', 'stock', 'created_at')
-    list_filter = ('category', 'brand', 'created_at', 'price')
+    # диапазоны цен вместо SELECT DISTINCT по всем ценам каталога
+    list_filter = ('category', 'brand', 'created_at', PriceRangeListFilter)
     search_fields = ('product_name', 'description', 'slug',
                      'category__name', 'brand__name')
     prepopulated_fields = {'slug': ('product_name',)}
     list_editable = ('price', 'stock')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('created_at', 'updated_at',
+                       'rating', 'rating_count')
 
     fieldsets = (
         ('Основная информация', {
@@ -67,11 +123,26 @@ class ProductAdmin(admin.ModelAdmin):
         ('Цена и наличие', {
             'fields': ('price', 'stock')
         }),
+        ('Отзывы', {
+            'fields': ('rating', 'rating_count')
+        }),
         ('Дополнительно', {
             'fields': ('created_at', 'updated_at')
         }),
     )
 
+    def get_queryset(self, request):
+        """
+        Возвращает товары вместе с категорией и брендом.
+
+        Args:
+            request (HttpRequest): Объект запроса.
+
+        Returns:
+            QuerySet: Товары с select_related по категории и бренду.
+        """
+        return super().get_queryset(request).for_detail()
+
     def get_brand(self, obj):
         """
         Возвращает название бренда или строку "Без бренда".
@@ -84,6 +155,71 @@ class ProductAdmin(admin.ModelAdmin):
         """
         return obj.brand.name if obj.brand else "Без бренда"
     get_brand.short_description = 'Бренд'
+    get_brand.admin_order_field = 'brand__name'
+
+    def get_urls(self):
+        """
+        Добавляет к адресам товаров страницу импорта.
+
+        Returns:
+            list: URL-шаблоны админ-класса.
+        """
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view),
+                 name='catalog_product_import'),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        """
+        Импортирует товары из CSV или JSON Lines.
+
+        Файл обрабатывается потоком через import_catalog(), на странице
+        выводится отчёт и первые IMPORT_ERRORS_SHOWN строк с ошибками
+        (полный файл ошибок даёт команда import_catalog --errors).
+
+        Args:
+            request (HttpRequest): Объект запроса.
+
+        Returns:
+            HttpResponse: Рендер шаблона 'admin/catalog/product/import.html'
+            или редирект к списку товаров, если ошибок нет.
+        """
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        report = None
+        errors = []
+        if request.method == 'POST':
+            form = ProductImportForm(request.POST, request.FILES)
+            if form.is_valid():
+                upload = form.cleaned_data['file']
+
+                def on_error(number, row, row_errors):
+                    if len(errors) < IMPORT_ERRORS_SHOWN:
+                        errors.append((number, row_errors))
+
+                stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig',
+                                          newline='')
+                report = import_catalog(
+                    stream,
+                    form.cleaned_data['format'] or detect_format(upload.name),
+                    create_missing=form.cleaned_data['create_missing'],
+                    on_error=on_error)
+                if not report['errors']:
+                    messages.success(
+                        request,
+                        f"Импортировано товаров: {report['imported']}")
+                    return redirect('admin:catalog_product_changelist')
+        else:
+            form = ProductImportForm()
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Импорт товаров',
+            'opts': self.model._meta,
+            'form': form,
+            'report': report,
+            'errors': errors,
+        }
+        return render(request, 'admin/catalog/product/import.html', context)
 
 
 @admin.register(Brand)
@@ -97,12 +233,28 @@ class BrandAdmin(admin.ModelAdmin):
         prepopulated_fields (dict): Автозаполнение slug.
 
     Методы:
+        get_queryset(): Добавляет к брендам количество товаров.
         product_count(): Возвращает количество товаров бренда.
     """
     list_display = ('name', 'slug', 'product_count')
     search_fields = ('name', 'slug')
     prepopulated_fields = {'slug': ('name',)}
 
+    def get_queryset(self, request):
+        """
+        Возвращает бренды с посчитанным в БД количеством товаров.
+
+        Количество считается подзапросом, как в CategoryAdmin.
+
+        Args:
+            request (HttpRequest): Объект запроса.
+
+        Returns:
+            QuerySet: Бренды с аннотацией products_count.
+        """
+        return super().get_queryset(request).annotate(
+            products_count=product_count_subquery('brand'))
+
     def product_count(self, obj):
         """
         Возвращает количество товаров бренда.
@@ -113,5 +265,6 @@ class BrandAdmin(admin.ModelAdmin):
         Returns:
             int: Количество товаров.
         """
-        return Product.objects.filter(brand=obj).count()
+        return obj.products_count
     product_count.short_description = 'Кол-во товаров'
+    product_count.admin_order_field = 'products_count'
@@ -0,0 +1,359 @@
+import json
+from datetime import date
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count, Subquery
+from django.http import Http404, StreamingHttpResponse
+from django.urls import path
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .exporter import CONTENT_TYPES, FORMATS, export_text
+from .facets import get_price_buckets
+
+FILTER_PREFIX = 'admin:filter'
+
+
+def get_estimate_threshold():
+    """
+    Возвращает число строк, начиная с которого COUNT(*) оценивается.
+
+    Returns:
+        int: Значение settings.ADMIN_COUNT_ESTIMATE_THRESHOLD
+        (по умолчанию 100000).
+    """
+    return getattr(settings, 'ADMIN_COUNT_ESTIMATE_THRESHOLD', 100000)
+
+
+def get_filter_timeout():
+    """
+    Возвращает время жизни закешированных вариантов фильтров.
+
+    Returns:
+        int: Значение settings.ADMIN_FILTER_CACHE_TIMEOUT
+        (по умолчанию 600 с).
+    """
+    return getattr(settings, 'ADMIN_FILTER_CACHE_TIMEOUT', 600)
+
+
+def table_estimate(model, using):
+    """
+    Возвращает оценку числа строк таблицы из статистики PostgreSQL.
+
+    Args:
+        model (type): Класс модели.
+        using (str): Алиас БД.
+
+    Returns:
+        int | None: pg_class.reltuples или None, если оценки нет
+        (не PostgreSQL или таблица ещё не анализировалась).
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [connection.ops.quote_name(model._meta.db_table)])
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+def plan_estimate(queryset):
+    """
+    Возвращает оценку числа строк запроса из плана PostgreSQL.
+
+    Args:
+        queryset (QuerySet): Запрос.
+
+    Returns:
+        int: Оценка планировщика (EXPLAIN, без выполнения запроса).
+    """
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор, не считающий точно строки больших таблиц.
+
+    На PostgreSQL:
+        - без фильтров берётся pg_class.reltuples, если оценка
+          не меньше порога;
+        - с фильтрами строки считаются точно, но не дальше порога
+          (COUNT по подзапросу с LIMIT), а при достижении порога
+          берётся оценка планировщика.
+    На остальных СУБД и для небольших таблиц счёт точный.
+
+    Атрибуты:
+        threshold (int): Порог из ADMIN_COUNT_ESTIMATE_THRESHOLD.
+
+    Свойства:
+        count: Точное или оценочное число строк.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threshold = get_estimate_threshold()
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if (connections[queryset.db].vendor != 'postgresql'
+                or queryset.query.is_sliced):
+            return super().count
+        if not queryset.query.where:
+            estimate = table_estimate(queryset.model, queryset.db)
+            if estimate is not None and estimate >= self.threshold:
+                return estimate
+            return super().count
+        bounded = queryset.order_by().values('pk')[:self.threshold].count()
+        if bounded < self.threshold:
+            return bounded
+        return max(plan_estimate(queryset), self.threshold)
+
+
+class EstimatedCountMixin:
+    """
+    Примесь к ModelAdmin для списков с миллионами строк.
+
+    Подключает EstimatedCountPaginator и отключает второй COUNT(*)
+    по всей таблице, который админ-панель выполняет при активных
+    фильтрах (show_full_result_count). Число строк в списке
+    у больших таблиц приблизительное.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class BoundedRelatedFieldListFilter(admin.RelatedFieldListFilter):
+    """
+    Фильтр по связанному объекту с ограниченным списком вариантов.
+
+    Стандартный фильтр выводит все объекты связанной таблицы
+    (например, всех пользователей). Этот показывает не больше limit
+    объектов, чаще всего встречающихся среди последних sample строк,
+    и кеширует список на ADMIN_FILTER_CACHE_TIMEOUT секунд.
+    Фильтр по любому другому объекту по-прежнему работает через URL,
+    выбранный объект добавляется в список.
+
+    Атрибуты:
+        limit (int): Максимум вариантов.
+        sample (int): Сколько последних строк просматривать.
+
+    Методы:
+        field_choices(): Возвращает варианты фильтра.
+    """
+    limit = 50
+    sample = 10000
+
+    def field_choices(self, field, request, model_admin):
+        model = model_admin.model
+        key = f'{FILTER_PREFIX}:{model._meta.label_lower}:{self.field_path}'
+        choices = cache.get(key)
+        if choices is None:
+            recent = model._default_manager.order_by('-pk').values('pk')
+            counts = (model._default_manager
+                      .filter(pk__in=Subquery(recent[:self.sample]))
+                      .exclude(**{f'{self.field_path}__isnull': True})
+                      .values(self.field_path)
+                      .annotate(n=Count('pk'))
+                      .order_by('-n')[:self.limit])
+            pks = [row[self.field_path] for row in counts]
+            choices = self.related_choices(field, request, model_admin, pks)
+            cache.set(key, choices, get_filter_timeout())
+        selected = self.lookup_val and self.lookup_val[0]
+        if selected and selected not in {str(pk) for pk, _ in choices}:
+            choices = choices + self.related_choices(
+                field, request, model_admin, [selected])
+        return choices
+
+    def related_choices(self, field, request, model_admin, pks):
+        """
+        Возвращает варианты для связанных объектов с заданными ID.
+
+        Объекты берутся через get_queryset() их админ-класса,
+        чтобы __str__ не делал запросов на каждый объект.
+
+        Args:
+            field (ForeignKey): Поле связи.
+            request (HttpRequest): Объект запроса.
+            model_admin (ModelAdmin): Админ-класс списка.
+            pks (list): ID связанных объектов.
+
+        Returns:
+            list: Пары (ID, строковое представление) по алфавиту.
+        """
+        related_model = field.remote_field.model
+        related_admin = model_admin.admin_site._registry.get(related_model)
+        if related_admin is not None:
+            queryset = related_admin.get_queryset(request)
+        else:
+            queryset = related_model._default_manager.all()
+        related = queryset.filter(pk__in=pks)
+        return sorted(((obj.pk, str(obj)) for obj in related),
+                      key=lambda choice: choice[1])
+
+
+class CachedAllValuesFieldListFilter(admin.AllValuesFieldListFilter):
+    """
+    Фильтр по значениям поля с кешированным ограниченным списком.
+
+    Стандартный фильтр на каждый запрос выполняет SELECT DISTINCT
+    по всей таблице. Здесь значения (не больше limit) кешируются
+    на ADMIN_FILTER_CACHE_TIMEOUT секунд.
+
+    Атрибуты:
+        limit (int): Максимум вариантов.
+    """
+    limit = 100
+
+    def __init__(self, field, request, params, model, model_admin,
+                 field_path):
+        key = f'{FILTER_PREFIX}:{model._meta.label_lower}:{field_path}'
+        values = cache.get(key)
+        if values is None:
+            values = list(
+                model._default_manager.order_by(field_path)
+                .values_list(field_path, flat=True)
+                .distinct()[:self.limit])
+            cache.set(key, values, get_filter_timeout())
+        self._cached_values = values
+        super().__init__(field, request, params, model, model_admin,
+                         field_path)
+        self.lookup_choices = self._cached_values
+
+
+class PriceRangeListFilter(admin.SimpleListFilter):
+    """
+    Фильтр товаров по ценовым диапазонам из CATALOG_PRICE_BUCKETS.
+
+    Заменяет фильтр по всем различным ценам, которому нужен
+    SELECT DISTINCT по всему каталогу.
+
+    Методы:
+        lookups(): Возвращает диапазоны цен.
+        queryset(): Фильтрует товары по выбранному диапазону,
+            неизвестные значения игнорируются.
+    """
+    title = 'Цена'
+    parameter_name = 'price_range'
+
+    def lookups(self, request, model_admin):
+        edges = (None,) + get_price_buckets() + (None,)
+        lookups = []
+        for low, high in zip(edges, edges[1:]):
+            if low is None:
+                label = f'до {high}'
+            elif high is None:
+                label = f'от {low}'
+            else:
+                label = f'{low} - {high}'
+            lookups.append((f'{low or ""}-{high or ""}', label))
+        return lookups
+
+    def queryset(self, request, queryset):
+        # значения вне lookups() (устаревшие ссылки, ручной ввод)
+        # игнорируются, а не передаются в фильтр по цене
+        if self.value() not in dict(self.lookup_choices):
+            return queryset
+        low, _, high = self.value().partition('-')
+        if low:
+            queryset = queryset.filter(price__gte=low)
+        if high:
+            queryset = queryset.filter(price__lt=high)
+        return queryset
+
+
+class ExportMixin:
+    """
+    Примесь к ModelAdmin со ссылками на потоковую выгрузку.
+
+    Добавляет адрес 'export/' со StreamingHttpResponse: строки
+    читаются серверным курсором и отдаются по мере чтения,
+    поэтому выгрузка не держит в памяти всю таблицу.
+    Параметры запроса: format ('csv' или 'jsonl'), since и until
+    (даты ГГГГ-ММ-ДД, включительно).
+
+    Атрибуты:
+        export_name (str): Выгрузка из catalog.exporter.EXPORTS.
+
+    Методы:
+        get_urls(): Добавляет адрес выгрузки.
+        changelist_view(): Передаёт в шаблон ссылки на выгрузку.
+        export_view(): Отдаёт выгрузку потоком.
+    """
+    export_name = None
+    change_list_template = 'admin/export_change_list.html'
+
+    def get_urls(self):
+        """
+        Добавляет к адресам модели адрес выгрузки.
+
+        Returns:
+            list: URL-шаблоны админ-класса.
+        """
+        opts = self.model._meta
+        return [
+            path('export/', self.admin_site.admin_view(self.export_view),
+                 name=f'{opts.app_label}_{opts.model_name}_export'),
+        ] + super().get_urls()
+
+    def changelist_view(self, request, extra_context=None):
+        """
+        Отображает список со ссылками на выгрузку.
+
+        Args:
+            request (HttpRequest): Объект запроса.
+            extra_context (dict | None): Дополнительный контекст.
+
+        Returns:
+            HttpResponse: Страница списка.
+        """
+        opts = self.model._meta
+        extra_context = {
+            'export_url': f'admin:{opts.app_label}_{opts.model_name}_export',
+            'export_formats': FORMATS,
+            **(extra_context or {}),
+        }
+        return super().changelist_view(request, extra_context)
+
+    def export_view(self, request):
+        """
+        Отдаёт выгрузку потоком.
+
+        Args:
+            request (HttpRequest): Объект запроса.
+
+        Returns:
+            StreamingHttpResponse: Файл выгрузки.
+
+        Raises:
+            PermissionDenied: Если нет права просмотра.
+            Http404: Если формат неизвестен или дата некорректна.
+        """
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        fmt = request.GET.get('format', 'csv')
+        if fmt not in FORMATS:
+            raise Http404('Неизвестный формат')
+        try:
+            since, until = (
+                date.fromisoformat(request.GET[name])
+                if request.GET.get(name) else None
+                for name in ('since', 'until'))
+        except ValueError:
+            raise Http404('Некорректная дата')
+        response = StreamingHttpResponse(
+            export_text(self.export_name, fmt, since, until),
+            content_type=CONTENT_TYPES[fmt])
+        filename = f'{self.export_name}-{timezone.localdate()}.{fmt}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
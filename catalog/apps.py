@@ -9,7 +9,16 @@ class CatalogConfig(AppConfig):
         default_auto_field (str): Тип поля для автоматического создания первичного ключа.
         name (str): Имя приложения.
         verbose_name (str): Человекочитаемое имя приложения для админ-панели.
+
+    Методы:
+        ready(): Подключает сигналы обновления поискового вектора.
     """
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'catalog'
     verbose_name = 'Каталог товаров'
+
+    def ready(self):
+        """
+        Подключает обработчики сигналов приложения.
+        """
+        from . import signals  # noqa: F401
@@ -0,0 +1,116 @@
+import hashlib
+from django.conf import settings
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.core.cache import cache
+from django.db import connections
+from django.urls import reverse
+from .models import Brand, Category, Product
+
+MIN_PREFIX_LENGTH = 2
+
+
+def normalize_prefix(prefix):
+    """
+    Убирает лишние пробелы из введённого текста.
+
+    Args:
+        prefix (str): Текст из строки поиска.
+
+    Returns:
+        str: Текст без пробелов по краям и повторяющихся пробелов.
+    """
+    return ' '.join(prefix.split())
+
+
+def _match(queryset, field, prefix, limit):
+    """
+    Возвращает записи, похожие на prefix, отсортированные по схожести.
+
+    На PostgreSQL используется только оператор pg_trgm %> по самому
+    столбцу: его обслуживает GIN-индекс с gin_trgm_ops. Условие
+    icontains (UPPER(столбец) LIKE ...) индекс не использует, и в OR
+    с ним весь запрос уходил бы в Seq Scan. Префиксы и слова внутри
+    названия находит и %>. На других СУБД - поиск по подстроке.
+
+    Args:
+        queryset (QuerySet): Исходная выборка.
+        field (str): Имя текстового поля.
+        prefix (str): Нормализованный текст запроса.
+        limit (int): Максимальное количество записей.
+
+    Returns:
+        QuerySet: Подходящие записи.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.filter(
+            **{f'{field}__icontains': prefix}).order_by(field)[:limit]
+    return queryset.filter(
+        **{f'{field}__trigram_word_similar': prefix}
+    ).annotate(
+        similarity=TrigramWordSimilarity(prefix, field)
+    ).order_by('-similarity', field)[:limit]
+
+
+def build_suggestions(prefix, limit):
+    """
+    Собирает подсказки по товарам, брендам и категориям без кеша.
+
+    Args:
+        prefix (str): Нормализованный текст запроса.
+        limit (int): Максимальное количество подсказок каждого типа.
+
+    Returns:
+        list: Список словарей с ключами type, name и url.
+    """
+    suggestions = []
+    products = _match(Product.objects.only('product_name', 'slug'),
+                      'product_name', prefix, limit)
+    for product in products:
+        suggestions.append({
+            'type': 'product',
+            'name': product.product_name,
+            'url': reverse('catalog:product_detail', args=[product.slug]),
+        })
+    for brand in _match(Brand.objects.only('name', 'slug'),
+                        'name', prefix, limit):
+        suggestions.append({
+            'type': 'brand',
+            'name': brand.name,
+            'url': f"{reverse('catalog:product_list')}?brand={brand.slug}",
+        })
+    for category in _match(Category.objects.only('name', 'slug'),
+                           'name', prefix, limit):
+        suggestions.append({
+            'type': 'category',
+            'name': category.name,
+            'url': reverse('catalog:category_detail', args=[category.slug]),
+        })
+    return suggestions
+
+
+def get_suggestions(prefix):
+    """
+    Возвращает подсказки для строки поиска с кешированием по префиксу.
+
+    Количество подсказок и время жизни кеша задаются настройками
+    CATALOG_AUTOCOMPLETE_LIMIT и CATALOG_AUTOCOMPLETE_TIMEOUT.
+
+    Args:
+        prefix (str): Текст из строки поиска.
+
+    Returns:
+        list: Список подсказок (пустой для слишком коротких запросов).
+    """
+    prefix = normalize_prefix(prefix)
+    if len(prefix) < MIN_PREFIX_LENGTH:
+        return []
+    limit = getattr(settings, 'CATALOG_AUTOCOMPLETE_LIMIT', 8)
+    # поиск регистронезависимый, поэтому кеш общий для любого регистра
+    key = 'catalog:autocomplete:' + hashlib.md5(
+        f'{limit}:{prefix.lower()}'.encode()).hexdigest()
+    suggestions = cache.get(key)
+    if suggestions is None:
+        suggestions = build_suggestions(prefix, limit)
+        cache.set(key, suggestions,
+                  getattr(settings, 'CATALOG_AUTOCOMPLETE_TIMEOUT', 300))
+    return suggestions
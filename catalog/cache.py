@@ -0,0 +1,286 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+from monitoring.metrics import record_cache
+
+VERSION_PREFIX = 'catalog:version'
+METRICS_PREFIX = 'catalog:metrics'
+FRAGMENT_PREFIX = 'catalog:fragment'
+ALL = 'all'
+
+
+def get_timeout():
+    """
+    Возвращает время жизни закешированных фрагментов.
+
+    Returns:
+        int: Значение settings.CATALOG_CACHE_TIMEOUT (по умолчанию 600 с).
+    """
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 600)
+
+
+def version_key(scope, pk=ALL):
+    """
+    Возвращает ключ номера версии объекта.
+
+    Args:
+        scope (str): Тип объекта ('product', 'category', 'brand').
+        pk (int | str): ID объекта или ALL для версии всего типа.
+
+    Returns:
+        str: Ключ кеша.
+    """
+    return f'{VERSION_PREFIX}:{scope}:{pk}'
+
+
+def get_versions(keys):
+    """
+    Возвращает текущие версии для набора ключей за одно обращение к кешу.
+
+    Отсутствующие версии (новые или вытесненные из кеша) создаются
+    со значением текущего времени в наносекундах, поэтому после
+    вытеснения версия никогда не совпадёт со старой.
+
+    Args:
+        keys (iterable): Ключи из version_key().
+
+    Returns:
+        dict: Отображение ключ -> номер версии.
+    """
+    keys = list(dict.fromkeys(keys))
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return versions
+
+
+def bump_versions(*keys):
+    """
+    Увеличивает версии объектов, делая их закешированные фрагменты устаревшими.
+
+    Версии меняются после фиксации текущей транзакции, чтобы
+    параллельный запрос не закешировал старые данные под новой версией.
+
+    Args:
+        *keys: Ключи из version_key().
+    """
+    keys = list(dict.fromkeys(keys))
+
+    def bump():
+        for key in keys:
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, time.time_ns(), None)
+
+    transaction.on_commit(bump)
+
+
+_pending = Counter()
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def get_flush_interval():
+    """
+    Возвращает период сброса счётчиков попаданий и промахов в кеш.
+
+    Returns:
+        float: Значение settings.CATALOG_METRICS_FLUSH_INTERVAL
+            (по умолчанию 10 с).
+    """
+    return getattr(settings, 'CATALOG_METRICS_FLUSH_INTERVAL', 10)
+
+
+def record(namespace, hits=0, misses=0):
+    """
+    Учитывает попадания и промахи кеша для метрик.
+
+    Обращения учитываются в метриках текущего запроса (заголовок
+    Server-Timing) и в счётчиках процесса, которые сбрасываются
+    в общий кеш не чаще раза в get_flush_interval() секунд, чтобы
+    учёт не добавлял обращений к кешу на каждый запрос.
+
+    Args:
+        namespace (str): Тип фрагмента ('card', 'category_page', ...).
+        hits (int): Количество попаданий.
+        misses (int): Количество промахов.
+    """
+    record_cache(hits, misses)
+    with _pending_lock:
+        if hits:
+            _pending[f'{METRICS_PREFIX}:{namespace}:hits'] += hits
+        if misses:
+            _pending[f'{METRICS_PREFIX}:{namespace}:misses'] += misses
+        due = time.monotonic() - _last_flush >= get_flush_interval()
+    if due:
+        flush_metrics()
+
+
+def flush_metrics():
+    """
+    Переносит накопленные в процессе счётчики в общий кеш.
+    """
+    global _last_flush
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    for key, value in pending.items():
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key, value)
+        except ValueError:
+            cache.set(key, value, None)
+
+
+def get_metrics(namespaces=('card', 'category_page', 'product_info')):
+    """
+    Возвращает счётчики попаданий и промахов кеша.
+
+    Перед чтением сбрасывает счётчики текущего процесса; счётчики
+    других процессов попадают в результат с задержкой до
+    get_flush_interval() секунд.
+
+    Args:
+        namespaces (iterable): Типы фрагментов.
+
+    Returns:
+        dict: {namespace: {'hits': int, 'misses': int}}.
+    """
+    flush_metrics()
+    keys = [f'{METRICS_PREFIX}:{ns}:{name}'
+            for ns in namespaces for name in ('hits', 'misses')]
+    values = cache.get_many(keys)
+    return {
+        ns: {name: values.get(f'{METRICS_PREFIX}:{ns}:{name}', 0)
+             for name in ('hits', 'misses')}
+        for ns in namespaces
+    }
+
+
+def fragment_key(namespace, *parts):
+    """
+    Строит ключ фрагмента из его составных частей.
+
+    Args:
+        namespace (str): Тип фрагмента.
+        *parts: ID и версии, от которых зависит фрагмент.
+
+    Returns:
+        str: Ключ кеша.
+    """
+    raw = ':'.join(str(part) for part in parts)
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'{FRAGMENT_PREFIX}:{namespace}:{digest}'
+
+
+def product_version_keys(product):
+    """
+    Возвращает ключи версий, от которых зависит карточка товара.
+
+    Args:
+        product (Product): Товар.
+
+    Returns:
+        list: Ключи версий товара, его категории и бренда.
+    """
+    return [
+        version_key('product', product.pk),
+        version_key('category', product.category_id),
+        version_key('brand', product.brand_id),
+    ]
+
+
+def render_product_cards(products, show_category=True):
+    """
+    Рендерит карточки товаров с кешированием каждой карточки.
+
+    Версии и готовые карточки читаются пакетно (get_many),
+    отсутствующие карточки рендерятся и записываются одним set_many.
+
+    Args:
+        products (iterable): Товары текущей страницы.
+        show_category (bool): Показывать ли категорию в карточке.
+
+    Returns:
+        list: HTML карточек в порядке товаров.
+    """
+    products = list(products)
+    versions = get_versions(
+        key for product in products
+        for key in product_version_keys(product))
+    keys = [
+        fragment_key('card', product.pk, show_category,
+                     *(versions[key] for key in
+                       product_version_keys(product)))
+        for product in products
+    ]
+    cached = cache.get_many(keys)
+    missing = {}
+    cards = []
+    for product, key in zip(products, keys):
+        html = cached.get(key)
+        if html is None:
+            html = render_to_string('catalog/product_card.html', {
+                'product': product,
+                'show_category': show_category,
+            })
+            missing[key] = html
+        cards.append(html)
+    if missing:
+        cache.set_many(missing, get_timeout())
+    record('card', hits=len(products) - len(missing), misses=len(missing))
+    return cards
+
+
+def get_or_render(namespace, key, render, cacheable=None):
+    """
+    Возвращает фрагмент из кеша или рендерит и сохраняет его.
+
+    Args:
+        namespace (str): Тип фрагмента для метрик.
+        key (str): Ключ из fragment_key().
+        render (callable): Функция без аргументов, возвращающая HTML.
+        cacheable (callable | None): Вызывается после рендера; если
+            возвращает False, фрагмент не сохраняется.
+
+    Returns:
+        str: HTML фрагмента.
+    """
+    html = cache.get(key)
+    if html is not None:
+        record(namespace, hits=1)
+        return html
+    html = render()
+    if cacheable is None or cacheable():
+        cache.set(key, html, get_timeout())
+    record(namespace, misses=1)
+    return html
+
+
+def invalidate_products(product_ids):
+    """
+    Делает устаревшими фрагменты товаров и их категорий.
+
+    Используется там, где товары меняются без сигналов post_save
+    (например, пересчёт рейтинга через QuerySet.update()).
+
+    Args:
+        product_ids (iterable): ID изменённых товаров.
+    """
+    from .models import Product
+    product_ids = list(product_ids)
+    category_ids = (Product.objects.filter(pk__in=product_ids)
+                    .values_list('category_id', flat=True).distinct())
+    bump_versions(
+        *(version_key('product', pk) for pk in product_ids),
+        *(version_key('category', pk) for pk in category_ids),
+    )
@@ -0,0 +1,188 @@
+import csv
+import io
+import itertools
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from orders.models import OrderItem
+from reviews.models import Review
+from .models import Product
+
+FORMATS = ('csv', 'jsonl')
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+EXPORTS = {
+    'products': {
+        'model': Product,
+        'date_field': 'created_at',
+        'columns': ('id', 'slug', 'product_name', 'category__slug',
+                    'brand__slug', 'price', 'stock', 'rating',
+                    'rating_count', 'created_at', 'updated_at'),
+    },
+    # одна строка на позицию заказа вместе с полями заказа
+    'orders': {
+        'model': OrderItem,
+        'date_field': 'order__created',
+        'columns': ('order__number', 'order__created', 'order__status',
+                    'order__payment', 'order__is_paid', 'order__paid_date',
+                    'order__user__username', 'order__email',
+                    'order__total', 'product__slug',
+                    'product__product_name', 'price', 'quantity'),
+        'order_by': ('order_id', 'pk'),
+    },
+    'reviews': {
+        'model': Review,
+        'date_field': 'created_at',
+        'columns': ('id', 'product__slug', 'user__username', 'rating',
+                    'text', 'created_at'),
+    },
+}
+
+
+def get_chunk_size():
+    """
+    Возвращает число строк, читаемых из курсора за раз.
+
+    Returns:
+        int: Значение settings.EXPORT_CHUNK_SIZE (по умолчанию 2000).
+    """
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def day_start(day):
+    """
+    Возвращает начало дня в текущем часовом поясе.
+
+    Args:
+        day (date): Дата.
+
+    Returns:
+        datetime: Полночь этой даты с часовым поясом.
+    """
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def export_rows(name, since=None, until=None, chunk_size=None):
+    """
+    Возвращает строки выгрузки, читаемые потоком.
+
+    Строки читаются через QuerySet.iterator(): на PostgreSQL
+    это серверный курсор, из которого берётся по chunk_size строк,
+    поэтому память не зависит от объёма выгрузки. Связанные поля
+    берутся в том же запросе (JOIN), без запросов на строку.
+
+    Args:
+        name (str): Выгрузка из EXPORTS.
+        since (date | None): Начало периода (включительно).
+        until (date | None): Конец периода (включительно).
+        chunk_size (int | None): Строк за одно чтение из курсора.
+
+    Returns:
+        tuple: (названия колонок, итератор кортежей значений).
+
+    Raises:
+        KeyError: Если выгрузки нет.
+    """
+    export = EXPORTS[name]
+    queryset = export['model']._default_manager.all()
+    date_field = export['date_field']
+    # сравнение с границами дня, а не __date, чтобы работал индекс по дате
+    if since:
+        queryset = queryset.filter(**{f'{date_field}__gte': day_start(since)})
+    if until:
+        queryset = queryset.filter(**{
+            f'{date_field}__lt': day_start(until + timedelta(days=1))})
+    columns = export['columns']
+    rows = (queryset.order_by(*export.get('order_by', ('pk',)))
+            .values_list(*columns)
+            .iterator(chunk_size=chunk_size or get_chunk_size()))
+    return columns, rows
+
+
+def chunked_text(lines, size):
+    """
+    Склеивает строки в куски, чтобы не отдавать ответ по строке.
+
+    Args:
+        lines (iterable): Строки текста.
+        size (int): Количество строк в куске.
+
+    Yields:
+        str: Очередной кусок текста.
+    """
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def csv_lines(columns, rows):
+    """
+    Форматирует строки выгрузки как CSV с заголовком.
+
+    Args:
+        columns (tuple): Названия колонок.
+        rows (iterable): Кортежи значений.
+
+    Yields:
+        str: Строка CSV.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in itertools.chain([columns], rows):
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def jsonl_lines(columns, rows):
+    """
+    Форматирует строки выгрузки как JSON Lines.
+
+    Args:
+        columns (tuple): Названия колонок (ключи объектов).
+        rows (iterable): Кортежи значений.
+
+    Yields:
+        str: Объект JSON с переводом строки.
+    """
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, row))) + '\n'
+
+
+def export_text(name, fmt='csv', since=None, until=None, chunk_size=None):
+    """
+    Возвращает выгрузку кусками текста для потоковой записи.
+
+    Args:
+        name (str): Выгрузка из EXPORTS.
+        fmt (str): Формат: 'csv' или 'jsonl'.
+        since (date | None): Начало периода (включительно).
+        until (date | None): Конец периода (включительно).
+        chunk_size (int | None): Строк за одно чтение и в одном куске.
+
+    Returns:
+        generator: Куски текста.
+
+    Raises:
+        KeyError: Если выгрузки нет.
+        ValueError: Если формат неизвестен.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f'Неизвестный формат: {fmt}')
+    chunk_size = chunk_size or get_chunk_size()
+    columns, rows = export_rows(name, since, until, chunk_size)
+    lines = (csv_lines if fmt == 'csv' else jsonl_lines)(columns, rows)
+    return chunked_text(lines, chunk_size)
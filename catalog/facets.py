@@ -0,0 +1,226 @@
+import hashlib
+import json
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import (
+    BooleanField, Case, Count, IntegerField, Value, When,
+)
+from django.db.models.functions import Cast, Floor
+from .models import Brand, Category, Product
+
+DEFAULT_PRICE_BUCKETS = (1000, 5000, 20000, 50000)
+
+
+def get_price_buckets():
+    """
+    Возвращает границы ценовых диапазонов из настроек.
+
+    Returns:
+        tuple: Возрастающие границы settings.CATALOG_PRICE_BUCKETS.
+    """
+    return tuple(getattr(settings, 'CATALOG_PRICE_BUCKETS',
+                         DEFAULT_PRICE_BUCKETS))
+
+
+def facets_cache_key(filters):
+    """
+    Строит ключ кеша по нормализованным значениям фильтров.
+
+    Пустые значения отбрасываются, порядок параметров не важен.
+
+    Args:
+        filters (dict): Текущие значения фильтров (см. filter_products()).
+
+    Returns:
+        str: Ключ кеша.
+    """
+    normalized = sorted((key, str(value).strip())
+                        for key, value in filters.items()
+                        if value not in (None, ''))
+    digest = hashlib.md5(json.dumps(normalized).encode()).hexdigest()
+    return f'catalog:facets:{digest}'
+
+
+def compute_facets(products):
+    """
+    Считает количество товаров по всем фасетам одним GROUP BY запросом.
+
+    Ценовой диапазон включает нижнюю границу и не включает верхнюю
+    (см. price_ranges()).
+
+    Товары группируются одновременно по категории, бренду, ценовому
+    диапазону, целой части рейтинга и наличию, после чего счётчики
+    каждого фасета суммируются в Python. Число групп ограничено
+    количеством сочетаний значений, а не количеством товаров.
+
+    Args:
+        products (QuerySet): Отфильтрованный QuerySet товаров.
+
+    Returns:
+        dict: Счётчики с ключами total, categories, brands, price,
+            rating и in_stock.
+    """
+    bounds = get_price_buckets()
+    price_bucket = Case(
+        *[When(price__lt=bound, then=Value(i))
+          for i, bound in enumerate(bounds)],
+        default=Value(len(bounds)),
+        output_field=IntegerField(),
+    )
+    rows = (products.order_by()
+            .annotate(
+                price_bucket=price_bucket,
+                rating_bucket=Cast(Floor('rating'), IntegerField()),
+                stock_flag=Case(When(stock__gt=0, then=Value(True)),
+                                default=Value(False),
+                                output_field=BooleanField()))
+            .values('category_id', 'brand_id', 'price_bucket',
+                    'rating_bucket', 'stock_flag')
+            .annotate(count=Count('id')))
+
+    facets = {
+        'total': 0,
+        'categories': {},
+        'brands': {},
+        'price': [0] * (len(bounds) + 1),
+        'rating': [0] * 6,
+        'in_stock': 0,
+    }
+    for row in rows:
+        count = row['count']
+        facets['total'] += count
+        categories = facets['categories']
+        categories[row['category_id']] = (
+            categories.get(row['category_id'], 0) + count)
+        if row['brand_id'] is not None:
+            brands = facets['brands']
+            brands[row['brand_id']] = brands.get(row['brand_id'], 0) + count
+        facets['price'][row['price_bucket']] += count
+        facets['rating'][min(max(row['rating_bucket'], 0), 5)] += count
+        if row['stock_flag']:
+            facets['in_stock'] += count
+    return facets
+
+
+def facet_query(params, **values):
+    """
+    Строит строку запроса ссылки фасета из текущих GET-параметров.
+
+    Заменяются только параметры этого фасета, остальные фильтры
+    сохраняются; номер страницы и курсор сбрасываются.
+
+    Args:
+        params (QueryDict): Текущие GET-параметры.
+        **values: Новые значения параметров фасета (None - убрать).
+
+    Returns:
+        str: Строка запроса без '?'.
+    """
+    query = params.copy()
+    for key in ('page', 'cursor'):
+        query.pop(key, None)
+    for key, value in values.items():
+        if value is None:
+            query.pop(key, None)
+        else:
+            query[key] = str(value)
+    return query.urlencode()
+
+
+def price_ranges(counts, params):
+    """
+    Преобразует счётчики ценовых диапазонов в список для шаблона.
+
+    Фильтр max_price включает границу, поэтому в ссылку попадает
+    верхняя граница минус наименьший шаг цены: товар ровно
+    на границе показывается в том же диапазоне, где посчитан.
+
+    Args:
+        counts (list): Счётчики по диапазонам из compute_facets().
+        params (QueryDict): Текущие GET-параметры.
+
+    Returns:
+        list: Словари с ключами min_price, max_price, count и query.
+    """
+    places = Product._meta.get_field('price').decimal_places
+    step = Decimal(1).scaleb(-places)
+    edges = (None,) + get_price_buckets() + (None,)
+    ranges = []
+    for i, count in enumerate(counts):
+        low, high = edges[i], edges[i + 1]
+        ranges.append({
+            'min_price': low, 'max_price': high, 'count': count,
+            'query': facet_query(
+                params, min_price=low,
+                max_price=None if high is None else high - step),
+        })
+    return ranges
+
+
+def rating_ranges(counts, params):
+    """
+    Преобразует счётчики рейтинга в накопительные значения "от N звёзд".
+
+    Args:
+        counts (list): Счётчики по целой части рейтинга (0-5).
+        params (QueryDict): Текущие GET-параметры.
+
+    Returns:
+        list: Словари с ключами min_rating, count и query для N от 5 до 1.
+    """
+    return [{'min_rating': stars, 'count': sum(counts[stars:]),
+             'query': facet_query(params, min_rating=stars)}
+            for stars in range(5, 0, -1)]
+
+
+def get_facets(products, filters):
+    """
+    Возвращает фасеты для отфильтрованных товаров с кешированием.
+
+    Время жизни кеша задаётся settings.CATALOG_FACETS_TIMEOUT.
+
+    Args:
+        products (QuerySet): Отфильтрованный QuerySet товаров.
+        filters (dict): Текущие значения фильтров для ключа кеша.
+
+    Returns:
+        dict: Результат compute_facets().
+    """
+    key = facets_cache_key(filters)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(products)
+        cache.set(key, facets,
+                  getattr(settings, 'CATALOG_FACETS_TIMEOUT', 60))
+    return facets
+
+
+def facet_context(products, filters, params):
+    """
+    Готовит контекст боковой панели фильтров со счётчиками фасетов.
+
+    Каждой категории и бренду добавляется атрибут facet_count.
+
+    Args:
+        products (QuerySet): Отфильтрованный QuerySet товаров.
+        filters (dict): Текущие значения фильтров.
+        params (QueryDict): Текущие GET-параметры для ссылок фасетов.
+
+    Returns:
+        dict: categories, brands, facets, price_ranges и rating_ranges.
+    """
+    facets = get_facets(products, filters)
+    categories = list(Category.objects.all())
+    for category in categories:
+        category.facet_count = facets['categories'].get(category.pk, 0)
+    brands = list(Brand.objects.all())
+    for brand in brands:
+        brand.facet_count = facets['brands'].get(brand.pk, 0)
+    return {
+        'categories': categories,
+        'brands': brands,
+        'facets': facets,
+        'price_ranges': price_ranges(facets['price'], params),
+        'rating_ranges': rating_ranges(facets['rating'], params),
+    }
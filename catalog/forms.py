@@ -0,0 +1,21 @@
+from django import forms
+
+from .importer import FORMATS
+
+
+class ProductImportForm(forms.Form):
+    """
+    Форма загрузки файла импорта товаров в админ-панели.
+
+    Поля:
+        file: Файл CSV или JSON Lines.
+        format: Формат файла (пусто - по расширению).
+        create_missing: Создавать недостающие категории и бренды.
+    """
+    file = forms.FileField(label='Файл',
+                           help_text='CSV с заголовком или JSON Lines')
+    format = forms.ChoiceField(
+        label='Формат', required=False,
+        choices=[('', 'По расширению')] + [(fmt, fmt) for fmt in FORMATS])
+    create_missing = forms.BooleanField(
+        label='Создавать недостающие категории и бренды', required=False)
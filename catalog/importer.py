@@ -0,0 +1,339 @@
+import csv
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import router, transaction
+
+from .cache import bump_versions, version_key
+from .models import Brand, Category, Product
+from .seed import chunked
+
+PRODUCT_FIELDS = ('slug', 'product_name', 'description', 'price', 'stock')
+UPDATE_FIELDS = ('product_name', 'description', 'price', 'stock',
+                 'category', 'brand', 'updated_at')
+FORMATS = ('csv', 'jsonl')
+
+
+def detect_format(filename):
+    """
+    Определяет формат файла импорта по расширению.
+
+    Args:
+        filename (str): Имя файла.
+
+    Returns:
+        str: 'jsonl' для .jsonl/.ndjson, иначе 'csv'.
+    """
+    if filename.lower().endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return 'csv'
+
+
+def read_csv(stream):
+    """
+    Читает строки CSV с заголовком.
+
+    Args:
+        stream (file): Текстовый поток.
+
+    Yields:
+        tuple: (номер строки файла, словарь значений).
+    """
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_jsonl(stream):
+    """
+    Читает строки JSON Lines (один объект JSON в строке).
+
+    Некорректная строка передаётся дальше как ValidationError,
+    чтобы попасть в отчёт об ошибках, а не прервать импорт.
+
+    Args:
+        stream (file): Текстовый поток.
+
+    Yields:
+        tuple: (номер строки файла, словарь значений или ValidationError).
+    """
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            row = ValidationError(f'Некорректный JSON: {e}')
+        else:
+            if not isinstance(row, dict):
+                row = ValidationError('Строка должна быть объектом JSON')
+        yield number, row
+
+
+def read_rows(stream, fmt):
+    """
+    Читает строки файла импорта.
+
+    Args:
+        stream (file): Текстовый поток.
+        fmt (str): Формат: 'csv' или 'jsonl'.
+
+    Returns:
+        generator: Пары (номер строки, значения).
+
+    Raises:
+        ValueError: Если формат неизвестен.
+    """
+    if fmt == 'csv':
+        return read_csv(stream)
+    if fmt == 'jsonl':
+        return read_jsonl(stream)
+    raise ValueError(f'Неизвестный формат: {fmt}')
+
+
+def error_writer(stream):
+    """
+    Возвращает обработчик ошибок, пишущий строки с ошибками в CSV.
+
+    Колонки файла: line (номер строки исходного файла), errors
+    (ошибки через '; ') и row (значения строки в JSON).
+
+    Args:
+        stream (file): Текстовый поток файла ошибок.
+
+    Returns:
+        callable: Обработчик для import_catalog(on_error=...).
+    """
+    writer = csv.writer(stream)
+    writer.writerow(['line', 'errors', 'row'])
+
+    def on_error(number, row, messages):
+        writer.writerow([number, '; '.join(messages),
+                         json.dumps(row, ensure_ascii=False, default=str)])
+
+    return on_error
+
+
+class SlugResolver:
+    """
+    Кеш ID категорий или брендов по slug на время импорта.
+
+    Все slug загружаются одним запросом, поэтому строки файла
+    не обращаются к БД. Недостающие объекты при create_missing
+    создаются (имя берётся из файла или равно slug).
+
+    Атрибуты:
+        model (type): Category или Brand.
+        create_missing (bool): Создавать ли недостающие объекты.
+        ids (dict): {slug: ID}.
+
+    Методы:
+        resolve(): Возвращает ID по slug.
+    """
+
+    def __init__(self, model, create_missing=False):
+        self.model = model
+        self.create_missing = create_missing
+        self.ids = dict(model.objects.values_list('slug', 'pk'))
+
+    def resolve(self, slug, name=None):
+        """
+        Возвращает ID объекта по slug.
+
+        Args:
+            slug (str): Slug категории или бренда.
+            name (str | None): Название для нового объекта.
+
+        Returns:
+            int: ID объекта.
+
+        Raises:
+            ValidationError: Если объекта нет и создавать его нельзя
+                или slug/название некорректны.
+        """
+        if slug in self.ids:
+            return self.ids[slug]
+        label = self.model._meta.verbose_name
+        if not self.create_missing:
+            raise ValidationError(f'{label} со slug «{slug}» не существует')
+        meta = self.model._meta
+        slug = meta.get_field('slug').clean(slug, None)
+        name = meta.get_field('name').clean(name or slug, None)
+        obj, _ = self.model.objects.get_or_create(slug=slug,
+                                                  defaults={'name': name})
+        self.ids[slug] = obj.pk
+        return obj.pk
+
+
+def clean_row(row, categories, brands):
+    """
+    Проверяет строку файла и создаёт из неё товар (без сохранения).
+
+    Поля проверяются валидаторами модели Product. Категория
+    обязательна, бренд - нет; они задаются slug в полях 'category'
+    и 'brand' (названия новых - в 'category_name' и 'brand_name').
+    Необязательных колонок (остаток, бренд) может не быть в файле:
+    новый товар тогда получает значения по умолчанию, а у существующего
+    эти поля не перезаписываются.
+
+    Args:
+        row (dict): Значения строки.
+        categories (SlugResolver): Кеш категорий.
+        brands (SlugResolver): Кеш брендов.
+
+    Returns:
+        tuple: (несохранённый товар, кортеж полей для обновления
+        существующего товара).
+
+    Raises:
+        ValidationError: Со списком ошибок строки.
+    """
+    values = {}
+    errors = []
+    for name in PRODUCT_FIELDS:
+        field = Product._meta.get_field(name)
+        if name not in row and field.has_default():
+            continue
+        value = row.get(name)
+        if value in (None, '') and field.has_default():
+            value = field.get_default()
+        try:
+            values[name] = field.clean(value, None)
+        except ValidationError as e:
+            errors.extend(f'{name}: {message}' for message in e.messages)
+    for name, resolver, required in (('category', categories, True),
+                                     ('brand', brands, False)):
+        if not required and name not in row:
+            continue
+        slug = row.get(name) or ''
+        if not slug:
+            if required:
+                errors.append(f'{name}: Обязательное поле.')
+            else:
+                # пустое значение в колонке снимает связь
+                values[f'{name}_id'] = None
+            continue
+        try:
+            values[f'{name}_id'] = resolver.resolve(
+                str(slug), row.get(f'{name}_name'))
+        except ValidationError as e:
+            errors.extend(f'{name}: {message}' for message in e.messages)
+    if errors:
+        raise ValidationError(errors)
+    update_fields = tuple(
+        name for name in UPDATE_FIELDS
+        if name == 'updated_at' or name in values or f'{name}_id' in values)
+    return Product(**values), update_fields
+
+
+def clean_rows(rows, categories, brands, report, on_error=None):
+    """
+    Пропускает дальше только корректные строки.
+
+    Args:
+        rows (iterable): Пары (номер строки, значения).
+        categories (SlugResolver): Кеш категорий.
+        brands (SlugResolver): Кеш брендов.
+        report (dict): Отчёт, в котором считаются строки и ошибки.
+        on_error (callable): Вызывается с (номером строки, значениями,
+            списком ошибок) для каждой некорректной строки.
+
+    Yields:
+        tuple: (несохранённый товар, поля для обновления).
+    """
+    for number, row in rows:
+        report['rows'] += 1
+        try:
+            if isinstance(row, ValidationError):
+                raise row
+            cleaned = clean_row(row, categories, brands)
+        except ValidationError as e:
+            report['errors'] += 1
+            if on_error:
+                on_error(number, row if isinstance(row, dict) else {},
+                         e.messages)
+            continue
+        yield cleaned
+
+
+def upsert_products(products, update_fields=UPDATE_FIELDS):
+    """
+    Сохраняет пакет товаров одним INSERT ... ON CONFLICT по slug.
+
+    У существующих товаров обновляются только update_fields (дата
+    создания, рейтинг и поля, которых нет в файле, не меняются).
+    Если slug в пакете повторяется, сохраняется последняя строка.
+    После сохранения пересчитывается поисковый вектор и сбрасывается
+    кеш карточек и категорий (старых и новых).
+
+    Args:
+        products (list): Несохранённые товары.
+        update_fields (tuple): Поля, обновляемые при конфликте slug.
+
+    Returns:
+        int: Количество сохранённых товаров.
+    """
+    products = list({product.slug: product for product in products}.values())
+    slugs = [product.slug for product in products]
+    using = router.db_for_write(Product)
+    with transaction.atomic(using=using):
+        existing = list(Product.objects.filter(slug__in=slugs)
+                        .values_list('pk', 'category_id'))
+        Product.objects.bulk_create(
+            products, update_conflicts=True, unique_fields=['slug'],
+            update_fields=update_fields)
+        Product.update_search_vector(
+            Product.objects.filter(slug__in=slugs).values('pk'))
+        # у новых товаров нет закешированных карточек,
+        # сбрасываем только обновлённые товары и все затронутые категории
+        categories = {category_id for _, category_id in existing}
+        categories.update(product.category_id for product in products)
+        bump_versions(
+            *(version_key('product', pk) for pk, _ in existing),
+            *(version_key('category', pk) for pk in categories))
+    return len(products)
+
+
+def import_catalog(stream, fmt='csv', batch_size=1000, create_missing=False,
+                   on_error=None, progress=None):
+    """
+    Импортирует товары из CSV или JSON Lines.
+
+    Файл обрабатывается потоком: чтение, проверка и сохранение
+    связаны генераторами, в памяти держится только текущий пакет
+    и кеш slug категорий и брендов, поэтому размер файла
+    не ограничен. Каждый пакет сохраняется в своей транзакции.
+
+    Колонки: slug, product_name, description, price, stock,
+    category, brand (slug), category_name, brand_name. Колонки stock
+    и brand необязательны: если их нет, у существующих товаров
+    эти поля не меняются.
+
+    Args:
+        stream (file): Текстовый поток файла.
+        fmt (str): Формат: 'csv' или 'jsonl'.
+        batch_size (int): Размер пакета сохранения.
+        create_missing (bool): Создавать недостающие категории и бренды.
+        on_error (callable): Вызывается с (номером строки, значениями,
+            списком ошибок) для каждой некорректной строки.
+        progress (callable): Вызывается с отчётом после каждого пакета.
+
+    Returns:
+        dict: Отчёт {'rows': прочитано строк, 'imported': сохранено
+        товаров, 'errors': строк с ошибками}.
+    """
+    report = {'rows': 0, 'imported': 0, 'errors': 0}
+    categories = SlugResolver(Category, create_missing)
+    brands = SlugResolver(Brand, create_missing)
+    products = clean_rows(read_rows(stream, fmt), categories, brands,
+                          report, on_error)
+    for batch in chunked(products, batch_size):
+        # строки JSON Lines могут содержать разные наборы колонок
+        groups = {}
+        for product, update_fields in batch:
+            groups.setdefault(update_fields, []).append(product)
+        for update_fields, group in groups.items():
+            report['imported'] += upsert_products(group, update_fields)
+        if progress:
+            progress(report)
+    return report
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from catalog.cache import get_metrics
+
+
+class Command(BaseCommand):
+    """
+    Команда вывода статистики кеша каталога.
+
+    Показывает количество попаданий и промахов по каждому типу
+    закешированных фрагментов и долю попаданий.
+
+    Пример:
+        python manage.py cache_stats
+    """
+    help = 'Показывает попадания и промахи кеша каталога'
+
+    def handle(self, *args, **options):
+        """
+        Выводит статистику кеша.
+
+        Args:
+            *args: Позиционные аргументы.
+            **options: Опции командной строки.
+        """
+        for namespace, counters in get_metrics().items():
+            total = counters['hits'] + counters['misses']
+            ratio = counters['hits'] / total * 100 if total else 0
+            self.stdout.write(
+                f"{namespace}: попаданий {counters['hits']}, "
+                f"промахов {counters['misses']} ({ratio:.1f}%)")
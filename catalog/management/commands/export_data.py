@@ -0,0 +1,75 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from catalog.exporter import EXPORTS, FORMATS, export_text
+
+
+class Command(BaseCommand):
+    """
+    Команда потоковой выгрузки товаров, заказов или отзывов.
+
+    Строки читаются серверным курсором пакетами по --chunk-size
+    и сразу пишутся в файл, поэтому память не зависит от объёма
+    выгрузки. Выгрузка заказов содержит по строке на позицию
+    вместе с полями заказа.
+
+    Пример:
+        python manage.py export_data orders --since 2026-01-01 -o orders.csv
+    """
+    help = 'Выгружает товары, заказы или отзывы в CSV или JSON Lines'
+
+    def add_arguments(self, parser):
+        """
+        Добавляет аргументы командной строки.
+
+        Args:
+            parser (ArgumentParser): Парсер аргументов.
+        """
+        parser.add_argument('name', choices=sorted(EXPORTS),
+                            help='Что выгружать')
+        parser.add_argument('--format', choices=FORMATS, default='csv',
+                            help='Формат файла')
+        parser.add_argument('-o', '--output', default='-',
+                            help="Файл выгрузки ('-' - stdout)")
+        parser.add_argument('--since', type=date.fromisoformat,
+                            help='Начало периода ГГГГ-ММ-ДД (включительно)')
+        parser.add_argument('--until', type=date.fromisoformat,
+                            help='Конец периода ГГГГ-ММ-ДД (включительно)')
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='Строк за одно чтение из курсора')
+
+    def handle(self, *args, **options):
+        """
+        Выгружает данные и сообщает, сколько это заняло.
+
+        Args:
+            *args: Позиционные аргументы.
+            **options: Опции командной строки.
+
+        Raises:
+            CommandError: Если файл не открывается или размер пакета
+                некорректен.
+        """
+        chunk_size = options['chunk_size']
+        if chunk_size is not None and chunk_size < 1:
+            raise CommandError('Размер пакета должен быть положительным')
+        started = time.monotonic()
+        chunks = export_text(options['name'], options['format'],
+                             options['since'], options['until'], chunk_size)
+        # при выводе в stdout итог не пишем, чтобы не испортить выгрузку
+        if options['output'] == '-':
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        try:
+            file = open(options['output'], 'w', encoding='utf-8',
+                        newline='')
+        except OSError as e:
+            raise CommandError(f'Не удалось открыть файл: {e}')
+        with file:
+            for chunk in chunks:
+                file.write(chunk)
+        self.stdout.write(self.style.SUCCESS(
+            f"Выгрузка сохранена в {options['output']} за "
+            f'{time.monotonic() - started:.1f} с'))
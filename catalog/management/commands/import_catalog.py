@@ -0,0 +1,100 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries
+from catalog.importer import (
+    FORMATS, detect_format, error_writer, import_catalog,
+)
+
+
+class Command(BaseCommand):
+    """
+    Команда импорта товаров из CSV или JSON Lines.
+
+    Файл читается потоком и сохраняется пакетами
+    (INSERT ... ON CONFLICT по slug), поэтому память не зависит
+    от размера файла. Строки с ошибками пропускаются
+    и записываются в файл ошибок.
+
+    Пример:
+        python manage.py import_catalog feed.jsonl --errors errors.csv
+    """
+    help = 'Импортирует товары из CSV или JSON Lines'
+
+    def add_arguments(self, parser):
+        """
+        Добавляет аргументы командной строки.
+
+        Args:
+            parser (ArgumentParser): Парсер аргументов.
+        """
+        parser.add_argument('path', help="Файл импорта ('-' - stdin)")
+        parser.add_argument('--format', choices=FORMATS,
+                            help='Формат файла (по умолчанию - '
+                                 'по расширению)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Количество товаров в одной вставке')
+        parser.add_argument('--errors',
+                            help='CSV-файл для строк с ошибками')
+        parser.add_argument('--create-missing', action='store_true',
+                            help='Создавать недостающие категории и бренды')
+
+    def handle(self, *args, **options):
+        """
+        Импортирует файл и выводит ход и итоги импорта.
+
+        Args:
+            *args: Позиционные аргументы.
+            **options: Опции командной строки.
+
+        Raises:
+            CommandError: Если файл не открывается или размер пакета
+                некорректен.
+        """
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пакета должен быть положительным')
+        path = options['path']
+        fmt = options['format'] or detect_format(path)
+        started = time.monotonic()
+
+        def progress(report):
+            # при DEBUG=True журнал SQL копил бы тексты всех пакетов
+            reset_queries()
+            seconds = time.monotonic() - started
+            self.stdout.write(
+                f"Строк: {report['rows']}, сохранено: {report['imported']}, "
+                f"ошибок: {report['errors']} ({seconds:.1f} с, "
+                f"{report['rows'] / max(seconds, 1e-9):.0f} строк/с)")
+
+        errors_file = None
+        on_error = None
+        try:
+            if path == '-':
+                stream = sys.stdin
+            else:
+                stream = open(path, encoding='utf-8-sig', newline='')
+            if options['errors']:
+                errors_file = open(options['errors'], 'w', encoding='utf-8',
+                                   newline='')
+                on_error = error_writer(errors_file)
+        except OSError as e:
+            raise CommandError(f'Не удалось открыть файл: {e}')
+        try:
+            report = import_catalog(
+                stream, fmt, batch_size=options['batch_size'],
+                create_missing=options['create_missing'],
+                on_error=on_error, progress=progress)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if errors_file:
+                errors_file.close()
+
+        seconds = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Импортировано товаров: {report['imported']} из "
+            f"{report['rows']} строк за {seconds:.1f} с"))
+        if report['errors']:
+            self.stdout.write(self.style.WARNING(
+                f"Строк с ошибками: {report['errors']}"))
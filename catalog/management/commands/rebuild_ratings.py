@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from catalog.cache import invalidate_products
+from catalog.models import Product
+
+
+class Command(BaseCommand):
+    """
+    Команда пересчёта агрегатов рейтинга товаров.
+
+    Пересчитывает rating, rating_count и rating_sum у всех товаров
+    пакетами по первичному ключу, чтобы не держать блокировку
+    на всей таблице товаров. Кеш карточек и категорий пакета
+    сбрасывается после фиксации его транзакции.
+
+    Пример:
+        python manage.py rebuild_ratings --batch-size 5000
+    """
+    help = 'Пересчитывает средний рейтинг и количество отзывов товаров'
+
+    def add_arguments(self, parser):
+        """
+        Добавляет аргументы командной строки.
+
+        Args:
+            parser (ArgumentParser): Парсер аргументов.
+        """
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Количество товаров в одной транзакции')
+
+    def handle(self, *args, **options):
+        """
+        Выполняет пересчёт агрегатов.
+
+        Args:
+            *args: Позиционные аргументы.
+            **options: Опции командной строки.
+        """
+        batch_size = options['batch_size']
+        last_id = 0
+        updated = 0
+        while True:
+            ids = list(Product.objects.filter(pk__gt=last_id)
+                       .order_by('pk')
+                       .values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                updated += Product.update_rating_stats(ids)
+                invalidate_products(ids)
+            last_id = ids[-1]
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено товаров: {updated}'))
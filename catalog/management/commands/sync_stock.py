@@ -0,0 +1,81 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from catalog.importer import FORMATS, detect_format, error_writer, read_rows
+from catalog.warehouse import MODES, apply_updates
+
+
+class Command(BaseCommand):
+    """
+    Команда применения цен и остатков из файла складской системы.
+
+    Файл CSV или JSON Lines с колонками slug, price, stock читается
+    потоком и применяется пакетами: один UPDATE ... FROM (VALUES ...)
+    на пакет, кеш сбрасывается только у изменившихся товаров.
+
+    Пример:
+        python manage.py sync_stock stock.csv --mode delta
+    """
+    help = 'Обновляет цены и остатки товаров из файла склада'
+
+    def add_arguments(self, parser):
+        """
+        Добавляет аргументы командной строки.
+
+        Args:
+            parser (ArgumentParser): Парсер аргументов.
+        """
+        parser.add_argument('path', help='Файл CSV или JSON Lines')
+        parser.add_argument('--format', choices=FORMATS,
+                            help='Формат файла (по умолчанию - '
+                                 'по расширению)')
+        parser.add_argument('--mode', choices=MODES, default='absolute',
+                            help='absolute - новые значения, '
+                                 'delta - изменения')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Количество товаров в одном UPDATE')
+        parser.add_argument('--errors',
+                            help='CSV-файл для строк с ошибками')
+
+    def handle(self, *args, **options):
+        """
+        Применяет файл и выводит отчёт.
+
+        Args:
+            *args: Позиционные аргументы.
+            **options: Опции командной строки.
+
+        Raises:
+            CommandError: Если файл не открывается или размер пакета
+                некорректен.
+        """
+        batch_size = options['batch_size']
+        if batch_size is not None and batch_size < 1:
+            raise CommandError('Размер пакета должен быть положительным')
+        path = options['path']
+        fmt = options['format'] or detect_format(path)
+        started = time.monotonic()
+        try:
+            stream = open(path, encoding='utf-8-sig', newline='')
+            errors_file = (open(options['errors'], 'w', encoding='utf-8',
+                                newline='')
+                           if options['errors'] else None)
+        except OSError as e:
+            raise CommandError(f'Не удалось открыть файл: {e}')
+        with stream:
+            report = apply_updates(
+                read_rows(stream, fmt),
+                options['mode'], batch_size=batch_size,
+                on_error=errors_file and error_writer(errors_file))
+        if errors_file:
+            errors_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Изменено товаров: {report['changed']}, без изменений: "
+            f"{report['unchanged']} ({time.monotonic() - started:.1f} с)"))
+        if report['not_found']:
+            self.stdout.write(self.style.WARNING(
+                f"Не найдено товаров: {len(report['not_found'])}"))
+        if report['errors']:
+            self.stdout.write(self.style.WARNING(
+                f"Строк с ошибками: {report['errors']}"))
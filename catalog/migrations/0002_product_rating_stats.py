@@ -0,0 +1,56 @@
+# Generated by Django 6.0 on 2026-10-18 11:25
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce
+
+
+def fill_rating_stats(apps, schema_editor):
+    Product = apps.get_model('catalog', 'Product')
+    Review = apps.get_model('reviews', 'Review')
+    reviews = Review.objects.filter(
+        product=OuterRef('pk')).order_by().values('product')
+    Product.objects.update(
+        rating_count=Coalesce(
+            Subquery(reviews.annotate(c=Count('pk')).values('c')), 0),
+        rating_sum=Coalesce(
+            Subquery(reviews.annotate(s=Sum('rating')).values('s')), 0),
+        rating=Coalesce(
+            Subquery(reviews.annotate(
+                a=Cast(Avg('rating'), FloatField())).values('a')),
+            0.0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0001_initial'),
+        ('reviews', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.PositiveIntegerField(
+                default=0, verbose_name='Количество отзывов'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(
+                default=0, verbose_name='Сумма оценок'),
+        ),
+        # Не относится к агрегатам рейтинга: makemigrations подхватил
+        # расхождение verbose_name ('Навзание' в 0001_initial) с моделью.
+        # Меняется только verbose_name, SQL не выполняется; операция
+        # оставлена, чтобы makemigrations --check не находил изменений.
+        migrations.AlterField(
+            model_name='category',
+            name='name',
+            field=models.CharField(
+                max_length=100, verbose_name='Название категории'),
+        ),
+        migrations.RunPython(fill_rating_stats, migrations.RunPython.noop),
+    ]
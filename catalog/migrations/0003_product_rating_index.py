@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 11:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0002_product_rating_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(
+                fields=['rating'], name='catalog_pro_rating_67a263_idx'),
+        ),
+    ]
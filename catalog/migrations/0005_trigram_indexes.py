@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-18 11:33
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_product_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='brand',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['name'], name='catalog_brand_name_trgm',
+                opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['name'], name='catalog_category_name_trgm',
+                opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['product_name'], name='catalog_product_name_trgm',
+                opclasses=['gin_trgm_ops']),
+        ),
+    ]
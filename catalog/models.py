@@ -1,4 +1,13 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, SearchVectorField,
+)
+from django.db import connections, models
+from django.db.models import (
+    Avg, Case, Count, F, FloatField, OuterRef, Q, Subquery, Sum, Value,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce
 from django.urls import reverse
 
 
@@ -33,6 +42,10 @@ class Category(models.Model):
         verbose_name = 'Категория'
         verbose_name_plural = 'Категории'
         ordering = ['name']
+        indexes = [
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'],
+                     name='catalog_category_name_trgm'),
+        ]
 
     def __str__(self):
         return self.name
@@ -69,6 +82,10 @@ class Brand(models.Model):
         verbose_name = 'Бренд'
         verbose_name_plural = 'Бренды'
         ordering = ['name']
+        indexes = [
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'],
+                     name='catalog_brand_name_trgm'),
+        ]
 
     def __str__(self):
         return self.name
@@ -94,6 +111,158 @@ class Brand(models.Model):
         return self.products.count()
 
 
+SEARCH_CONFIG = 'russian'
+
+
+class InsufficientStock(Exception):
+    """
+    Исключение: на складе не хватает товара для резервирования.
+
+    Атрибуты:
+        product_ids (list): ID товаров, которых не хватило.
+    """
+
+    def __init__(self, product_ids):
+        self.product_ids = list(product_ids)
+        super().__init__(
+            f'Недостаточно товара на складе: {self.product_ids}')
+
+
+def product_search_vector():
+    """
+    Возвращает выражение поискового вектора товара.
+
+    Название товара получает вес 'A', описание - вес 'B'.
+
+    Returns:
+        SearchVector: Выражение для записи в Product.search_vector.
+    """
+    return (SearchVector('product_name', weight='A', config=SEARCH_CONFIG) +
+            SearchVector('description', weight='B', config=SEARCH_CONFIG))
+
+
+class ProductQuerySet(models.QuerySet):
+    """
+    QuerySet товаров с готовыми наборами оптимизаций для страниц каталога.
+
+    Методы:
+        for_listing(): Для карточек товаров в списках.
+        for_detail(): Для детальной страницы товара.
+        search(): Полнотекстовый поиск с ранжированием.
+        reserve_stock(): Атомарно списывает остатки товаров.
+    """
+    LISTING_FIELDS = (
+        'product_name', 'slug', 'price', 'stock', 'created_at',
+        'rating', 'rating_count',
+        'category__name', 'category__slug',
+        'brand__name', 'brand__slug',
+    )
+
+    def for_listing(self):
+        """
+        Подготавливает товары для вывода карточками в списке.
+
+        Подгружает категорию и бренд одним JOIN и выбирает только
+        колонки, нужные карточке. Рейтинг и количество отзывов
+        хранятся в самом товаре, поэтому отдельных запросов не требуют.
+
+        Returns:
+            ProductQuerySet: QuerySet с select_related и only().
+        """
+        return self.select_related('category', 'brand').only(
+            *self.LISTING_FIELDS)
+
+    def for_detail(self):
+        """
+        Подготавливает товар для детальной страницы.
+
+        Поисковый вектор на странице не нужен и не загружается.
+
+        Returns:
+            ProductQuerySet: QuerySet с подгруженными категорией и брендом.
+        """
+        return self.select_related('category', 'brand').defer('search_vector')
+
+    def search(self, query):
+        """
+        Ищет товары по названию и описанию.
+
+        На PostgreSQL используется индекс GIN по полю search_vector
+        с русской конфигурацией: совпадения в названии весят больше,
+        чем в описании. Результаты аннотируются полем rank.
+        На других СУБД (например, SQLite в тестах) выполняется
+        поиск по подстроке, а rank у всех результатов одинаковый.
+
+        Args:
+            query (str): Поисковый запрос пользователя.
+
+        Returns:
+            ProductQuerySet: Найденные товары с аннотацией rank.
+        """
+        if connections[self.db].vendor != 'postgresql':
+            return self.filter(
+                Q(product_name__icontains=query) |
+                Q(description__icontains=query)
+            ).annotate(rank=Value(1.0, output_field=FloatField()))
+        search_query = SearchQuery(query, config=SEARCH_CONFIG,
+                                   search_type='websearch')
+        return self.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F('search_vector'), search_query))
+
+    def reserve_stock(self, quantities):
+        """
+        Списывает остатки товаров без гонок за постоянное число запросов.
+
+        Сначала строки товаров блокируются SELECT ... FOR UPDATE
+        в порядке возрастания ID, чтобы параллельные заказы брали
+        блокировки в одном порядке и не возникало взаимоблокировок.
+        Нехватка определяется по заблокированным строкам, затем
+        все остатки уменьшаются одним условным запросом
+        UPDATE ... SET stock = stock - CASE ... WHERE stock >= CASE ...,
+        поэтому склад не уходит в минус, а другие поля товара
+        не перезаписываются.
+
+        Должен вызываться внутри transaction.atomic(): при нехватке
+        хотя бы одного товара выбрасывается исключение, и транзакция
+        откатывается целиком.
+
+        Цены читаются из тех же заблокированных строк, поэтому
+        позиции и сумма заказа считаются по ценам на момент списания.
+
+        Args:
+            quantities (dict): Отображение ID товара -> количество.
+
+        Returns:
+            dict: Отображение ID товара -> цена из заблокированной строки.
+
+        Raises:
+            InsufficientStock: Если какого-либо товара не хватает.
+        """
+        if not quantities:
+            return {}
+        products = self.filter(pk__in=quantities)
+        locked = list(products.select_for_update().order_by('pk')
+                      .values_list('pk', 'stock', 'price'))
+        stock = {pk: value for pk, value, _ in locked}
+        prices = {pk: price for pk, _, price in locked}
+        failed = [pk for pk in sorted(quantities)
+                  if stock.get(pk, 0) < quantities[pk]]
+        if failed:
+            raise InsufficientStock(failed)
+        amount = Case(
+            *(When(pk=pk, then=Value(quantity))
+              for pk, quantity in quantities.items()),
+            output_field=models.IntegerField(),
+        )
+        updated = products.filter(stock__gte=amount).update(
+            stock=F('stock') - amount)
+        if updated != len(quantities):
+            # Без блокировок строк (SQLite) остаток мог измениться
+            # между чтением и обновлением.
+            raise InsufficientStock(sorted(quantities))
+        return prices
+
+
 class Product(models.Model):
     """
     Модель товара.
@@ -103,7 +272,12 @@ class Product(models.Model):
         description (TextField): Описание товара.
         slug (SlugField): Уникальный URL-идентификатор товара.
         price (DecimalField): Цена товара.
-        rating (FloatField): Рейтинг товара (по умолчанию 0.0).
+        rating (FloatField): Средний рейтинг по отзывам (поддерживается
+            автоматически, по умолчанию 0.0).
+        rating_count (PositiveIntegerField): Количество отзывов.
+        rating_sum (PositiveIntegerField): Сумма оценок всех отзывов.
+        search_vector (SearchVectorField): Поисковый вектор по названию
+            и описанию (заполняется автоматически, только PostgreSQL).
         created_at (DateTimeField): Дата создания записи.
         updated_at (DateTimeField): Дата последнего обновления.
         stock (IntegerField): Количество на складе.
@@ -115,8 +289,14 @@ class Product(models.Model):
         average_rating: Возвращает средний рейтинг на основе отзывов.
         reviews_count: Возвращает количество отзывов.
 
+    Менеджеры:
+        objects: Менеджер на основе ProductQuerySet (for_listing(), for_detail()).
+
     Методы:
         get_absolute_url(): Возвращает абсолютный URL детальной страницы товара.
+        update_rating_stats(): Пересчитывает агрегаты рейтинга по отзывам.
+        shift_rating_stats(): Изменяет агрегаты рейтинга на приращение.
+        update_search_vector(): Пересчитывает поисковый вектор товаров.
         __str__(): Возвращает строку вида "<Бренд> <Название товара>".
     """
     product_name = models.CharField(max_length=100,
@@ -129,6 +309,11 @@ class Product(models.Model):
                                 verbose_name="Цена")
     rating = models.FloatField(default=0.0,
                                verbose_name="Рейтинг товара")
+    rating_count = models.PositiveIntegerField(default=0,
+                                               verbose_name="Количество отзывов")
+    rating_sum = models.PositiveIntegerField(default=0,
+                                             verbose_name="Сумма оценок")
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True,
                                       verbose_name="Дата добавления товара")
     updated_at = models.DateTimeField(auto_now=True,
@@ -142,6 +327,8 @@ class Product(models.Model):
                               related_name='products',
                               verbose_name='Бренд')
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Товар"
         verbose_name_plural = "Товары"
@@ -149,7 +336,19 @@ class Product(models.Model):
         indexes = [
             models.Index(fields=['slug']),
             models.Index(fields=['price']),
-            models.Index(fields=['created_at'])
+            models.Index(fields=['created_at']),
+            models.Index(fields=['rating']),
+            # список товаров категории с сортировкой по дате
+            models.Index(fields=['category', 'created_at', 'id'],
+                         name='catalog_product_cat_created'),
+            # фильтр «в наличии»
+            models.Index(fields=['created_at', 'id'],
+                         condition=Q(stock__gt=0),
+                         name='catalog_product_in_stock'),
+            GinIndex(fields=['search_vector'],
+                     name='catalog_product_search_gin'),
+            GinIndex(fields=['product_name'], opclasses=['gin_trgm_ops'],
+                     name='catalog_product_name_trgm'),
         ]
 
     def __str__(self):
@@ -179,17 +378,15 @@ class Product(models.Model):
     @property
     def average_rating(self):
         """
-        Рассчитывает средний рейтинг товара на основе отзывов.
+        Возвращает средний рейтинг товара на основе отзывов.
+
+        Значение хранится в поле rating и обновляется при изменении отзывов,
+        поэтому обращение к свойству не выполняет запросов к БД.
 
         Returns:
             float: Средний рейтинг, округлённый до 1 знака, или 0.0 если отзывов нет.
         """
-        from reviews.models import Review
-        reviews = Review.objects.filter(product=self)
-        if reviews.exists():
-            total = sum(review.rating for review in reviews)
-            return round(total / reviews.count(), 1)
-        return 0.0
+        return round(self.rating, 1)
 
     @property
     def reviews_count(self):
@@ -199,5 +396,90 @@ class Product(models.Model):
         Returns:
             int: Количество отзывов.
         """
+        return self.rating_count
+
+    @classmethod
+    def update_rating_stats(cls, product_ids=None):
+        """
+        Пересчитывает количество, сумму и средний рейтинг отзывов.
+
+        Выполняется одним UPDATE с коррелированными подзапросами,
+        поэтому безопасен внутри transaction.atomic() и не загружает
+        товары и отзывы в Python.
+
+        Args:
+            product_ids (iterable | None): ID товаров для пересчёта.
+                Если None - пересчитываются все товары.
+
+        Returns:
+            int: Количество обновлённых товаров.
+        """
         from reviews.models import Review
-        return Review.objects.filter(product=self).count()
+        reviews = Review.objects.filter(
+            product=OuterRef('pk')).order_by().values('product')
+        products = cls.objects.all()
+        if product_ids is not None:
+            products = products.filter(pk__in=product_ids)
+        return products.update(
+            rating_count=Coalesce(
+                Subquery(reviews.annotate(c=Count('pk')).values('c')), 0),
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(s=Sum('rating')).values('s')), 0),
+            rating=Coalesce(
+                Subquery(reviews.annotate(
+                    a=Cast(Avg('rating'), FloatField())).values('a')),
+                0.0),
+        )
+
+    @classmethod
+    def shift_rating_stats(cls, product_id, count, total):
+        """
+        Изменяет агрегаты рейтинга товара на приращение одним UPDATE.
+
+        Новые значения вычисляются в БД из текущих (F()), а строка
+        товара блокируется на время UPDATE, поэтому одновременно
+        добавленные отзывы не теряют изменения друг друга, в отличие
+        от пересчёта подзапросом по уже зафиксированным отзывам.
+
+        Args:
+            product_id (int): ID товара.
+            count (int): Изменение количества отзывов.
+            total (int): Изменение суммы оценок.
+
+        Returns:
+            int: Количество обновлённых товаров (0 или 1).
+        """
+        new_count = F('rating_count') + count
+        new_sum = F('rating_sum') + total
+        return cls.objects.filter(pk=product_id).update(
+            rating_count=new_count,
+            rating_sum=new_sum,
+            # справа везде значения до UPDATE
+            rating=Case(
+                When(rating_count__gt=-count,
+                     then=Cast(new_sum, FloatField()) / new_count),
+                default=Value(0.0),
+                output_field=FloatField(),
+            ),
+        )
+
+    @classmethod
+    def update_search_vector(cls, product_ids=None):
+        """
+        Пересчитывает поисковый вектор товаров одним UPDATE.
+
+        На СУБД, отличных от PostgreSQL, ничего не делает.
+
+        Args:
+            product_ids (iterable | None): ID товаров для пересчёта.
+                Если None - пересчитываются все товары.
+
+        Returns:
+            int: Количество обновлённых товаров.
+        """
+        products = cls.objects.all()
+        if connections[products.db].vendor != 'postgresql':
+            return 0
+        if product_ids is not None:
+            products = products.filter(pk__in=product_ids)
+        return products.update(search_vector=product_search_vector())
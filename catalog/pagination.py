@@ -0,0 +1,194 @@
+import base64
+from datetime import datetime
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.http import QueryDict
+from django.db.models import Q
+
+KEYSET_ORDERING = ('created_at', 'id')
+
+
+def get_page_size():
+    """
+    Возвращает размер страницы каталога из настроек.
+
+    Returns:
+        int: Значение settings.CATALOG_PAGE_SIZE (по умолчанию 24).
+    """
+    return getattr(settings, 'CATALOG_PAGE_SIZE', 24)
+
+
+def encode_cursor(product):
+    """
+    Кодирует позицию товара в непрозрачный курсор.
+
+    Args:
+        product (Product): Последний товар на странице.
+
+    Returns:
+        str: Курсор в формате urlsafe base64 от "<created_at>|<id>".
+    """
+    return _encode_position(product.created_at, product.pk)
+
+
+def _encode_position(created_at, pk):
+    raw = f'{created_at.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Декодирует курсор, созданный encode_cursor().
+
+    Args:
+        cursor (str): Курсор из GET-параметра.
+
+    Returns:
+        tuple | None: (created_at, id) или None, если курсор некорректен.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        created_at, pk = raw.split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    """
+    Страница товаров, полученная по курсору.
+
+    Атрибуты:
+        object_list (list): Товары текущей страницы.
+        next_cursor (str | None): Курсор следующей страницы или None.
+    """
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        """
+        Проверяет, есть ли следующая страница.
+
+        Returns:
+            bool: True если next_cursor задан.
+        """
+        return self.next_cursor is not None
+
+
+def keyset_paginate(queryset, cursor=None, page_size=None):
+    """
+    Возвращает страницу товаров по курсору (created_at, id).
+
+    В отличие от OFFSET, выборка следующей страницы идёт по индексу
+    от последней прочитанной позиции, поэтому стоимость не растёт
+    с номером страницы.
+
+    Args:
+        queryset (QuerySet): Отфильтрованный QuerySet товаров.
+        cursor (str | None): Курсор из предыдущей страницы.
+        page_size (int | None): Размер страницы (по умолчанию из настроек).
+
+    Returns:
+        KeysetPage: Страница товаров и курсор следующей страницы.
+    """
+    page_size = page_size or get_page_size()
+    queryset = queryset.order_by(*KEYSET_ORDERING)
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        created_at, pk = position
+        queryset = queryset.filter(
+            Q(created_at__gt=created_at) |
+            Q(created_at=created_at, id__gt=pk)
+        )
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        next_cursor = encode_cursor(items[-1])
+    return KeysetPage(items, next_cursor)
+
+
+def pagination_params(params):
+    """
+    Оставляет из GET-параметров только нормализованную позицию списка.
+
+    Курсор перекодируется в канонический вид (некорректный - пустой,
+    то есть первая страница), номер страницы приводится к целому
+    не меньше 1. Остальные параметры отбрасываются, поэтому из них
+    можно строить ключ кеша.
+
+    Args:
+        params (QueryDict): GET-параметры запроса.
+
+    Returns:
+        QueryDict: Параметр 'cursor' или 'page'.
+    """
+    normalized = QueryDict(mutable=True)
+    cursor = params.get('cursor')
+    if cursor is not None:
+        position = decode_cursor(cursor)
+        normalized['cursor'] = (
+            '' if position is None else _encode_position(*position))
+        return normalized
+    try:
+        page = max(int(params.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    normalized['page'] = str(page)
+    return normalized
+
+
+def paginate_products(request, queryset, ordering=KEYSET_ORDERING,
+                      params=None):
+    """
+    Разбивает товары на страницы в зависимости от GET-параметров.
+
+    Если передан параметр 'cursor' и товары упорядочены по
+    (created_at, id) - используется keyset-пагинация,
+    иначе обычная постраничная навигация по параметру 'page'.
+
+    Args:
+        request (HttpRequest): Объект запроса.
+        queryset (QuerySet): Отфильтрованный QuerySet товаров.
+        ordering (tuple): Порядок сортировки товаров.
+        params (QueryDict | None): GET-параметры вместо request.GET.
+
+    Returns:
+        dict: Контекст для шаблона: products, page_obj, next_cursor,
+            pagination_query.
+    """
+    if params is None:
+        params = request.GET
+    query = params.copy()
+    query.pop('page', None)
+    query.pop('cursor', None)
+    context = {'pagination_query': query.urlencode()}
+
+    cursor = params.get('cursor')
+    if cursor is not None and tuple(ordering) == KEYSET_ORDERING:
+        page = keyset_paginate(queryset, cursor)
+        context.update({
+            'products': page,
+            'page_obj': None,
+            'next_cursor': page.next_cursor,
+        })
+        return context
+
+    paginator = Paginator(queryset.order_by(*ordering),
+                          get_page_size())
+    page_obj = paginator.get_page(params.get('page'))
+    context.update({
+        'products': page_obj,
+        'page_obj': page_obj,
+        'next_cursor': None,
+    })
+    return context
@@ -0,0 +1,366 @@
+import bisect
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connections, router
+from django.utils import timezone
+
+from cart.models import Cart, CartItem
+from orders.models import Order, OrderItem
+from reviews.models import Review
+from .models import Brand, Category, Product
+
+DEFAULT_SIZES = {
+    'categories': 20,
+    'brands': 50,
+    'products': 10000,
+    'users': 1000,
+    'reviews': 50000,
+    'carts': 300,
+    'orders': 2000,
+}
+
+ADJECTIVES = ['Умный', 'Беспроводной', 'Компактный', 'Мощный', 'Лёгкий',
+              'Игровой', 'Складной', 'Водонепроницаемый', 'Детский',
+              'Профессиональный']
+NOUNS = ['телефон', 'ноутбук', 'чайник', 'пылесос', 'рюкзак', 'монитор',
+         'холодильник', 'фен', 'велосипед', 'планшет', 'смартфон',
+         'наушники']
+RATING_WEIGHTS = [5, 5, 10, 30, 50]
+
+
+def zipf_cum_weights(count, exponent=1.1):
+    """
+    Возвращает накопленные веса распределения Ципфа.
+
+    Элемент с рангом k выбирается с вероятностью, пропорциональной
+    1 / k ** exponent: несколько первых элементов популярны,
+    остальные образуют длинный хвост.
+
+    Args:
+        count (int): Количество элементов.
+        exponent (float): Показатель распределения.
+
+    Returns:
+        list: Накопленные веса для random.choices(cum_weights=...).
+    """
+    weights = []
+    total = 0.0
+    for rank in range(1, count + 1):
+        total += 1 / rank ** exponent
+        weights.append(total)
+    return weights
+
+
+def chunked(iterable, size):
+    """
+    Разбивает поток объектов на списки заданного размера.
+
+    Args:
+        iterable (iterable): Исходные объекты.
+        size (int): Размер пакета.
+
+    Yields:
+        list: Очередной пакет.
+    """
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def column_defaults(model, fields):
+    """
+    Возвращает значения полей модели, не переданных в строках.
+
+    Для auto_now и auto_now_add подставляется текущее время,
+    для остальных полей - значение по умолчанию.
+
+    Args:
+        model (type): Класс модели.
+        fields (tuple): Имена (attname) переданных полей.
+
+    Returns:
+        dict: {attname: значение}.
+    """
+    now = timezone.now()
+    defaults = {}
+    for field in model._meta.concrete_fields:
+        if field.primary_key or field.attname in fields:
+            continue
+        if getattr(field, 'auto_now', False) or getattr(
+                field, 'auto_now_add', False):
+            defaults[field.attname] = now
+        else:
+            defaults[field.attname] = field.get_default()
+    return defaults
+
+
+def copy_rows(model, fields, rows, using):
+    """
+    Загружает строки в таблицу командой COPY (PostgreSQL, psycopg 3).
+
+    Args:
+        model (type): Класс модели.
+        fields (tuple): Имена (attname) полей в строках.
+        rows (list): Кортежи значений.
+        using (str): Алиас БД.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    defaults = column_defaults(model, fields)
+    names = (*fields, *defaults)
+    columns = ', '.join(quote(model._meta.get_field(name).column)
+                        for name in names)
+    extra = tuple(defaults.values())
+    with connection.cursor() as cursor:
+        with cursor.cursor.copy(
+                f'COPY {quote(model._meta.db_table)} ({columns}) '
+                f'FROM STDIN') as copy:
+            for row in rows:
+                copy.write_row(row + extra)
+
+
+def can_copy(using):
+    """
+    Проверяет, можно ли загружать строки командой COPY.
+
+    Args:
+        using (str): Алиас БД.
+
+    Returns:
+        bool: True для PostgreSQL с драйвером psycopg 3.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        return hasattr(cursor.cursor, 'copy')
+
+
+def insert(model, fields, rows, chunk_size, returning=True):
+    """
+    Вставляет строки пакетами: COPY на PostgreSQL, иначе bulk_create().
+
+    Строки передаются кортежами, а не объектами модели, чтобы
+    не тратить время на создание экземпляров при загрузке через COPY.
+    Непереданные поля получают значения по умолчанию.
+
+    Args:
+        model (type): Класс модели.
+        fields (tuple): Имена (attname) полей в строках.
+        rows (iterable): Кортежи значений (можно генератор).
+        chunk_size (int): Размер пакета.
+        returning (bool): Вернуть ID вставленных строк.
+
+    Returns:
+        list | int: ID вставленных строк в порядке вставки, а при
+            returning=False - только их количество.
+    """
+    using = router.db_for_write(model)
+    manager = model._default_manager.db_manager(using)
+    last_pk = manager.order_by('-pk').values_list('pk', flat=True).first()
+    copy = can_copy(using)
+    count = 0
+    for chunk in chunked(rows, chunk_size):
+        count += len(chunk)
+        if copy:
+            copy_rows(model, fields, chunk, using)
+        else:
+            manager.bulk_create(model(**dict(zip(fields, row)))
+                                for row in chunk)
+    if not returning:
+        return count
+    inserted = manager.order_by('pk')
+    if last_pk is not None:
+        inserted = inserted.filter(pk__gt=last_pk)
+    return list(inserted.values_list('pk', flat=True))
+
+
+def review_counts(rng, weights, total, limit):
+    """
+    Распределяет отзывы по товарам пропорционально популярности.
+
+    Число отзывов на товар не может превышать число пользователей
+    (один отзыв на пользователя), излишек у самых популярных товаров
+    раздаётся случайным товарам, у которых есть запас.
+
+    Args:
+        rng (Random): Генератор случайных чисел.
+        weights (list): Накопленные веса популярности товаров.
+        total (int): Сколько отзывов создать.
+        limit (int): Максимум отзывов на товар.
+
+    Returns:
+        list: Количество отзывов для каждого ранга популярности.
+    """
+    total = min(total, len(weights) * limit)
+    counts = []
+    previous = 0.0
+    for weight in weights:
+        expected = total * (weight - previous) / weights[-1]
+        previous = weight
+        count = int(expected) + (rng.random() < expected % 1)
+        counts.append(min(count, limit))
+    missing = total - sum(counts)
+    while missing > 0:
+        rank = rng.randrange(len(counts))
+        if counts[rank] < limit:
+            counts[rank] += 1
+            missing -= 1
+    return counts
+
+
+def seed_shop(sizes=None, seed=42, chunk_size=5000, token=None,
+              progress=None):
+    """
+    Заполняет магазин синтетическими данными.
+
+    Популярность категорий, брендов и товаров подчиняется закону Ципфа,
+    поэтому число отзывов, позиций корзин и заказов на товар сильно
+    перекошено: немногие товары получают большую часть отзывов.
+    Оценки смещены к 4-5 звёздам, цены распределены логнормально.
+
+    Args:
+        sizes (dict): Количество объектов каждого вида
+            (ключи как в DEFAULT_SIZES).
+        seed (int): Зерно генератора случайных чисел.
+        chunk_size (int): Размер пакета вставки.
+        token (str): Суффикс уникальных полей (slug, username, номер
+            заказа), чтобы повторный запуск не конфликтовал с прошлым.
+        progress (callable): Вызывается с (названием, количеством)
+            после загрузки каждого вида объектов.
+
+    Returns:
+        dict: Количество созданных объектов каждого вида.
+    """
+    sizes = {**DEFAULT_SIZES, **(sizes or {})}
+    rng = random.Random(seed)
+    token = token or format(time.time_ns() // 1000 % 16 ** 8, 'x')
+    created = {}
+
+    def done(name, count):
+        created[name] = count
+        if progress:
+            progress(name, count)
+
+    category_ids = insert(Category, ('name', 'slug'), (
+        (f'Категория {i + 1}', f'seed-{token}-c{i}')
+        for i in range(sizes['categories'])), chunk_size)
+    done('categories', len(category_ids))
+
+    brand_ids = insert(Brand, ('name', 'slug'), (
+        (f'Бренд {i + 1}', f'seed-{token}-b{i}')
+        for i in range(sizes['brands'])), chunk_size)
+    done('brands', len(brand_ids))
+
+    category_weights = zipf_cum_weights(len(category_ids))
+    brand_weights = zipf_cum_weights(len(brand_ids))
+    prices = []
+
+    def products():
+        for i in range(sizes['products']):
+            price = Decimal(f'{min(rng.lognormvariate(8, 1.2), 9999999):.2f}')
+            prices.append(price)
+            name = f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i + 1}'
+            brand_id = None
+            if brand_ids and rng.random() > 0.1:
+                brand_id = rng.choices(brand_ids,
+                                       cum_weights=brand_weights)[0]
+            yield (
+                name,
+                f'{name}. Описание товара для нагрузочных тестов.',
+                f'seed-{token}-p{i}',
+                price,
+                0 if rng.random() < 0.1 else rng.randint(1, 200),
+                rng.choices(category_ids, cum_weights=category_weights)[0],
+                brand_id,
+            )
+
+    product_ids = insert(Product, (
+        'product_name', 'description', 'slug', 'price', 'stock',
+        'category_id', 'brand_id'), products(), chunk_size)
+    done('products', len(product_ids))
+
+    user_ids = insert(get_user_model(), ('username', 'email', 'password'), (
+        (f'seed-{token}-u{i}', f'u{i}@{token}.example', '!')
+        for i in range(sizes['users'])), chunk_size)
+    done('users', len(user_ids))
+
+    # ранги популярности не зависят от порядка создания товаров
+    popular = list(range(len(product_ids)))
+    rng.shuffle(popular)
+    product_weights = zipf_cum_weights(len(popular))
+
+    def pick_products(count):
+        picked = set()
+        while len(picked) < min(count, len(popular)):
+            picked.add(popular[bisect.bisect_left(
+                product_weights, rng.random() * product_weights[-1])])
+        return picked
+
+    def reviews():
+        counts = review_counts(rng, product_weights, sizes['reviews'],
+                               len(user_ids))
+        ratings = rng.choices(range(1, 6), RATING_WEIGHTS, k=1000)
+        for index, count in zip(popular, counts):
+            product_id = product_ids[index]
+            # каждый товар читает таблицу оценок со своего места,
+            # поэтому оценки зависят от отзыва, а не только от автора
+            offset = rng.randrange(len(ratings))
+            users = rng.sample(range(len(user_ids)), count)
+            for position, user_index in enumerate(users, offset):
+                yield (product_id, user_ids[user_index],
+                       ratings[position % len(ratings)])
+
+    review_count = insert(Review, ('product_id', 'user_id', 'rating'),
+                          reviews(), chunk_size, returning=False)
+    done('reviews', review_count)
+
+    cart_users = rng.sample(user_ids, min(sizes['carts'], len(user_ids)))
+    cart_ids = insert(Cart, ('user_id',),
+                      ((user_id,) for user_id in cart_users), chunk_size)
+    insert(CartItem, ('cart_id', 'product_id', 'quantity'), (
+        (cart_id, product_ids[index], rng.randint(1, 3))
+        for cart_id in cart_ids
+        for index in pick_products(rng.randint(1, 5))
+    ), chunk_size, returning=False)
+    done('carts', len(cart_ids))
+
+    statuses = [status for status, _ in Order.STATUSES]
+    order_count = 0
+    for start in range(0, sizes['orders'] if user_ids else 0, chunk_size):
+        lines = []
+        orders = []
+        for i in range(start, min(start + chunk_size, sizes['orders'])):
+            items = [(index, rng.randint(1, 3))
+                     for index in pick_products(rng.randint(1, 5))]
+            lines.append(items)
+            orders.append((
+                rng.choice(user_ids),
+                f'S-{token}-{i}',
+                rng.choice(statuses),
+                sum(prices[index] * quantity for index, quantity in items),
+                'Покупатель', 'buyer@example.com', '+70000000000', 'Москва',
+            ))
+        order_ids = insert(Order, (
+            'user_id', 'number', 'status', 'total', 'full_name', 'email',
+            'phone', 'address'), orders, chunk_size)
+        insert(OrderItem, ('order_id', 'product_id', 'price', 'quantity'), (
+            (order_id, product_ids[index], prices[index], quantity)
+            for order_id, items in zip(order_ids, lines)
+            for index, quantity in items
+        ), chunk_size, returning=False)
+        order_count += len(order_ids)
+    done('orders', order_count)
+
+    for chunk in chunked(product_ids, chunk_size):
+        Product.update_rating_stats(chunk)
+        Product.update_search_vector(chunk)
+    return created
@@ -0,0 +1,94 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .cache import bump_versions, version_key
+from .models import Brand, Category, Product
+
+
+@receiver(post_save, sender=Product)
+def update_product_search_vector(sender, instance, update_fields=None,
+                                 **kwargs):
+    """
+    Обновляет поисковый вектор товара после сохранения.
+
+    Если сохранялись только поля, не влияющие на поиск
+    (например, цена или остаток), вектор не пересчитывается.
+
+    Args:
+        sender (type): Модель Product.
+        instance (Product): Сохранённый товар.
+        update_fields (frozenset | None): Сохранённые поля.
+        **kwargs: Дополнительные аргументы сигнала.
+    """
+    if update_fields is not None and not (
+            {'product_name', 'description'} & set(update_fields)):
+        return
+    Product.update_search_vector([instance.pk])
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_category(sender, instance, **kwargs):
+    """
+    Запоминает категорию товара до сохранения.
+
+    Если товар переносят в другую категорию, кеш нужно сбросить
+    у обеих категорий.
+
+    Args:
+        sender (type): Модель Product.
+        instance (Product): Сохраняемый товар.
+        **kwargs: Дополнительные аргументы сигнала.
+    """
+    instance._previous_category_id = None
+    if instance.pk:
+        instance._previous_category_id = Product.objects.filter(
+            pk=instance.pk).values_list('category_id', flat=True).first()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_cache(sender, instance, **kwargs):
+    """
+    Сбрасывает кеш карточки товара и страниц его категории.
+
+    Args:
+        sender (type): Модель Product.
+        instance (Product): Изменённый или удалённый товар.
+        **kwargs: Дополнительные аргументы сигнала.
+    """
+    keys = [version_key('product', instance.pk),
+            version_key('category', instance.category_id)]
+    previous = getattr(instance, '_previous_category_id', None)
+    if previous:
+        keys.append(version_key('category', previous))
+    bump_versions(*keys)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, instance, **kwargs):
+    """
+    Сбрасывает кеш страниц категории и карточек её товаров.
+
+    Args:
+        sender (type): Модель Category.
+        instance (Category): Изменённая или удалённая категория.
+        **kwargs: Дополнительные аргументы сигнала.
+    """
+    bump_versions(version_key('category', instance.pk))
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+def invalidate_brand_cache(sender, instance, **kwargs):
+    """
+    Сбрасывает кеш карточек товаров бренда.
+
+    Страницы категорий зависят от общей версии брендов,
+    так как бренд может встречаться в любой категории.
+
+    Args:
+        sender (type): Модель Brand.
+        instance (Brand): Изменённый или удалённый бренд.
+        **kwargs: Дополнительные аргументы сигнала.
+    """
+    bump_versions(version_key('brand', instance.pk), version_key('brand'))
@@ -1,9 +1,41 @@
+import csv
+import json
+import os
+import tempfile
+from datetime import timedelta
+
 import pytest
 from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
 from django.urls import reverse
-from django.test import TestCase
+from django.utils import timezone
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import Count
+from django.http import QueryDict
+from unittest import skipUnless
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from unittest.mock import patch, Mock
+from cart.models import Cart
+from orders.models import Order
+from reviews.models import Review
+from users.models import User
+from .admin_utils import (
+    BoundedRelatedFieldListFilter, EstimatedCountPaginator,
+)
 from .models import Category, Brand, Product
+from .cache import (
+    flush_metrics, get_metrics, get_versions, record, render_product_cards,
+    version_key,
+)
+from .exporter import export_rows, export_text
+from .facets import compute_facets, facets_cache_key
+from .importer import import_catalog
+from .warehouse import apply_updates
+from .pagination import decode_cursor, encode_cursor, keyset_paginate
 
 
 class TestCategoryModel(TestCase):
@@ -473,3 +505,1230 @@ class TestPytestModels:
         )
 
         assert brand.product_count == 2
+
+
+class TestProductListView(TestCase):
+
+    def setUp(self):
+        self.phones = Category.objects.create(name="Телефоны", slug="phones")
+        self.laptops = Category.objects.create(name="Ноутбуки", slug="laptops")
+        self.good_phone = Product.objects.create(
+            product_name="Хороший телефон", description="Описание",
+            slug="good-phone", price=Decimal("1000.00"),
+            category=self.phones, rating=4.5, rating_count=2)
+        self.bad_phone = Product.objects.create(
+            product_name="Плохой телефон", description="Описание",
+            slug="bad-phone", price=Decimal("500.00"),
+            category=self.phones, rating=2.0, rating_count=1)
+        self.good_laptop = Product.objects.create(
+            product_name="Хороший ноутбук", description="Описание",
+            slug="good-laptop", price=Decimal("3000.00"),
+            category=self.laptops, rating=5.0, rating_count=1)
+
+    def test_rating_filter_composes_with_other_filters(self):
+        response = self.client.get(reverse('catalog:product_list'), {
+            'min_rating': '4',
+            'category': 'phones',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['products']),
+                         [self.good_phone])
+
+    def test_max_rating_filter(self):
+        response = self.client.get(reverse('catalog:product_list'),
+                                   {'max_rating': '3'})
+        self.assertEqual(list(response.context['products']),
+                         [self.bad_phone])
+
+    def test_invalid_rating_is_ignored(self):
+        response = self.client.get(reverse('catalog:product_list'),
+                                   {'min_rating': 'abc'})
+        self.assertEqual(len(response.context['products']), 3)
+
+
+@override_settings(CATALOG_PAGE_SIZE=2)
+class TestProductPagination(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Тест", slug="test")
+        self.products = [
+            Product.objects.create(
+                product_name=f"Товар {i}", description="Описание",
+                slug=f"product-{i}", price=Decimal("100.00"),
+                category=self.category)
+            for i in range(5)
+        ]
+
+    def test_page_numbers(self):
+        response = self.client.get(reverse('catalog:product_list'),
+                                   {'page': 3})
+        self.assertEqual(list(response.context['products']),
+                         self.products[4:])
+        self.assertEqual(response.context['page_obj'].paginator.num_pages, 3)
+
+    def test_category_detail_is_paginated(self):
+        response = self.client.get(reverse(
+            'catalog:category_detail', kwargs={'slug': 'test'}))
+        self.assertEqual(list(response.context['products']),
+                         self.products[:2])
+
+    def test_keyset_walks_all_products_once(self):
+        seen = []
+        page = keyset_paginate(Product.objects.all())
+        seen.extend(page)
+        while page.has_next():
+            page = keyset_paginate(Product.objects.all(), page.next_cursor)
+            seen.extend(page)
+        self.assertEqual(seen, self.products)
+
+    def test_cursor_roundtrip(self):
+        product = self.products[1]
+        self.assertEqual(decode_cursor(encode_cursor(product)),
+                         (product.created_at, product.pk))
+        self.assertIsNone(decode_cursor('не-курсор'))
+
+    def test_cursor_view_keeps_filters(self):
+        response = self.client.get(reverse('catalog:product_list'),
+                                   {'cursor': '', 'in_stock': ''})
+        self.assertEqual(list(response.context['products']),
+                         self.products[:2])
+        self.assertIsNotNone(response.context['next_cursor'])
+        self.assertIn('in_stock=', response.context['pagination_query'])
+
+
+class TestListingQueries(TestCase):
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Тест", slug="test")
+        self.brand = Brand.objects.create(name="Бренд", slug="brand")
+
+    def _create_products(self, start, count):
+        for i in range(start, start + count):
+            Product.objects.create(
+                product_name=f"Товар {i}", description="Описание",
+                slug=f"product-{i}", price=Decimal("100.00"),
+                category=self.category, brand=self.brand, stock=1)
+
+    def _count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_listing_query_count_does_not_grow(self):
+        urls = [
+            reverse('catalog:product_list'),
+            reverse('catalog:category_detail', kwargs={'slug': 'test'}),
+        ]
+        self._create_products(0, 2)
+        before = [self._count_queries(url) for url in urls]
+        self._create_products(2, 10)
+        after = [self._count_queries(url) for url in urls]
+        self.assertEqual(before, after)
+
+    def test_for_listing_loads_relations(self):
+        self._create_products(0, 3)
+        with self.assertNumQueries(1):
+            names = [(str(p), p.category.slug, p.brand.name)
+                     for p in Product.objects.for_listing()]
+        self.assertEqual(len(names), 3)
+
+
+class TestProductSearch(TestCase):
+
+    def setUp(self):
+        category = Category.objects.create(name="Телефоны", slug="phones")
+        self.phone = Product.objects.create(
+            product_name="Смартфон Galaxy", description="Телефон с камерой",
+            slug="galaxy", price=Decimal("1000.00"), category=category)
+        self.case = Product.objects.create(
+            product_name="Чехол", description="Чехол для смартфона Galaxy",
+            slug="case", price=Decimal("10.00"), category=category)
+        Product.objects.create(
+            product_name="Кабель", description="Зарядный кабель",
+            slug="cable", price=Decimal("5.00"), category=category)
+
+    def test_search_view_ranks_name_matches_first(self):
+        response = self.client.get(reverse('catalog:product_search'),
+                                   {'q': 'Galaxy'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['query'], 'Galaxy')
+        self.assertEqual(list(response.context['products']),
+                         [self.phone, self.case])
+
+    def test_product_list_search_composes_with_filters(self):
+        response = self.client.get(reverse('catalog:product_list'),
+                                   {'q': 'Galaxy', 'max_price': '100'})
+        self.assertEqual(list(response.context['products']), [self.case])
+
+    @skipUnless(connection.vendor == 'postgresql', 'нужен PostgreSQL')
+    def test_search_uses_russian_stemming(self):
+        self.phone.refresh_from_db()
+        self.assertIsNotNone(self.phone.search_vector)
+        results = Product.objects.search('телефоны')
+        self.assertEqual(list(results), [self.phone])
+
+
+class TestAutocomplete(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Смартфоны",
+                                                slug="smartphones")
+        self.brand = Brand.objects.create(name="Samsung", slug="samsung")
+        Product.objects.create(
+            product_name="Смартфон Samsung Galaxy", description="Описание",
+            slug="galaxy", price=Decimal("1000.00"),
+            category=self.category, brand=self.brand)
+
+    def test_returns_products_brands_and_categories(self):
+        response = self.client.get(reverse('catalog:autocomplete'),
+                                   {'q': 'Смартф'})
+        self.assertEqual(response.status_code, 200)
+        types = {item['type'] for item in response.json()['results']}
+        self.assertEqual(types, {'product', 'category'})
+
+    @skipUnless(connection.vendor == 'postgresql', 'нужен PostgreSQL')
+    def test_match_uses_trigram_index(self):
+        from .autocomplete import _match
+        queryset = _match(Product.objects.only('product_name', 'slug'),
+                          'product_name', 'galax', 8)
+        with connection.cursor() as cursor:
+            # на маленькой таблице планировщик выбрал бы Seq Scan и так
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = queryset.explain()
+        self.assertNotIn('Seq Scan on catalog_product', plan)
+        self.assertIn('catalog_product_name_trgm', plan)
+
+    def test_short_prefix_returns_nothing(self):
+        response = self.client.get(reverse('catalog:autocomplete'),
+                                   {'q': 'с'})
+        self.assertEqual(response.json(), {'results': []})
+
+    def test_results_are_cached_per_prefix(self):
+        url = reverse('catalog:autocomplete')
+        self.client.get(url, {'q': 'samsung'})
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'q': '  SAMSUNG '})
+        self.assertEqual(response.json()['results'][0]['type'], 'product')
+
+    @skipUnless(connection.vendor == 'postgresql', 'нужен PostgreSQL')
+    def test_typo_tolerance(self):
+        response = self.client.get(reverse('catalog:autocomplete'),
+                                   {'q': 'galaxu'})
+        names = [item['name'] for item in response.json()['results']]
+        self.assertIn('Смартфон Samsung Galaxy', names)
+
+
+@override_settings(CATALOG_PRICE_BUCKETS=(100, 1000))
+class TestFacets(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.phones = Category.objects.create(name="Телефоны", slug="phones")
+        self.cables = Category.objects.create(name="Кабели", slug="cables")
+        self.brand = Brand.objects.create(name="Бренд", slug="brand")
+        Product.objects.create(
+            product_name="Телефон", description="Описание", slug="phone",
+            price=Decimal("5000.00"), category=self.phones,
+            brand=self.brand, stock=3, rating=4.5)
+        Product.objects.create(
+            product_name="Телефон 2", description="Описание", slug="phone-2",
+            price=Decimal("500.00"), category=self.phones, rating=3.0)
+        Product.objects.create(
+            product_name="Кабель", description="Описание", slug="cable",
+            price=Decimal("50.00"), category=self.cables,
+            brand=self.brand, stock=10)
+
+    def test_compute_facets_in_one_query(self):
+        with self.assertNumQueries(1):
+            facets = compute_facets(Product.objects.for_listing())
+        self.assertEqual(facets['total'], 3)
+        self.assertEqual(facets['categories'],
+                         {self.phones.pk: 2, self.cables.pk: 1})
+        self.assertEqual(facets['brands'], {self.brand.pk: 2})
+        self.assertEqual(facets['price'], [1, 1, 1])
+        self.assertEqual(facets['rating'], [1, 0, 0, 1, 1, 0])
+        self.assertEqual(facets['in_stock'], 2)
+
+    def test_facets_follow_current_filters(self):
+        response = self.client.get(reverse('catalog:product_list'),
+                                   {'category': 'phones'})
+        facets = response.context['facets']
+        self.assertEqual(facets['total'], 2)
+        self.assertEqual(facets['in_stock'], 1)
+        ratings = {r['min_rating']: r['count']
+                   for r in response.context['rating_ranges']}
+        self.assertEqual(ratings[3], 2)
+        self.assertEqual(ratings[4], 1)
+        self.assertContains(response, 'Телефоны (2)')
+
+    def test_facets_for_search_results(self):
+        response = self.client.get(reverse('catalog:product_search'),
+                                   {'q': 'Телефон'})
+        self.assertEqual(response.context['facets']['total'], 2)
+
+    def test_facet_links_keep_other_filters(self):
+        response = self.client.get(reverse('catalog:product_list'), {
+            'category': 'phones', 'in_stock': '1', 'min_rating': '1',
+            'page': '2'})
+        ranges = {r['min_price']: r['query']
+                  for r in response.context['price_ranges']}
+        self.assertEqual(QueryDict(ranges[100]), QueryDict(
+            'category=phones&in_stock=1&min_rating=1'
+            '&min_price=100&max_price=999.99'))
+        ratings = {r['min_rating']: r['query']
+                   for r in response.context['rating_ranges']}
+        self.assertEqual(QueryDict(ratings[4]), QueryDict(
+            'category=phones&in_stock=1&min_rating=4'))
+
+    def test_price_bound_in_same_range(self):
+        Product.objects.create(
+            product_name="Телефон 3", description="Описание",
+            slug="phone-3", price=Decimal("100.00"), category=self.phones)
+        response = self.client.get(reverse('catalog:product_list'))
+        counts = [r['count'] for r in response.context['price_ranges']]
+        self.assertEqual(counts, [1, 2, 1])
+        for price_range in response.context['price_ranges']:
+            page = self.client.get(reverse('catalog:product_list') + '?'
+                                   + price_range['query'])
+            self.assertEqual(page.context['facets']['total'],
+                             price_range['count'])
+
+    def test_cache_key_is_normalized(self):
+        self.assertEqual(
+            facets_cache_key({'current_category': 'phones',
+                              'current_query': ''}),
+            facets_cache_key({'current_query': None,
+                              'current_category': ' phones'}))
+        self.assertNotEqual(
+            facets_cache_key({'current_category': 'phones'}),
+            facets_cache_key({'current_category': 'cables'}))
+
+
+class TestCatalogCache(TestCase):
+
+    def setUp(self):
+        flush_metrics()
+        cache.clear()
+        self.category = Category.objects.create(name="Тест", slug="test")
+        self.brand = Brand.objects.create(name="Бренд", slug="brand")
+        self.product = Product.objects.create(
+            product_name="Товар", description="Описание", slug="product",
+            price=Decimal("100.00"), category=self.category,
+            brand=self.brand, stock=1)
+
+    def _cards(self):
+        return render_product_cards(Product.objects.for_listing())
+
+    def test_cards_are_cached(self):
+        self._cards()
+        self._cards()
+        self.assertEqual(get_metrics()['card'], {'hits': 1, 'misses': 1})
+
+    def test_product_save_invalidates_card(self):
+        self._cards()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.price = Decimal("250.00")
+            self.product.save()
+        self.assertIn('250,00', self._cards()[0])
+
+    def test_brand_rename_invalidates_card(self):
+        self._cards()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.brand.name = "Новый бренд"
+            self.brand.save()
+        self.assertIn('Новый бренд', self._cards()[0])
+
+    def test_category_page_served_from_cache(self):
+        url = reverse('catalog:category_detail', kwargs={'slug': 'test'})
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertContains(response, 'Товар')
+        self.assertFalse(any('catalog_product' in q['sql']
+                             for q in ctx.captured_queries))
+        self.assertEqual(get_metrics()['category_page'],
+                         {'hits': 1, 'misses': 1})
+
+    def test_category_page_key_ignores_junk_params(self):
+        url = reverse('catalog:category_detail', kwargs={'slug': 'test'})
+        self.client.get(url + '?page=1&utm=a')
+        for query in ('?utm=b&page=1', '?page=01', '', '?page=x'):
+            self.assertContains(self.client.get(url + query), 'Товар')
+        self.assertEqual(get_metrics()['category_page'],
+                         {'hits': 4, 'misses': 1})
+
+    def test_out_of_range_page_not_cached(self):
+        url = reverse('catalog:category_detail', kwargs={'slug': 'test'})
+        for page in range(2, 5):
+            self.assertContains(self.client.get(f'{url}?page={page}'),
+                                'Товар')
+        self.client.get(url)
+        self.assertEqual(get_metrics()['category_page'],
+                         {'hits': 0, 'misses': 4})
+
+    @override_settings(CATALOG_METRICS_FLUSH_INTERVAL=3600)
+    def test_metrics_counted_in_process(self):
+        flush_metrics()
+        with patch('catalog.cache.cache') as shared:
+            for _ in range(5):
+                record('card', hits=2, misses=1)
+        shared.incr.assert_not_called()
+        self.assertEqual(get_metrics()['card'], {'hits': 10, 'misses': 5})
+
+    def test_new_product_invalidates_category_page(self):
+        url = reverse('catalog:category_detail', kwargs={'slug': 'test'})
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(
+                product_name="Новинка", description="Описание",
+                slug="new", price=Decimal("10.00"), category=self.category)
+        self.assertContains(self.client.get(url), 'Новинка')
+
+    def test_product_detail_info_cached(self):
+        url = reverse('catalog:product_detail', kwargs={'slug': 'product'})
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertContains(response, 'Описание')
+        self.assertEqual(get_metrics()['product_info'],
+                         {'hits': 1, 'misses': 1})
+
+
+@skipUnless(connection.vendor == 'postgresql', 'нужен PostgreSQL')
+class TestIndexUsage(TestCase):
+    """Ключевые запросы представлений используют индексы, а не Seq Scan."""
+
+    @classmethod
+    def setUpTestData(cls):
+        categories = Category.objects.bulk_create(
+            Category(name=f"Категория {i}", slug=f"category-{i}")
+            for i in range(50))
+        brand = Brand.objects.create(name="Бренд", slug="brand")
+        products = Product.objects.bulk_create(
+            Product(product_name=f"Товар {i}", slug=f"product-{i}",
+                    price=Decimal(100 + i), stock=i % 3,
+                    category=categories[i % 50], brand=brand)
+            for i in range(5000))
+        users = User.objects.bulk_create(
+            User(username=f"user-{i}", email=f"user-{i}@mail.ru")
+            for i in range(200))
+        Review.objects.bulk_create(
+            Review(product=products[(i * 25 + j) % 5000], user=user,
+                   rating=j % 5 + 1)
+            for i, user in enumerate(users) for j in range(25))
+        Order.objects.bulk_create(
+            Order(user=users[i % 200], number=f"ORDER-000000-{i:04d}",
+                  total=100, full_name="Покупатель", email="b@mail.ru",
+                  phone="89160000000", address="Москва")
+            for i in range(4000))
+        Cart.objects.bulk_create(Cart(session=f"session-{i}")
+                                 for i in range(4000))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.category = categories[7]
+        cls.product = products[42]
+        cls.user = users[3]
+
+    def assertIndexScan(self, queryset, *indexes):
+        """Проверяет, что таблица читается по индексу (одному из indexes)."""
+        plan = queryset.explain()
+        self.assertNotIn(f'Seq Scan on {queryset.model._meta.db_table}',
+                         plan)
+        self.assertIn('Index', plan)
+        if indexes:
+            self.assertTrue(any(index in plan for index in indexes), plan)
+
+    def test_category_listing(self):
+        self.assertIndexScan(
+            Product.objects.for_listing().filter(category=self.category)
+            .order_by('created_at', 'id')[:24])
+
+    def test_in_stock_listing(self):
+        self.assertIndexScan(
+            Product.objects.for_listing().filter(stock__gt=0)
+            .order_by('created_at', 'id')[:24],
+            'catalog_product_in_stock')
+
+    def test_order_list(self):
+        self.assertIndexScan(Order.objects.filter(user=self.user)[:20],
+                             'orders_order_user_created')
+
+    def test_duplicate_review_check(self):
+        self.assertIndexScan(Review.objects.filter(
+            product=self.product, user=self.user)[:1],
+            'reviews_review_product_user', 'reviews_review_product_created')
+
+    def test_product_reviews(self):
+        self.assertIndexScan(self.product.reviews.all()[:10],
+                             'reviews_review_product_created')
+
+    def test_cart_session_lookup(self):
+        self.assertIndexScan(Cart.objects.filter(session="session-17")[:1],
+                             'cart_cart_session')
+
+
+class TestSeedShop(TestCase):
+
+    def test_seed_shop_command(self):
+        out = StringIO()
+        call_command('seed_shop', categories=3, brands=4, products=200,
+                     users=50, reviews=1000, carts=10, orders=20,
+                     chunk_size=64, stdout=out)
+
+        self.assertEqual(Category.objects.count(), 3)
+        self.assertEqual(Brand.objects.count(), 4)
+        self.assertEqual(Product.objects.count(), 200)
+        self.assertEqual(User.objects.count(), 50)
+        self.assertEqual(Cart.objects.count(), 10)
+        self.assertEqual(Order.objects.count(), 20)
+        self.assertIn('Создано объектов', out.getvalue())
+
+    def test_seed_shop_skewed_reviews(self):
+        from .seed import seed_shop
+        created = seed_shop({'categories': 2, 'brands': 2, 'products': 100,
+                             'users': 1000, 'reviews': 2000, 'carts': 0,
+                             'orders': 5}, chunk_size=500)
+
+        counts = sorted(Product.objects.values_list('rating_count',
+                                                    flat=True))
+        self.assertEqual(sum(counts), created['reviews'])
+        self.assertEqual(Review.objects.count(), created['reviews'])
+        # самый популярный товар собирает отзывов намного больше медианы
+        self.assertGreater(counts[-1], counts[50] * 10)
+        # оценки одного пользователя разным товарам различаются
+        self.assertTrue(Review.objects.values('user').annotate(
+            n=Count('rating', distinct=True)).filter(n__gt=1).exists())
+        self.assertGreater(len(set(Product.objects.filter(
+            rating_count__gte=20).values_list('rating', flat=True))), 1)
+        self.assertTrue(all(order.items.exists()
+                            for order in Order.objects.all()))
+
+
+
+class TestImportCatalog(TestCase):
+    """Импорт товаров из CSV и JSON Lines"""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Телефоны',
+                                                slug='phones')
+        self.brand = Brand.objects.create(name='Apple', slug='apple')
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def jsonl(self, rows):
+        return ''.join(json.dumps(row, ensure_ascii=False) + '\n'
+                       for row in rows)
+
+    def test_csv_import_and_update_positive(self):
+        """Позитивный тест: CSV создаёт товары и обновляет их по slug"""
+        old = Product.objects.create(
+            product_name='Старое', description='Описание', slug='iphone',
+            price=Decimal('1.00'), stock=1, category=self.category,
+            rating=4.5, rating_count=2)
+        path = self.write('feed.csv', (
+            'slug,product_name,description,price,stock,category,brand\n'
+            'iphone,iPhone 16,Смартфон,99990.00,5,phones,apple\n'
+            'pixel,Pixel 9,Смартфон,79990.50,,phones,\n'))
+        out = StringIO()
+
+        call_command('import_catalog', path, stdout=out)
+
+        iphone = Product.objects.get(slug='iphone')
+        self.assertEqual(iphone.pk, old.pk)
+        self.assertEqual(iphone.product_name, 'iPhone 16')
+        self.assertEqual(iphone.price, Decimal('99990.00'))
+        self.assertEqual(iphone.brand, self.brand)
+        self.assertEqual(iphone.created_at, old.created_at)
+        self.assertEqual(iphone.rating_count, 2)
+        pixel = Product.objects.get(slug='pixel')
+        self.assertEqual((pixel.stock, pixel.brand), (0, None))
+        self.assertIn('Импортировано товаров: 2 из 2', out.getvalue())
+
+    def test_partial_feed_keeps_missing_columns_positive(self):
+        """Позитивный тест: колонки, которых нет в файле, не меняются"""
+        Product.objects.create(
+            product_name='Старое', description='Описание', slug='iphone',
+            price=Decimal('1.00'), stock=40, category=self.category,
+            brand=self.brand)
+        path = self.write('feed.csv', (
+            'slug,product_name,description,price,category\n'
+            'iphone,iPhone 16,Смартфон,99990.00,phones\n'
+            'pixel,Pixel 9,Смартфон,79990.50,phones\n'))
+
+        call_command('import_catalog', path, stdout=StringIO())
+
+        iphone = Product.objects.get(slug='iphone')
+        self.assertEqual(iphone.product_name, 'iPhone 16')
+        self.assertEqual((iphone.stock, iphone.brand), (40, self.brand))
+        pixel = Product.objects.get(slug='pixel')
+        self.assertEqual((pixel.stock, pixel.brand), (0, None))
+
+    def test_invalid_rows_written_to_error_file_negative(self):
+        """Негативный тест: ошибочные строки пропускаются и пишутся в файл"""
+        content = self.jsonl([
+            {'slug': 'ok', 'product_name': 'Товар', 'description': 'Текст',
+             'price': 100, 'category': 'phones'},
+            {'slug': 'bad price', 'product_name': 'Товар',
+             'description': 'Текст', 'price': 'abc', 'category': 'phones'},
+            {'slug': 'lost', 'product_name': 'Товар', 'description': 'Текст',
+             'price': 100, 'category': 'tablets'},
+        ]) + '{broken\n'
+        path = self.write('feed.jsonl', content)
+        errors_path = os.path.join(self.directory.name, 'errors.csv')
+        out = StringIO()
+
+        call_command('import_catalog', path, errors=errors_path, stdout=out)
+
+        self.assertEqual(list(Product.objects.values_list('slug', flat=True)),
+                         ['ok'])
+        with open(errors_path, encoding='utf-8') as file:
+            errors = list(csv.DictReader(file))
+        self.assertEqual([row['line'] for row in errors], ['2', '3', '4'])
+        self.assertIn('slug:', errors[0]['errors'])
+        self.assertIn('price:', errors[0]['errors'])
+        self.assertIn('tablets', errors[1]['errors'])
+        self.assertIn('Некорректный JSON', errors[2]['errors'])
+        self.assertEqual(json.loads(errors[1]['row'])['slug'], 'lost')
+        self.assertIn('Строк с ошибками: 3', out.getvalue())
+
+    def test_create_missing_categories_positive(self):
+        """Позитивный тест: недостающие категории и бренды создаются"""
+        rows = [{'slug': f'tab-{i}', 'product_name': f'Планшет {i}',
+                 'description': 'Текст', 'price': 100, 'category': 'tablets',
+                 'category_name': 'Планшеты', 'brand': 'samsung'}
+                for i in range(3)]
+        report = import_catalog(StringIO(self.jsonl(rows)), 'jsonl',
+                                create_missing=True)
+
+        self.assertEqual(report, {'rows': 3, 'imported': 3, 'errors': 0})
+        self.assertEqual(Category.objects.get(slug='tablets').name,
+                         'Планшеты')
+        self.assertEqual(Brand.objects.get(slug='samsung').name, 'samsung')
+        self.assertEqual(Product.objects.filter(
+            category__slug='tablets', brand__slug='samsung').count(), 3)
+
+    def test_duplicate_slug_last_row_wins_negative(self):
+        """Негативный тест: повтор slug в пакете не ломает вставку"""
+        rows = [{'slug': 'phone', 'product_name': name, 'description': 'Т',
+                 'price': 1, 'category': 'phones'}
+                for name in ('Первый', 'Второй')]
+        report = import_catalog(StringIO(self.jsonl(rows)), 'jsonl')
+
+        self.assertEqual(report['imported'], 1)
+        self.assertEqual(Product.objects.get().product_name, 'Второй')
+
+    def test_queries_per_batch_constant_positive(self):
+        """Позитивный тест: число запросов зависит от пакетов, а не строк"""
+        def import_queries(count, prefix):
+            rows = [{'slug': f'{prefix}-{i}', 'product_name': 'Товар',
+                     'description': 'Текст', 'price': 1,
+                     'category': 'phones', 'brand': 'apple'}
+                    for i in range(count)]
+            with CaptureQueriesContext(connection) as queries:
+                import_catalog(StringIO(self.jsonl(rows)), 'jsonl',
+                               batch_size=50)
+            return len(queries)
+
+        self.assertEqual(import_queries(5, 'a'), import_queries(50, 'b'))
+        self.assertEqual(Product.objects.count(), 55)
+
+    def test_import_invalidates_cache_positive(self):
+        """Позитивный тест: импорт сбрасывает кеш карточек и категорий"""
+        Product.objects.create(
+            product_name='Телефон', description='Описание', slug='phone',
+            price=Decimal('100.00'), stock=1, category=self.category)
+        url = reverse('catalog:category_detail', kwargs={'slug': 'phones'})
+        self.client.get(url)
+        rows = [{'slug': 'phone', 'product_name': 'Телефон',
+                 'description': 'Описание', 'price': '250.00',
+                 'category': 'phones'},
+                {'slug': 'new', 'product_name': 'Новинка',
+                 'description': 'Описание', 'price': 10,
+                 'category': 'phones'}]
+        with self.captureOnCommitCallbacks(execute=True):
+            import_catalog(StringIO(self.jsonl(rows)), 'jsonl')
+
+        response = self.client.get(url)
+        self.assertContains(response, '250,00')
+        self.assertContains(response, 'Новинка')
+
+    @skipUnless(connection.vendor == 'postgresql', 'нужен PostgreSQL')
+    def test_imported_products_searchable_positive(self):
+        """Позитивный тест: у импортированных товаров есть поисковый вектор"""
+        rows = [{'slug': 'kettle', 'product_name': 'Электрический чайник',
+                 'description': 'Стеклянный корпус', 'price': 10,
+                 'category': 'phones'}]
+        import_catalog(StringIO(self.jsonl(rows)), 'jsonl')
+
+        self.assertEqual(
+            list(Product.objects.search('чайники')
+                 .values_list('slug', flat=True)), ['kettle'])
+
+    def test_admin_import_positive(self):
+        """Позитивный тест: импорт файла со страницы админ-панели"""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@shop.ru', 'pass123')
+        self.client.force_login(admin)
+        changelist = reverse('admin:catalog_product_changelist')
+        url = reverse('admin:catalog_product_import')
+        self.assertContains(self.client.get(changelist), url)
+        upload = SimpleUploadedFile('feed.csv', (
+            'slug,product_name,description,price,category\n'
+            'phone,Телефон,Описание,100,phones\n').encode('utf-8-sig'))
+
+        response = self.client.post(url, {'file': upload})
+
+        self.assertRedirects(response, changelist)
+        self.assertTrue(Product.objects.filter(slug='phone').exists())
+
+    def test_admin_import_shows_errors_negative(self):
+        """Негативный тест: админ видит строки с ошибками"""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@shop.ru', 'pass123')
+        self.client.force_login(admin)
+        upload = SimpleUploadedFile('feed.jsonl', self.jsonl([
+            {'slug': 'phone', 'product_name': 'Телефон',
+             'description': 'Описание', 'price': 100, 'category': 'nope'},
+        ]).encode())
+
+        response = self.client.post(
+            reverse('admin:catalog_product_import'), {'file': upload})
+
+        self.assertContains(response, 'строк с ошибками: 1')
+        self.assertContains(response, 'nope')
+        self.assertFalse(Product.objects.exists())
+
+
+class TestExport(TestCase):
+    """Потоковая выгрузка товаров, заказов и отзывов"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Телефоны',
+                                                slug='phones')
+        self.brand = Brand.objects.create(name='Apple', slug='apple')
+        self.products = [
+            Product.objects.create(
+                product_name=f'Телефон {i}', description='Описание',
+                slug=f'phone-{i}', price=Decimal('100.50') * (i + 1),
+                stock=i, category=self.category, brand=self.brand)
+            for i in range(5)
+        ]
+        self.user = User.objects.create(username='buyer')
+
+    def add_order(self, number, quantity=1):
+        order = Order.objects.create(
+            user=self.user, number=number, full_name='Иван',
+            email='ivan@mail.ru', phone='89991234567', address='Москва',
+            total=300)
+        for product in self.products[:2]:
+            order.items.create(product=product, price=product.price,
+                               quantity=quantity)
+        return order
+
+    def read(self, name, fmt='csv', **kwargs):
+        return ''.join(export_text(name, fmt, **kwargs))
+
+    def test_products_csv_positive(self):
+        """Позитивный тест: товары выгружаются в CSV с заголовком"""
+        rows = list(csv.DictReader(StringIO(self.read('products'))))
+
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[1]['slug'], 'phone-1')
+        self.assertEqual(rows[1]['category__slug'], 'phones')
+        self.assertEqual(rows[1]['brand__slug'], 'apple')
+        self.assertEqual(rows[1]['price'], '201.00')
+
+    def test_orders_jsonl_joined_lines_positive(self):
+        """Позитивный тест: позиции выгружаются вместе с полями заказа"""
+        self.add_order('A-1')
+        self.add_order('A-2', quantity=3)
+
+        rows = [json.loads(line)
+                for line in self.read('orders', 'jsonl').splitlines()]
+
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[3]['order__number'], 'A-2')
+        self.assertEqual(rows[3]['order__user__username'], 'buyer')
+        self.assertEqual(rows[3]['product__slug'], 'phone-1')
+        self.assertEqual(rows[3]['quantity'], 3)
+        self.assertEqual(rows[3]['price'], '201.00')
+
+    def test_single_query_for_any_size_positive(self):
+        """Позитивный тест: выгрузка - один запрос при любом числе строк"""
+        self.add_order('A-1')
+        with CaptureQueriesContext(connection) as small:
+            self.read('orders', chunk_size=2)
+        for i in range(10):
+            self.add_order(f'B-{i}')
+        with CaptureQueriesContext(connection) as large:
+            self.read('orders', chunk_size=2)
+
+        self.assertEqual(len(small), 1)
+        self.assertEqual(len(large), 1)
+
+    def test_chunks_are_bounded_positive(self):
+        """Позитивный тест: ответ отдаётся кусками по chunk_size строк"""
+        chunks = list(export_text('products', chunk_size=2))
+
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(chunks[0].count('\n'), 2)
+
+    def test_period_filter_negative(self):
+        """Негативный тест: заказы вне периода не выгружаются"""
+        old = self.add_order('OLD')
+        Order.objects.filter(pk=old.pk).update(
+            created=timezone.now() - timedelta(days=40))
+        self.add_order('NEW')
+        since = timezone.localdate() - timedelta(days=1)
+
+        rows = list(csv.DictReader(StringIO(self.read('orders',
+                                                      since=since))))
+        self.assertEqual({row['order__number'] for row in rows}, {'NEW'})
+        rows = list(csv.DictReader(StringIO(self.read('orders',
+                                                      until=since))))
+        self.assertEqual({row['order__number'] for row in rows}, {'OLD'})
+
+    @skipUnless(connection.vendor == 'postgresql', 'нужен PostgreSQL')
+    def test_server_side_cursor_positive(self):
+        """Позитивный тест: на PostgreSQL строки читаются серверным курсором"""
+        _, rows = export_rows('products', chunk_size=2)
+        next(rows)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM pg_cursors')
+            cursors = cursor.fetchone()[0]
+        rows.close()
+
+        self.assertEqual(cursors, 1)
+
+    def test_command_writes_file_positive(self):
+        """Позитивный тест: команда пишет выгрузку в файл"""
+        Review.objects.create(product=self.products[0], user=self.user,
+                              rating=5, text='Отлично')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'reviews.jsonl')
+            out = StringIO()
+            call_command('export_data', 'reviews', format='jsonl',
+                         output=path, stdout=out)
+            with open(path, encoding='utf-8') as file:
+                rows = [json.loads(line) for line in file]
+
+        self.assertEqual(rows[0]['text'], 'Отлично')
+        self.assertEqual(rows[0]['user__username'], 'buyer')
+        self.assertIn('Выгрузка сохранена', out.getvalue())
+
+    def test_admin_streaming_export_positive(self):
+        """Позитивный тест: админ получает выгрузку потоком"""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@shop.ru', 'pass123')
+        self.client.force_login(admin)
+        self.add_order('A-1')
+        url = reverse('admin:orders_order_export')
+        self.assertContains(
+            self.client.get(reverse('admin:orders_order_changelist')),
+            f'{url}?format=jsonl')
+
+        response = self.client.get(url, {'format': 'jsonl'})
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'],
+                         'application/x-ndjson; charset=utf-8')
+        self.assertIn('attachment; filename="orders-',
+                      response['Content-Disposition'])
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+
+    def test_admin_export_forbidden_negative(self):
+        """Негативный тест: без прав и с неизвестным форматом выгрузки нет"""
+        url = reverse('admin:catalog_product_export')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        staff = User.objects.create(username='staff', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        admin = User.objects.create_superuser(
+            'admin', 'admin@shop.ru', 'pass123')
+        self.client.force_login(admin)
+        self.assertEqual(self.client.get(url, {'format': 'xml'}).status_code,
+                         404)
+        self.assertEqual(
+            self.client.get(url, {'since': '2026-13-01'}).status_code, 404)
+
+
+@override_settings(WAREHOUSE_API_TOKENS=['secret'])
+class TestWarehouseSync(TestCase):
+    """Пакетное обновление цен и остатков со склада"""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Телефоны',
+                                                slug='phones')
+        self.products = [
+            Product.objects.create(
+                product_name=f'Телефон {i}', description='Описание',
+                slug=f'phone-{i}', price=Decimal('100.00'), stock=10,
+                category=self.category)
+            for i in range(3)
+        ]
+        self.url = reverse('catalog:warehouse_sync')
+
+    def post(self, payload, token='secret'):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        return self.client.post(self.url, json.dumps(payload),
+                                content_type='application/json',
+                                headers=headers)
+
+    def test_absolute_update_positive(self):
+        """Позитивный тест: меняются только товары с новыми значениями"""
+        untouched = self.products[2].updated_at
+        report = apply_updates(enumerate([
+            {'slug': 'phone-0', 'price': '150.50', 'stock': 3},
+            {'slug': 'phone-1', 'stock': 0},
+            {'slug': 'phone-2', 'price': '100.00', 'stock': 10},
+            {'slug': 'missing', 'stock': 1},
+        ], 1))
+
+        self.assertEqual(report, {'received': 4, 'changed': 2,
+                                  'unchanged': 1, 'errors': 0,
+                                  'not_found': ['missing']})
+        values = list(Product.objects.order_by('slug')
+                      .values_list('price', 'stock'))
+        self.assertEqual(values, [(Decimal('150.50'), 3),
+                                  (Decimal('100.00'), 0),
+                                  (Decimal('100.00'), 10)])
+        self.assertEqual(Product.objects.get(slug='phone-2').updated_at,
+                         untouched)
+
+    def test_delta_update_positive(self):
+        """Позитивный тест: изменения складываются, в том числе повторы"""
+        report = apply_updates(enumerate([
+            {'slug': 'phone-0', 'stock': -4},
+            {'slug': 'phone-0', 'stock': 1, 'price': '-10.00'},
+            {'slug': 'phone-1', 'stock': 0},
+        ], 1), 'delta')
+
+        self.assertEqual((report['changed'], report['unchanged']), (1, 1))
+        phone = Product.objects.get(slug='phone-0')
+        self.assertEqual((phone.price, phone.stock), (Decimal('90.00'), 7))
+
+    def test_one_update_per_batch_positive(self):
+        """Позитивный тест: один UPDATE на пакет при любом числе товаров"""
+        for i in range(3, 50):
+            Product.objects.create(
+                product_name='Телефон', description='Описание',
+                slug=f'phone-{i}', price=1, stock=1, category=self.category)
+        items = [{'slug': f'phone-{i}', 'stock': 5} for i in range(50)]
+
+        with CaptureQueriesContext(connection) as queries:
+            report = apply_updates(enumerate(items, 1), batch_size=20)
+
+        updates = [q for q in queries.captured_queries
+                   if q['sql'].startswith('WITH')]
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(report['changed'], 50)
+
+    def test_cache_invalidated_only_for_changed_positive(self):
+        """Позитивный тест: кеш сбрасывается только у изменённых товаров"""
+        keys = [version_key('product', p.pk) for p in self.products]
+        before = get_versions(keys)
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_updates(enumerate([
+                {'slug': 'phone-0', 'stock': 1},
+                {'slug': 'phone-1', 'stock': 10},
+            ], 1))
+        after = get_versions(keys)
+
+        self.assertNotEqual(after[keys[0]], before[keys[0]])
+        self.assertEqual(after[keys[1]], before[keys[1]])
+        self.assertEqual(after[keys[2]], before[keys[2]])
+
+    def test_invalid_items_negative(self):
+        """Негативный тест: некорректные позиции не применяются"""
+        errors = []
+        report = apply_updates(enumerate([
+            {'slug': 'phone-0', 'price': 'abc'},
+            {'slug': 'phone-1', 'stock': -1},
+            {'slug': 'phone-2'},
+            'phone-2',
+        ], 1), on_error=lambda *args: errors.append(args))
+
+        self.assertEqual(report['errors'], 4)
+        self.assertEqual([number for number, _, _ in errors], [1, 2, 3, 4])
+        self.assertFalse(Product.objects.exclude(stock=10).exists())
+
+    def test_delta_out_of_range_negative(self):
+        """Негативный тест: изменения за пределы столбцов не применяются"""
+        _, max_stock = connection.ops.integer_field_range('IntegerField')
+        errors = []
+        report = apply_updates(enumerate([
+            {'slug': 'phone-0', 'stock': -11},
+            {'slug': 'phone-1', 'stock': max_stock},
+            {'slug': 'phone-1', 'stock': max_stock},
+            {'slug': 'phone-2', 'price': '99999999.99'},
+            {'slug': 'phone-2', 'price': '1000000000'},
+            {'slug': 'phone-2', 'stock': max_stock + 1},
+        ], 1), 'delta', on_error=lambda *args: errors.append(args))
+
+        self.assertEqual((report['changed'], report['unchanged'],
+                          report['errors']), (0, 0, 6))
+        self.assertEqual(sorted(number for number, _, _ in errors),
+                         [1, 2, 3, 4, 5, 6])
+        self.assertEqual(set(Product.objects.values_list('price', 'stock')),
+                         {(Decimal('100.00'), 10)})
+
+    def test_api_positive(self):
+        """Позитивный тест: API применяет пакет и возвращает отчёт"""
+        response = self.post({'mode': 'delta', 'items': [
+            {'slug': 'phone-0', 'stock': 5},
+            {'slug': 'phone-1', 'price': 'x'},
+        ]})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['changed'], 1)
+        self.assertEqual(data['invalid'][0]['index'], 2)
+        self.assertEqual(Product.objects.get(slug='phone-0').stock, 15)
+
+    def test_api_rejects_requests_negative(self):
+        """Негативный тест: без токена и с некорректным телом - ошибка"""
+        payload = {'items': [{'slug': 'phone-0', 'stock': 1}]}
+        self.assertEqual(self.post(payload, token=None).status_code, 401)
+        self.assertEqual(self.post(payload, token='wrong').status_code, 401)
+        self.assertEqual(self.post({'mode': 'add', 'items': []}).status_code,
+                         400)
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+        with self.settings(WAREHOUSE_MAX_ITEMS=0):
+            self.assertEqual(self.post(payload).status_code, 413)
+        with self.settings(WAREHOUSE_API_TOKENS=[]):
+            self.assertEqual(self.post(payload).status_code, 401)
+        self.assertEqual(Product.objects.get(slug='phone-0').stock, 10)
+
+    def test_command_positive(self):
+        """Позитивный тест: команда применяет файл склада"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'stock.csv')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write('slug,price,stock\n'
+                           'phone-0,,2\n'
+                           'phone-1,abc,\n')
+            errors_path = os.path.join(directory, 'errors.csv')
+            out = StringIO()
+            call_command('sync_stock', path, errors=errors_path, stdout=out)
+            with open(errors_path, encoding='utf-8') as file:
+                errors = list(csv.DictReader(file))
+
+        self.assertEqual(Product.objects.get(slug='phone-0').stock, 2)
+        self.assertEqual(errors[0]['line'], '3')
+        self.assertIn('Изменено товаров: 1', out.getvalue())
+
+
+class TestCatalogAdminQueries(TestCase):
+    """Число запросов списков админ-панели не зависит от числа строк"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            'admin', 'admin@shop.ru', 'pass123')
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count):
+        start = Category.objects.count()
+        for i in range(start, start + count):
+            category = Category.objects.create(name=f'Категория {i}',
+                                               slug=f'cat-{i}')
+            brand = Brand.objects.create(name=f'Бренд {i}',
+                                         slug=f'brand-{i}')
+            for j in range(i % 3 + 1):
+                Product.objects.create(
+                    product_name=f'Товар {i}-{j}', slug=f'p-{i}-{j}',
+                    price=100 + j, stock=1, category=category, brand=brand)
+
+    def changelist_queries(self, model):
+        url = reverse(f'admin:catalog_{model}_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_constant_positive(self):
+        """Позитивный тест: категории, бренды и товары без N+1"""
+        self.add_rows(2)
+        small = {model: self.changelist_queries(model)
+                 for model in ('category', 'brand', 'product')}
+        self.add_rows(10)
+        large = {model: self.changelist_queries(model)
+                 for model in ('category', 'brand', 'product')}
+
+        self.assertEqual(small, large)
+
+    def test_product_count_sortable_positive(self):
+        """Позитивный тест: сортировка по количеству товаров"""
+        self.add_rows(3)
+        response = self.client.get(
+            reverse('admin:catalog_category_changelist'), {'o': '-3'})
+
+        counts = [category.products_count
+                  for category in response.context['cl'].result_list]
+        self.assertEqual(counts, [3, 2, 1])
+
+    def test_empty_category_count_negative(self):
+        """Негативный тест: у категории без товаров количество 0"""
+        Category.objects.create(name='Пустая', slug='empty')
+        response = self.client.get(
+            reverse('admin:catalog_category_changelist'))
+
+        self.assertEqual(
+            [c.products_count for c in response.context['cl'].result_list],
+            [0])
+
+
+class TestEstimatedCounts(TestCase):
+    """Оценка числа строк и ограниченные фильтры списков админ-панели"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            'admin', 'admin@shop.ru', 'pass123')
+        self.client.force_login(self.admin)
+        self.category = Category.objects.create(name='Телефоны',
+                                                slug='phones')
+        self.products = [
+            Product.objects.create(
+                product_name=f'Телефон {i}', slug=f'phone-{i}',
+                price=500 * (i + 1), stock=i, category=self.category)
+            for i in range(6)
+        ]
+
+    def count_queries(self, queries):
+        return [q['sql'] for q in queries.captured_queries
+                if 'COUNT(' in q['sql'].upper()]
+
+    def test_small_table_exact_count_positive(self):
+        """Позитивный тест: небольшая таблица считается точно"""
+        paginator = EstimatedCountPaginator(
+            Product.objects.order_by('pk'), 2)
+
+        self.assertEqual(paginator.count, 6)
+        self.assertEqual(paginator.num_pages, 3)
+        self.assertEqual(
+            EstimatedCountPaginator(
+                Product.objects.filter(stock__gte=3).order_by('pk'),
+                2).count, 3)
+
+    @skipUnless(connection.vendor == 'postgresql', 'нужен PostgreSQL')
+    @override_settings(ADMIN_COUNT_ESTIMATE_THRESHOLD=3)
+    def test_large_table_estimated_positive(self):
+        """Позитивный тест: большая таблица оценивается без COUNT(*)"""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE catalog_product')
+        with CaptureQueriesContext(connection) as queries:
+            count = EstimatedCountPaginator(
+                Product.objects.order_by('pk'), 2).count
+
+        self.assertEqual(count, 6)
+        self.assertEqual(self.count_queries(queries), [])
+        self.assertIn('reltuples', queries.captured_queries[0]['sql'])
+
+    @skipUnless(connection.vendor == 'postgresql', 'нужен PostgreSQL')
+    @override_settings(ADMIN_COUNT_ESTIMATE_THRESHOLD=3)
+    def test_filtered_count_bounded_positive(self):
+        """Позитивный тест: отфильтрованные строки считаются до порога"""
+        queryset = Product.objects.filter(stock__gte=1).order_by('pk')
+        with CaptureQueriesContext(connection) as queries:
+            count = EstimatedCountPaginator(queryset, 2).count
+
+        self.assertGreaterEqual(count, 3)
+        counts = self.count_queries(queries)
+        self.assertEqual(len(counts), 1)
+        self.assertIn('LIMIT 3', counts[0])
+
+    @skipUnless(connection.vendor == 'postgresql', 'нужен PostgreSQL')
+    @override_settings(ADMIN_COUNT_ESTIMATE_THRESHOLD=100)
+    def test_estimate_below_threshold_exact_negative(self):
+        """Негативный тест: оценка ниже порога не используется"""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE catalog_product')
+        Product.objects.filter(pk=self.products[0].pk).delete()
+        with CaptureQueriesContext(connection) as queries:
+            count = EstimatedCountPaginator(
+                Product.objects.order_by('pk'), 2).count
+
+        self.assertEqual(count, 5)
+        self.assertEqual(len(self.count_queries(queries)), 1)
+
+    def test_filtered_changelist_single_count_positive(self):
+        """Позитивный тест: при фильтре нет второго COUNT(*) по таблице"""
+        url = reverse('admin:catalog_product_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'price_range': '1000-5000'})
+
+        self.assertEqual(len(response.context['cl'].result_list), 5)
+        self.assertEqual(len(self.count_queries(queries)), 1)
+
+    def test_price_range_filter_positive(self):
+        """Позитивный тест: фильтр по ценовому диапазону"""
+        url = reverse('admin:catalog_product_changelist')
+        cheap = self.client.get(url, {'price_range': '-1000'})
+        expensive = self.client.get(url, {'price_range': '50000-'})
+
+        self.assertEqual([p.price for p in cheap.context['cl'].result_list],
+                         [500])
+        self.assertEqual(expensive.context['cl'].result_list.count(), 0)
+
+    def test_price_range_filter_unknown_value_negative(self):
+        """Негативный тест: значение не из списка диапазонов игнорируется"""
+        url = reverse('admin:catalog_product_changelist')
+        for value in ('abc-xyz', '1-2', '-', '1000-5000-'):
+            response = self.client.get(url, {'price_range': value})
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['cl'].result_list),
+                             len(self.products))
+
+    def test_bounded_filter_choices_positive(self):
+        """Позитивный тест: варианты фильтра ограничены и кешируются"""
+        for i, product in enumerate(self.products):
+            for j in range(i + 1):
+                user = User.objects.create(username=f'user-{i}-{j}')
+                Review.objects.create(product=product, user=user, rating=5)
+        url = reverse('admin:reviews_review_changelist')
+
+        with patch.object(BoundedRelatedFieldListFilter, 'limit', 2):
+            first = self.client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                second = self.client.get(url)
+
+        for response in (first, second):
+            spec = [s for s in response.context['cl'].filter_specs
+                    if s.field_path == 'product'][0]
+            self.assertEqual([pk for pk, _ in spec.lookup_choices],
+                             [self.products[-2].pk, self.products[-1].pk])
+        self.assertFalse(any('GROUP BY' in q['sql']
+                             for q in queries.captured_queries))
+
+    def test_bounded_filter_keeps_selected_negative(self):
+        """Негативный тест: выбранный редкий объект остаётся в списке"""
+        users = [User.objects.create(username=f'user-{i}') for i in range(3)]
+        for user in users:
+            Review.objects.create(product=self.products[1], user=user,
+                                  rating=4)
+        Review.objects.create(product=self.products[0], user=users[0],
+                              rating=3)
+        url = reverse('admin:reviews_review_changelist')
+
+        with patch.object(BoundedRelatedFieldListFilter, 'limit', 1):
+            response = self.client.get(
+                url, {'product__id__exact': self.products[0].pk})
+
+        spec = [s for s in response.context['cl'].filter_specs
+                if s.field_path == 'product'][0]
+        self.assertEqual({pk for pk, _ in spec.lookup_choices},
+                         {self.products[0].pk, self.products[1].pk})
+        self.assertEqual(len(response.context['cl'].result_list), 1)
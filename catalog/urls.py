@@ -10,8 +10,12 @@ urlpatterns = [
         name='product_list'),
     path(
         'search/',
-        views.product_list,
+        views.product_search,
         name='product_search'),
+    path(
+        'search/autocomplete/',
+        views.autocomplete,
+        name='autocomplete'),
     path(
         'product/<slug:slug>/',
         views.product_detail,
@@ -20,4 +24,8 @@ urlpatterns = [
         'category/<slug:slug>/',
         views.category_detail,
         name='category_detail'),
+    path(
+        'api/warehouse/stock/',
+        views.warehouse_sync,
+        name='warehouse_sync'),
 ]
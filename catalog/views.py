@@ -1,14 +1,27 @@
+import json
+
+from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404
-from django.db.models import Q
-from .models import Product, Category, Brand
+from django.template.loader import render_to_string
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from .autocomplete import get_suggestions
+from .cache import (
+    fragment_key, get_or_render, get_versions, product_version_keys,
+    render_product_cards, version_key,
+)
+from .facets import facet_context
+from .models import Product, Category
+from .pagination import paginate_products, pagination_params
+from .warehouse import MODES, apply_updates, check_token, get_max_items
 
 
-def product_list(request):
+def filter_products(request, products):
     """
-    Отображает список товаров с возможностью фильтрации.
+    Применяет к товарам фильтры из GET-параметров запроса.
 
     Поддерживает фильтрацию по:
-        - поисковому запросу (по названию и описанию)
+        - поисковому запросу (полнотекстовый поиск по названию и описанию)
         - категории
         - бренду
         - цене (мин/макс)
@@ -17,12 +30,11 @@ def product_list(request):
 
     Args:
         request (HttpRequest): Объект запроса с возможными GET-параметрами.
+        products (QuerySet): Исходный QuerySet товаров.
 
     Returns:
-        HttpResponse: Рендер шаблона 'catalog/product_list.html' с контекстом.
+        tuple: (отфильтрованный QuerySet, словарь текущих значений фильтров).
     """
-    products = Product.objects.all()
-
     query = request.GET.get('q', '')
     category_slug = request.GET.get('category', '')
     brand_slug = request.GET.get('brand', '')
@@ -32,32 +44,19 @@ def product_list(request):
     min_rating = request.GET.get('min_rating')
     max_rating = request.GET.get('max_rating')
 
-    if min_rating or max_rating:
-        filtered_products = []
-        for product in products:
-            avg_rating = product.average_rating
-            include = True
-            if min_rating:
-                try:
-                    if avg_rating < float(min_rating):
-                        include = False
-                except (ValueError, TypeError):
-                    pass
-            if max_rating:
-                try:
-                    if avg_rating > float(max_rating):
-                        include = False
-                except (ValueError, TypeError):
-                    pass
-            if include:
-                filtered_products.append(product)
-        products = filtered_products
+    if min_rating:
+        try:
+            products = products.filter(rating__gte=float(min_rating))
+        except ValueError:
+            pass
+    if max_rating:
+        try:
+            products = products.filter(rating__lte=float(max_rating))
+        except ValueError:
+            pass
 
     if query:
-        products = products.filter(
-            Q(product_name__icontains=query) |
-            Q(description__icontains=query)
-        )
+        products = products.search(query)
     if category_slug:
         products = products.filter(category__slug=category_slug)
     if brand_slug:
@@ -75,10 +74,7 @@ def product_list(request):
     if in_stock:
         products = products.filter(stock__gt=0)
 
-    context = {
-        'products': products,
-        'categories': Category.objects.all(),
-        'brands': Brand.objects.all(),
+    filters = {
         'current_query': query,
         'current_category': category_slug,
         'current_brand': brand_slug,
@@ -88,13 +84,66 @@ def product_list(request):
         'current_min_rating': min_rating,
         'current_max_rating': max_rating,
     }
+    return products, filters
+
+
+def product_list(request):
+    """
+    Отображает список товаров с возможностью фильтрации.
+
+    Фильтры описаны в filter_products(), счётчики фасетов боковой панели -
+    в facet_context(). Товары разбиваются на страницы:
+    параметр 'page' задаёт номер страницы, параметр 'cursor' включает
+    keyset-пагинацию.
+
+    Args:
+        request (HttpRequest): Объект запроса с возможными GET-параметрами.
+
+    Returns:
+        HttpResponse: Рендер шаблона 'catalog/product_list.html' с контекстом.
+    """
+    products, context = filter_products(
+        request, Product.objects.for_listing())
+    context.update(facet_context(products, context, request.GET))
+    context.update(paginate_products(request, products))
+    context['product_cards'] = render_product_cards(context['products'])
     return render(request, 'catalog/product_list.html', context)
 
 
+def product_search(request):
+    """
+    Отображает результаты полнотекстового поиска товаров.
+
+    Результаты упорядочены по релевантности (совпадения в названии
+    важнее совпадений в описании). Остальные фильтры из filter_products()
+    также применяются.
+
+    Args:
+        request (HttpRequest): Объект запроса с GET-параметром 'q'.
+
+    Returns:
+        HttpResponse: Рендер шаблона 'catalog/product_search.html'.
+    """
+    products, context = filter_products(
+        request, Product.objects.for_listing())
+    ordering = ('created_at', 'id')
+    if context['current_query']:
+        ordering = ('-rank', 'id')
+    context.update(facet_context(products, context, request.GET))
+    context['query'] = context['current_query']
+    context.update(paginate_products(request, products, ordering))
+    context['product_cards'] = render_product_cards(context['products'])
+    return render(request, 'catalog/product_search.html', context)
+
+
 def category_detail(request, slug):
     """
     Отображает детальную страницу категории со списком товаров.
 
+    Список товаров разбивается на страницы так же, как в product_list().
+    Готовый HTML списка кешируется с учётом версии категории и брендов,
+    поэтому при попадании в кеш товары из БД не запрашиваются.
+
     Args:
         request (HttpRequest): Объект запроса.
         slug (str): URL-идентификатор категории.
@@ -103,10 +152,37 @@ def category_detail(request, slug):
         HttpResponse: Рендер шаблона 'catalog/category_detail.html'.
     """
     category = get_object_or_404(Category, slug=slug)
-    products = Product.objects.filter(category=category)
+    category_key = version_key('category', category.pk)
+    brands_key = version_key('brand')
+    versions = get_versions([category_key, brands_key])
+
+    # ключ зависит только от позиции в списке, а не от любых
+    # параметров запроса, иначе мусорные URL раздували бы кеш
+    params = pagination_params(request.GET)
+    served = {}
+
+    def render_products():
+        products = Product.objects.for_listing().filter(category=category)
+        context = paginate_products(request, products, params=params)
+        served['page'] = context['page_obj'] and context['page_obj'].number
+        context['product_cards'] = render_product_cards(
+            context['products'], show_category=False)
+        return render_to_string('catalog/category_products.html',
+                                context, request=request)
+
+    def requested_page_served():
+        # номер за последней страницей показывает последнюю, такой
+        # фрагмент не кешируется, чтобы ключей было не больше страниц
+        return 'page' not in params or served['page'] == int(params['page'])
+
+    key = fragment_key('category_page', category.pk,
+                       versions[category_key], versions[brands_key],
+                       params.urlencode())
     context = {
         'category': category,
-        'products': products,
+        'category_products': get_or_render(
+            'category_page', key, render_products,
+            cacheable=requested_page_served),
     }
     return render(request, 'catalog/category_detail.html', context)
 
@@ -115,6 +191,9 @@ def product_detail(request, slug):
     """
     Отображает детальную страницу товара.
 
+    Блок с описанием, брендом и категорией кешируется с учётом версий
+    товара, его категории и бренда.
+
     Args:
         request (HttpRequest): Объект запроса.
         slug (str): URL-идентификатор товара.
@@ -122,12 +201,83 @@ def product_detail(request, slug):
     Returns:
         HttpResponse: Рендер шаблона 'catalog/product_detail.html'.
     """
-    product = get_object_or_404(Product, slug=slug)
-    related_products = Product.objects.filter(
+    product = get_object_or_404(Product.objects.for_detail(), slug=slug)
+    related_products = Product.objects.for_listing().filter(
         category=product.category
     ).exclude(id=product.id)[:4]
+    version_keys = product_version_keys(product)
+    versions = get_versions(version_keys)
+    key = fragment_key('product_info', product.pk,
+                       *(versions[k] for k in version_keys))
     context = {
         'product': product,
+        'product_info': get_or_render(
+            'product_info', key,
+            lambda: render_to_string('catalog/product_info.html',
+                                     {'product': product})),
         'related_products': related_products,
     }
     return render(request, 'catalog/product_detail.html', context)
+
+
+def autocomplete(request):
+    """
+    Возвращает подсказки для строки поиска в формате JSON.
+
+    Ищет похожие названия товаров, брендов и категорий с учётом опечаток.
+    Ответы кешируются по введённому префиксу.
+
+    Args:
+        request (HttpRequest): Объект запроса с GET-параметром 'q'.
+
+    Returns:
+        JsonResponse: {'results': [{'type', 'name', 'url'}, ...]}.
+    """
+    return JsonResponse({
+        'results': get_suggestions(request.GET.get('q', '')),
+    })
+
+
+@csrf_exempt
+@require_POST
+def warehouse_sync(request):
+    """
+    Принимает пакет изменений цен и остатков от складской системы.
+
+    Тело запроса - JSON {'mode': 'absolute' | 'delta',
+    'items': [{'slug', 'price', 'stock'}, ...]}. Доступ по токену
+    из settings.WAREHOUSE_API_TOKENS в заголовке
+    'Authorization: Bearer <токен>'.
+
+    Args:
+        request (HttpRequest): Объект запроса.
+
+    Returns:
+        JsonResponse: Отчёт apply_updates() и ошибки позиций
+        ('invalid': [{'index', 'errors'}]); 401 без токена,
+        400 при некорректном теле, 413 при слишком большом пакете.
+    """
+    if not check_token(request.headers.get('Authorization', '')):
+        return JsonResponse({'error': 'Неверный токен'}, status=401)
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Некорректный JSON'}, status=400)
+    if not isinstance(payload, dict):
+        return JsonResponse({'error': 'Ожидается объект JSON'}, status=400)
+    mode = payload.get('mode', 'absolute')
+    items = payload.get('items')
+    if mode not in MODES or not isinstance(items, list):
+        return JsonResponse(
+            {'error': f"Нужны mode ({', '.join(MODES)}) и список items"},
+            status=400)
+    if len(items) > get_max_items():
+        return JsonResponse(
+            {'error': f'Не больше {get_max_items()} позиций в запросе'},
+            status=413)
+    invalid = []
+    report = apply_updates(
+        enumerate(items, 1), mode,
+        on_error=lambda index, item, errors: invalid.append(
+            {'index': index, 'errors': errors}))
+    return JsonResponse({**report, 'invalid': invalid})
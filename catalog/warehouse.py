@@ -0,0 +1,302 @@
+import hmac
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .cache import bump_versions, version_key
+from .models import Product
+from .seed import chunked
+
+MODES = ('absolute', 'delta')
+OUT_OF_RANGE = ('Цена или остаток после изменения вышли бы за допустимые '
+                'пределы.')
+
+
+def get_batch_size():
+    """
+    Возвращает количество товаров в одном UPDATE.
+
+    Returns:
+        int: Значение settings.WAREHOUSE_BATCH_SIZE (по умолчанию 1000).
+    """
+    return getattr(settings, 'WAREHOUSE_BATCH_SIZE', 1000)
+
+
+def get_max_items():
+    """
+    Возвращает максимальное количество позиций в одном запросе API.
+
+    Returns:
+        int: Значение settings.WAREHOUSE_MAX_ITEMS (по умолчанию 10000).
+    """
+    return getattr(settings, 'WAREHOUSE_MAX_ITEMS', 10000)
+
+
+def check_token(header):
+    """
+    Проверяет токен складской системы из заголовка Authorization.
+
+    Args:
+        header (str): Значение заголовка ('Bearer <токен>').
+
+    Returns:
+        bool: True, если токен есть в settings.WAREHOUSE_API_TOKENS
+        (если список пуст, API выключено).
+    """
+    scheme, _, token = header.partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return False
+    return any(hmac.compare_digest(token.encode(), allowed.encode())
+               for allowed in getattr(settings, 'WAREHOUSE_API_TOKENS', []))
+
+
+def get_max_values(connection):
+    """
+    Возвращает наибольшие цену и остаток, которые помещаются в столбцы.
+
+    Args:
+        connection: Соединение с БД товаров.
+
+    Returns:
+        tuple: (наибольшая цена, наибольший остаток).
+    """
+    price = Product._meta.get_field('price')
+    max_price = (Decimal(10) ** (price.max_digits - price.decimal_places)
+                 - Decimal(10) ** -price.decimal_places)
+    stock = Product._meta.get_field('stock')
+    _, max_stock = connection.ops.integer_field_range(
+        stock.get_internal_type())
+    return max_price, max_stock
+
+
+def clean_item(item, mode):
+    """
+    Проверяет позицию обновления.
+
+    Значения проверяются валидаторами полей Product, поэтому и новые
+    значения, и изменения не выходят за точность столбцов (max_digits
+    цены и диапазон целого остатка). В режиме 'absolute' цена и остаток
+    не могут быть отрицательными, в режиме 'delta' это изменения
+    и могут быть любого знака.
+
+    Args:
+        item (dict | ValidationError): {'slug', 'price' (необязательно),
+            'stock' (необязательно)} или ошибка чтения строки файла.
+        mode (str): 'absolute' или 'delta'.
+
+    Returns:
+        tuple: (slug, цена или None, остаток или None).
+
+    Raises:
+        ValidationError: Со списком ошибок позиции.
+    """
+    if isinstance(item, ValidationError):
+        raise item
+    if not isinstance(item, dict):
+        raise ValidationError('Позиция должна быть объектом')
+    values = {}
+    errors = []
+    for name in ('slug', 'price', 'stock'):
+        value = item.get(name)
+        if name != 'slug' and value in (None, ''):
+            values[name] = None
+            continue
+        try:
+            values[name] = Product._meta.get_field(name).clean(value, None)
+        except ValidationError as e:
+            errors.extend(f'{name}: {message}' for message in e.messages)
+            continue
+        if mode == 'absolute' and name != 'slug' and values[name] < 0:
+            errors.append(f'{name}: Значение не может быть отрицательным.')
+    if not errors and values['price'] is None and values['stock'] is None:
+        errors.append('Нужно передать price или stock.')
+    if errors:
+        raise ValidationError(errors)
+    return values['slug'], values['price'], values['stock']
+
+
+def merge_items(items, mode):
+    """
+    Объединяет позиции с одинаковым slug.
+
+    В режиме 'absolute' побеждает последнее значение,
+    в режиме 'delta' изменения складываются.
+
+    Args:
+        items (iterable): Кортежи (slug, цена, остаток).
+        mode (str): 'absolute' или 'delta'.
+
+    Returns:
+        list: Кортежи (slug, цена, остаток) без повторов slug.
+    """
+    merged = {}
+    for slug, price, stock in items:
+        if slug in merged and mode == 'delta':
+            old_price, old_stock = merged[slug]
+            if price is None:
+                price = old_price
+            elif old_price is not None:
+                price += old_price
+            if stock is None:
+                stock = old_stock
+            elif old_stock is not None:
+                stock += old_stock
+        elif slug in merged:
+            old_price, old_stock = merged[slug]
+            price = old_price if price is None else price
+            stock = old_stock if stock is None else stock
+        merged[slug] = (price, stock)
+    return [(slug, price, stock) for slug, (price, stock) in merged.items()]
+
+
+def update_batch(items, mode):
+    """
+    Применяет пакет изменений одним UPDATE ... FROM (VALUES ...).
+
+    Изменения передаются таблицей VALUES и соединяются с товарами
+    по slug. Обновляются только строки, у которых цена или остаток
+    действительно меняются; для них же меняется updated_at и
+    сбрасывается кеш карточек и категорий. В режиме 'delta' строки,
+    у которых цена или остаток ушли бы в минус или за точность
+    столбца, не обновляются.
+
+    Args:
+        items (list): Кортежи (slug, цена или None, остаток или None)
+            без повторов slug.
+        mode (str): 'absolute' или 'delta'.
+
+    Returns:
+        set: slug изменённых товаров.
+    """
+    using = router.db_for_write(Product)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table = quote(Product._meta.db_table)
+    pk, price, stock, slug, updated_at, category = (
+        quote(Product._meta.get_field(name).column)
+        for name in ('id', 'price', 'stock', 'slug', 'updated_at',
+                     'category'))
+    guard = ''
+    guard_params = []
+    if mode == 'delta':
+        # сумма считается в BIGINT, чтобы проверка границ
+        # не падала на переполнении целого столбца
+        new_price = f'{table}.{price} + COALESCE(v.price, 0)'
+        new_stock = (f'CAST({table}.{stock} AS BIGINT) '
+                     f'+ COALESCE(v.stock, 0)')
+        guard = (f'AND {new_price} BETWEEN 0 AND CAST(%s AS NUMERIC) '
+                 f'AND {new_stock} BETWEEN 0 AND CAST(%s AS BIGINT) ')
+        guard_params = list(get_max_values(connection))
+    else:
+        new_price = f'COALESCE(v.price, {table}.{price})'
+        new_stock = f'COALESCE(v.stock, {table}.{stock})'
+    rows = ', '.join(['(%s, CAST(%s AS NUMERIC), CAST(%s AS BIGINT))']
+                     * len(items))
+    sql = (
+        f'WITH v (slug, price, stock) AS (VALUES {rows}) '
+        f'UPDATE {table} SET {price} = {new_price}, '
+        f'{stock} = {new_stock}, {updated_at} = %s '
+        f'FROM v WHERE {table}.{slug} = v.slug '
+        f'AND ({new_price} <> {table}.{price} '
+        f'OR {new_stock} <> {table}.{stock}) {guard}'
+        f'RETURNING {table}.{pk}, {table}.{category}, {table}.{slug}'
+    )
+    params = [value for item in items for value in item]
+    params.append(timezone.now())
+    params.extend(guard_params)
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            changed = cursor.fetchall()
+        bump_versions(
+            *(version_key('product', pk) for pk, _, _ in changed),
+            *(version_key('category', pk) for pk in
+              {category_id for _, category_id, _ in changed}))
+    return {slug for _, _, slug in changed}
+
+
+def apply_updates(items, mode='absolute', batch_size=None, on_error=None):
+    """
+    Применяет изменения цен и остатков со склада.
+
+    Позиции проверяются, объединяются по slug и применяются
+    пакетами (один UPDATE на пакет, размер пакета ограничен
+    также числом параметров запроса СУБД). Изменения, после которых
+    цена или остаток ушли бы в минус или за точность столбца,
+    не применяются и считаются ошибками всех позиций этого товара.
+
+    Args:
+        items (iterable): Пары (номер позиции, словарь {'slug', 'price',
+            'stock'}), например enumerate(items, 1) или read_rows().
+        mode (str): 'absolute' - новые значения, 'delta' - изменения.
+        batch_size (int | None): Размер пакета.
+        on_error (callable): Вызывается с (номером позиции, позицией,
+            списком ошибок) для каждой некорректной позиции.
+
+    Returns:
+        dict: Отчёт {'received', 'changed', 'unchanged', 'errors',
+        'not_found': список неизвестных slug}.
+
+    Raises:
+        ValueError: Если режим неизвестен.
+    """
+    if mode not in MODES:
+        raise ValueError(f'Неизвестный режим: {mode}')
+    report = {'received': 0, 'changed': 0, 'unchanged': 0, 'errors': 0,
+              'not_found': []}
+    connection = connections[router.db_for_write(Product)]
+    max_params = connection.features.max_query_params
+    batch_size = batch_size or get_batch_size()
+    if max_params:
+        batch_size = min(batch_size, (max_params - 3) // 3)
+
+    def valid_items():
+        for number, item in items:
+            report['received'] += 1
+            try:
+                cleaned = clean_item(item, mode)
+            except ValidationError as e:
+                report['errors'] += 1
+                if on_error:
+                    on_error(number, item if isinstance(item, dict) else {},
+                             e.messages)
+                continue
+            yield number, item, cleaned
+
+    max_price, max_stock = get_max_values(connection)
+
+    def fits(price, stock):
+        # сумма изменений больше точности столбца не поместится
+        # ни при каком текущем значении
+        return abs(price or 0) <= max_price and abs(stock or 0) <= max_stock
+
+    for batch in chunked(valid_items(), batch_size):
+        sources = defaultdict(list)
+        for number, item, cleaned in batch:
+            sources[cleaned[0]].append((number, item))
+        batch = merge_items((cleaned for _, _, cleaned in batch), mode)
+        slugs = [slug for slug, _, _ in batch]
+        found = set(Product.objects.filter(slug__in=slugs)
+                    .values_list('slug', flat=True))
+        report['not_found'].extend(slug for slug in slugs
+                                   if slug not in found)
+        batch = [item for item in batch if item[0] in found]
+        updates = [item for item in batch if fits(item[1], item[2])]
+        changed = update_batch(updates, mode) if updates else set()
+        report['changed'] += len(changed)
+        for slug, price, stock in batch:
+            if slug in changed:
+                continue
+            # ненулевое изменение не применилось только из-за границ
+            if mode == 'delta' and (price or stock):
+                for number, item in sources[slug]:
+                    report['errors'] += 1
+                    if on_error:
+                        on_error(number, item, [OUT_OF_RANGE])
+            else:
+                report['unchanged'] += 1
+    return report
@@ -20,6 +20,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
 
     'catalog',
@@ -27,6 +28,7 @@ INSTALLED_APPS = [
     'cart',
     'orders',
     'reviews',
+    'monitoring',
 ]
 AUTH_USER_MODEL = 'users.User'
 
@@ -37,7 +39,58 @@ LOGIN_REDIRECT_URL = 'catalog:product_list'
 LOGOUT_REDIRECT_URL = 'catalog:product_list'
 LOGIN_URL = 'users:login'
 
+CATALOG_PAGE_SIZE = 24
+CATALOG_AUTOCOMPLETE_LIMIT = 8
+CATALOG_AUTOCOMPLETE_TIMEOUT = 300
+CATALOG_PRICE_BUCKETS = (1000, 5000, 20000, 50000)
+CATALOG_FACETS_TIMEOUT = 60
+CATALOG_CACHE_TIMEOUT = 600
+
+ADMIN_COUNT_ESTIMATE_THRESHOLD = 100000
+ADMIN_FILTER_CACHE_TIMEOUT = 600
+
+EXPORT_CHUNK_SIZE = 2000
+
+# токены складской системы через запятую; пусто - API синхронизации выключено
+WAREHOUSE_API_TOKENS = [
+    token for token in os.environ.get('WAREHOUSE_API_TOKENS', '').split(',')
+    if token
+]
+WAREHOUSE_BATCH_SIZE = 1000
+WAREHOUSE_MAX_ITEMS = 10000
+
+MONITORING_SLOW_REQUEST_MS = 500
+MONITORING_SLOW_REQUESTS = 100
+MONITORING_PROFILER = True
+MONITORING_PROFILER_INTERVAL = 0.005
+MONITORING_PROFILER_REFRESH = 5
+MONITORING_PROFILE_DIR = BASE_DIR / 'profiles'
+
+# Метрики запросов (monitoring.middleware) пишутся строкой JSON.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '{message}', 'style': '{'},
+    },
+    'handlers': {
+        'monitoring': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'monitoring.requests': {
+            'handlers': ['monitoring'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 MIDDLEWARE = [
+    'monitoring.middleware.InstrumentationMiddleware',
+    'monitoring.middleware.ProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -51,7 +104,7 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'monitoring.backends.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -78,6 +131,29 @@ DATABASES = {
 }
 
 
+# Бэкенд кеша выбирается переменной окружения CACHE_BACKEND:
+# locmem (по умолчанию), file или redis (любой Redis-совместимый сервер).
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'internet-magazin',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/1'),
+    },
+}
+
+CACHES = {
+    'default': CACHE_BACKENDS[os.environ.get('CACHE_BACKEND', 'locmem')],
+}
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
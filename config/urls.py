@@ -4,6 +4,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 
 urlpatterns = [
+    path('admin/monitoring/', include('monitoring.urls')),
     path('admin/', admin.site.urls),
     path('', include('catalog.urls')),
     path('users/', include('users.urls')),
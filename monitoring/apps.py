@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    """
+    Конфигурация приложения 'monitoring'.
+
+    Атрибуты:
+        name (str): Имя приложения.
+        verbose_name (str): Человекочитаемое имя приложения для админ-панели.
+    """
+    name = 'monitoring'
+    verbose_name = 'Мониторинг'
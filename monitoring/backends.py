@@ -0,0 +1,53 @@
+from django.template.backends.django import DjangoTemplates
+
+from .metrics import current_metrics
+
+
+class InstrumentedTemplate:
+    """
+    Обёртка шаблона, учитывающая время рендера в метриках запроса.
+
+    Остальные атрибуты (origin, template) берутся у исходного шаблона.
+
+    Методы:
+        render(): Рендерит шаблон с замером времени.
+    """
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        """
+        Рендерит шаблон, учитывая время в метриках текущего запроса.
+
+        Args:
+            context (dict): Контекст шаблона.
+            request (HttpRequest): Объект запроса.
+
+        Returns:
+            SafeString: Результат рендера.
+        """
+        metrics = current_metrics()
+        if metrics is None:
+            return self.template.render(context, request)
+        with metrics.template():
+            return self.template.render(context, request)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """
+    Бэкенд шаблонов Django с замером времени рендера.
+
+    Методы:
+        from_string(): Создаёт шаблон из строки.
+        get_template(): Загружает шаблон по имени.
+    """
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return InstrumentedTemplate(super().get_template(template_name))
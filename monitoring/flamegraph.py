@@ -0,0 +1,115 @@
+import zlib
+
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+ROW_HEIGHT = 17
+MIN_WIDTH = 0.3
+CHAR_WIDTH = 7
+
+
+def build_tree(counts):
+    """
+    Собирает дерево вызовов из стеков в формате collapsed.
+
+    Args:
+        counts (dict): {'кадр;кадр;кадр': количество сэмплов}.
+
+    Returns:
+        dict: Корневой узел {'name', 'value', 'children'}.
+    """
+    root = {'name': 'all', 'value': 0, 'children': {}}
+    for stack, count in counts.items():
+        node = root
+        node['value'] += count
+        for name in stack.split(';'):
+            node = node['children'].setdefault(
+                name, {'name': name, 'value': 0, 'children': {}})
+            node['value'] += count
+    return root
+
+
+def tree_depth(node):
+    """
+    Возвращает глубину дерева вызовов.
+
+    Args:
+        node (dict): Узел из build_tree().
+
+    Returns:
+        int: Количество уровней.
+    """
+    return 1 + max((tree_depth(child)
+                    for child in node['children'].values()), default=0)
+
+
+def frame_color(name):
+    """
+    Возвращает цвет кадра: один и тот же модуль - один и тот же цвет.
+
+    Args:
+        name (str): Имя кадра 'модуль:функция'.
+
+    Returns:
+        str: Цвет в формате hsl() из тёплой части палитры.
+    """
+    module = name.split(':', 1)[0]
+    digest = zlib.crc32(module.encode())
+    return f'hsl({digest % 55}, {60 + digest % 30}%, {55 + digest % 15}%)'
+
+
+def flame_graph(counts, width=1200):
+    """
+    Рисует flame graph в формате SVG.
+
+    Ширина прямоугольника пропорциональна числу сэмплов,
+    в которых функция была в стеке; корень снизу. Подсказка
+    (title) показывает полное имя, сэмплы и долю.
+
+    Args:
+        counts (dict): {'кадр;кадр;кадр': количество сэмплов}.
+        width (int): Ширина изображения в пикселях.
+
+    Returns:
+        SafeString: Разметка SVG (пустая строка, если сэмплов нет).
+    """
+    root = build_tree(counts)
+    total = root['value']
+    if not total:
+        return ''
+    depth = tree_depth(root)
+    height = depth * ROW_HEIGHT
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" '
+        f'height="{height}" font-family="monospace" font-size="11">'
+    ]
+
+    def draw(node, x, level):
+        node_width = node['value'] / total * width
+        if node_width < MIN_WIDTH:
+            return
+        y = height - (level + 1) * ROW_HEIGHT
+        name = escape(node['name'])
+        parts.append(
+            f'<g><title>{name} ({node["value"]} сэмпл., '
+            f'{node["value"] / total:.1%})</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{node_width:.1f}" '
+            f'height="{ROW_HEIGHT - 1}" fill="{frame_color(node["name"])}" '
+            f'rx="2"/>')
+        chars = int(node_width / CHAR_WIDTH)
+        if chars >= 3:
+            label = node['name']
+            if len(label) > chars:
+                label = label[:chars - 2] + '..'
+            parts.append(f'<text x="{x + 3:.1f}" y="{y + ROW_HEIGHT - 5}">'
+                         f'{escape(label)}</text>')
+        parts.append('</g>')
+        child_x = x
+        for child in sorted(node['children'].values(),
+                            key=lambda child: child['name']):
+            draw(child, child_x, level + 1)
+            child_x += child['value'] / total * width
+
+    draw(root, 0, 0)
+    parts.append('</svg>')
+    return mark_safe(''.join(parts))
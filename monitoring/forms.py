@@ -0,0 +1,40 @@
+import re
+
+from django import forms
+
+
+class ProfilerConfigForm(forms.Form):
+    """
+    Форма включения сэмплирующего профилировщика.
+
+    Поля:
+        enabled: Включён ли профилировщик.
+        rate: Процент профилируемых запросов.
+        path: Регулярное выражение пути запроса.
+
+    Методы:
+        clean_path(): Проверяет регулярное выражение.
+    """
+    enabled = forms.BooleanField(label='Включён', required=False)
+    rate = forms.FloatField(label='Доля запросов, %', min_value=0,
+                            max_value=100, initial=1)
+    path = forms.CharField(
+        label='Путь (регулярное выражение)', required=False,
+        help_text='Например, ^/orders/create/. Пусто - все пути.')
+
+    def clean_path(self):
+        """
+        Проверяет, что путь - корректное регулярное выражение.
+
+        Returns:
+            str: Регулярное выражение.
+
+        Raises:
+            ValidationError: Если выражение некорректно.
+        """
+        path = self.cleaned_data['path']
+        try:
+            re.compile(path)
+        except re.error as e:
+            raise forms.ValidationError(f'Некорректное выражение: {e}')
+        return path
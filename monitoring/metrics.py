@@ -0,0 +1,226 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+SLOW_REQUESTS_KEY = 'monitoring:slow_requests'
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def get_slow_request_ms():
+    """
+    Возвращает порог медленного запроса.
+
+    Returns:
+        int: Значение settings.MONITORING_SLOW_REQUEST_MS
+        (по умолчанию 500 мс).
+    """
+    return getattr(settings, 'MONITORING_SLOW_REQUEST_MS', 500)
+
+
+def get_slow_requests_limit():
+    """
+    Возвращает размер буфера медленных запросов.
+
+    Returns:
+        int: Значение settings.MONITORING_SLOW_REQUESTS (по умолчанию 100).
+    """
+    return getattr(settings, 'MONITORING_SLOW_REQUESTS', 100)
+
+
+class RequestMetrics:
+    """
+    Метрики обработки одного HTTP-запроса.
+
+    Экземпляр подключается к соединениям с БД как execute_wrapper
+    и считает запросы и время их выполнения. Одинаковые SQL
+    (с точностью до параметров) считаются повторами - типичный
+    признак N+1.
+
+    Атрибуты:
+        queries (int): Количество SQL-запросов.
+        db_time (float): Суммарное время SQL-запросов в секундах.
+        statements (Counter): Количество выполнений каждого SQL.
+        template_time (float): Время рендера шаблонов в секундах.
+        cache_hits (int): Попадания в кеш фрагментов.
+        cache_misses (int): Промахи кеша фрагментов.
+
+    Методы:
+        template(): Контекстный менеджер замера рендера шаблона.
+        duplicates(): Возвращает повторяющиеся SQL.
+        server_timing(): Возвращает значение заголовка Server-Timing.
+        as_dict(): Возвращает метрики для журнала.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            self.statements[sql] += 1
+
+    @contextmanager
+    def template(self):
+        """
+        Замеряет рендер шаблона.
+
+        Вложенные рендеры не учитываются повторно.
+        """
+        self._template_depth += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._template_depth -= 1
+            if not self._template_depth:
+                self.template_time += time.perf_counter() - started
+
+    def duplicates(self):
+        """
+        Возвращает SQL, выполненные больше одного раза.
+
+        Returns:
+            list: Пары (SQL, количество) по убыванию количества.
+        """
+        return [(sql, count) for sql, count in self.statements.most_common()
+                if count > 1]
+
+    def server_timing(self, duration):
+        """
+        Возвращает значение заголовка Server-Timing.
+
+        Args:
+            duration (float): Общее время обработки в секундах.
+
+        Returns:
+            str: Метрики total, db, tpl и cache.
+        """
+        return ', '.join([
+            f'total;dur={duration * 1000:.1f}',
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'cache;desc="hits={self.cache_hits} misses={self.cache_misses}"',
+        ])
+
+    def as_dict(self, duration):
+        """
+        Возвращает метрики для структурированного журнала.
+
+        Args:
+            duration (float): Общее время обработки в секундах.
+
+        Returns:
+            dict: Метрики запроса; самый частый повтор SQL
+            в ключе 'top_duplicate'.
+        """
+        duplicates = self.duplicates()
+        data = {
+            'duration_ms': round(duration * 1000, 1),
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 1),
+            'duplicate_queries': sum(count - 1 for _, count in duplicates),
+            'template_ms': round(self.template_time * 1000, 1),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+        if duplicates:
+            sql, count = duplicates[0]
+            data['top_duplicate'] = {'sql': sql[:300], 'count': count}
+        return data
+
+
+def current_metrics():
+    """
+    Возвращает метрики обрабатываемого запроса.
+
+    Returns:
+        RequestMetrics | None: None вне InstrumentationMiddleware
+        (команды, фоновые задачи).
+    """
+    return _current.get()
+
+
+def activate(metrics):
+    """
+    Делает метрики текущими для запроса.
+
+    Args:
+        metrics (RequestMetrics): Метрики запроса.
+
+    Returns:
+        Token: Токен для deactivate().
+    """
+    return _current.set(metrics)
+
+
+def deactivate(token):
+    """
+    Восстанавливает метрики, бывшие текущими до activate().
+
+    Args:
+        token (Token): Результат activate().
+    """
+    _current.reset(token)
+
+
+def record_cache(hits=0, misses=0):
+    """
+    Учитывает обращения к кешу в метриках текущего запроса.
+
+    Args:
+        hits (int): Количество попаданий.
+        misses (int): Количество промахов.
+    """
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+def remember_slow_request(entry):
+    """
+    Добавляет запрос в кольцевой буфер медленных запросов.
+
+    Буфер хранится в кеше, чтобы его видели все процессы сервера
+    (при общем бэкенде кеша). Одновременная запись из двух процессов
+    может потерять одну из записей - для диагностики это допустимо.
+
+    Args:
+        entry (dict): Запись журнала запроса.
+    """
+    entries = cache.get(SLOW_REQUESTS_KEY, [])
+    entries.append(entry)
+    cache.set(SLOW_REQUESTS_KEY, entries[-get_slow_requests_limit():], None)
+
+
+def slow_requests():
+    """
+    Возвращает медленные запросы из буфера.
+
+    Returns:
+        list: Записи по убыванию длительности.
+    """
+    return sorted(cache.get(SLOW_REQUESTS_KEY, []),
+                  key=lambda entry: entry['duration_ms'], reverse=True)
+
+
+def clear_slow_requests():
+    """
+    Очищает буфер медленных запросов.
+    """
+    cache.delete(SLOW_REQUESTS_KEY)
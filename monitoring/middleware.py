@@ -0,0 +1,152 @@
+import json
+import logging
+import random
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject, empty
+
+from .metrics import (
+    RequestMetrics, activate, deactivate, get_slow_request_ms,
+    remember_slow_request,
+)
+from .profiler import SamplingProfiler, get_config, save_profile
+
+logger = logging.getLogger('monitoring.requests')
+
+
+def loaded_user(request):
+    """
+    Возвращает пользователя запроса, только если он уже загружен.
+
+    request.user - ленивый объект: обращение к нему после ответа
+    загрузило бы сессию и пользователя вне замера.
+
+    Args:
+        request (HttpRequest): Объект запроса.
+
+    Returns:
+        User | None: Пользователь или None, если он не загружался.
+    """
+    user = getattr(request, 'user', None)
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        return None
+    return user
+
+
+class InstrumentationMiddleware:
+    """
+    Собирает метрики обработки каждого запроса.
+
+    Считает SQL-запросы и их время, повторы SQL, время рендера
+    шаблонов и обращения к кешу фрагментов. Метрики отдаются
+    в заголовке Server-Timing и пишутся в журнал 'monitoring.requests'
+    строкой JSON. Запросы дольше MONITORING_SLOW_REQUEST_MS попадают
+    в буфер медленных запросов (страница в админ-панели).
+
+    Должен стоять первым в MIDDLEWARE, чтобы учитывать запросы
+    остальных middleware (сессии, пользователь).
+
+    Методы:
+        __call__(): Обрабатывает запрос с замером метрик.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = activate(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            deactivate(token)
+        duration = time.perf_counter() - started
+
+        response['Server-Timing'] = metrics.server_timing(duration)
+        user = loaded_user(request)
+        entry = {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'user_id': user.pk if user and user.is_authenticated else None,
+            **metrics.as_dict(duration),
+        }
+        logger.info(json.dumps(entry, ensure_ascii=False))
+        if entry['duration_ms'] >= get_slow_request_ms():
+            remember_slow_request({
+                'time': timezone.now().isoformat(timespec='seconds'),
+                **entry,
+            })
+        return response
+
+
+class ProfilerMiddleware:
+    """
+    Профилирует часть запросов сэмплирующим профилировщиком.
+
+    Какие запросы профилировать (доля и регулярное выражение пути),
+    задаётся в админ-панели; настройки перечитываются из кеша
+    не чаще раза в MONITORING_PROFILER_REFRESH секунд. Стеки
+    дописываются в профиль представления (см. save_profile()).
+
+    При MONITORING_PROFILER = False middleware отключается целиком,
+    а при выключенном в админ-панели профилировщике запрос проходит
+    без сэмплирования: проверяется только закешированная настройка.
+
+    Методы:
+        should_profile(): Решает, профилировать ли запрос.
+        __call__(): Обрабатывает запрос, при необходимости профилируя его.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'MONITORING_PROFILER', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.config = None
+        self.loaded_at = 0
+
+    def should_profile(self, request):
+        """
+        Решает, профилировать ли запрос.
+
+        Args:
+            request (HttpRequest): Объект запроса.
+
+        Returns:
+            bool: True, если профилировщик включён, путь подходит
+            и запрос попал в выборку.
+        """
+        now = time.monotonic()
+        refresh = getattr(settings, 'MONITORING_PROFILER_REFRESH', 5)
+        if self.config is None or now - self.loaded_at >= refresh:
+            self.config = get_config()
+            self.loaded_at = now
+        config = self.config
+        if not config['enabled']:
+            return False
+        if config['path'] and not re.search(config['path'], request.path):
+            return False
+        return random.random() * 100 < config['rate']
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+        profiler = SamplingProfiler()
+        profiler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+        match = request.resolver_match
+        save_profile(match.view_name if match else 'unresolved', profiler)
+        return response
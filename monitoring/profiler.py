@@ -0,0 +1,265 @@
+import re
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+
+CONFIG_KEY = 'monitoring:profiler'
+DEFAULT_CONFIG = {'enabled': False, 'rate': 0.0, 'path': ''}
+
+
+def get_interval():
+    """
+    Возвращает интервал сэмплирования.
+
+    Returns:
+        float: Значение settings.MONITORING_PROFILER_INTERVAL
+        (по умолчанию 0.005 с).
+    """
+    return getattr(settings, 'MONITORING_PROFILER_INTERVAL', 0.005)
+
+
+def get_profile_dir():
+    """
+    Возвращает каталог с собранными профилями.
+
+    Returns:
+        Path: Значение settings.MONITORING_PROFILE_DIR.
+    """
+    return Path(getattr(settings, 'MONITORING_PROFILE_DIR',
+                        settings.BASE_DIR / 'profiles'))
+
+
+def frame_name(frame):
+    """
+    Возвращает имя функции кадра для стека.
+
+    Args:
+        frame (frame): Кадр стека.
+
+    Returns:
+        str: 'модуль:Класс.функция'.
+    """
+    module = frame.f_globals.get('__name__', '?')
+    return f'{module}:{frame.f_code.co_qualname}'
+
+
+class SamplingProfiler:
+    """
+    Сэмплирующий профилировщик одного потока.
+
+    В главном потоке стек снимается обработчиком SIGPROF
+    (setitimer(ITIMER_PROF), то есть по процессорному времени:
+    ожидание ответа БД в профиль не попадает, его видно в Server-Timing).
+    В остальных потоках (например, runserver) сигналы недоступны,
+    и стек потока снимает фоновый поток по реальному времени.
+
+    Стек записывается от кадра, вызвавшего start(), до текущего
+    кадра, поэтому кадры веб-сервера в профиль не попадают.
+
+    Атрибуты:
+        interval (float): Интервал сэмплирования в секундах.
+        counts (Counter): Количество сэмплов по стекам.
+
+    Методы:
+        start(): Начинает сэмплирование текущего потока.
+        stop(): Останавливает сэмплирование.
+        collapsed(): Возвращает стеки в формате collapsed.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = interval or get_interval()
+        self.counts = Counter()
+        self._root = None
+        self._thread_id = None
+        self._previous_handler = None
+        self._sampler = None
+        self._running = False
+
+    def sample(self, frame):
+        """
+        Добавляет стек кадра в профиль.
+
+        Args:
+            frame (frame): Текущий кадр профилируемого потока.
+        """
+        stack = []
+        while frame is not None and frame is not self._root:
+            stack.append(frame_name(frame))
+            frame = frame.f_back
+        if frame is self._root and stack:
+            self.counts[';'.join(reversed(stack))] += 1
+
+    def _handle_signal(self, signum, frame):
+        self.sample(frame)
+
+    def _sample_thread(self):
+        while self._running:
+            time.sleep(self.interval)
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self.sample(frame)
+
+    def start(self):
+        """
+        Начинает сэмплирование текущего потока.
+        """
+        self._root = sys._getframe(1)
+        self._thread_id = threading.get_ident()
+        self._running = True
+        if (threading.current_thread() is threading.main_thread()
+                and hasattr(signal, 'setitimer')):
+            self._previous_handler = signal.signal(signal.SIGPROF,
+                                                   self._handle_signal)
+            signal.setitimer(signal.ITIMER_PROF, self.interval,
+                             self.interval)
+        else:
+            self._sampler = threading.Thread(target=self._sample_thread,
+                                             daemon=True)
+            self._sampler.start()
+
+    def stop(self):
+        """
+        Останавливает сэмплирование и восстанавливает обработчик сигнала.
+        """
+        self._running = False
+        if self._sampler is None:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF,
+                          self._previous_handler or signal.SIG_DFL)
+        else:
+            self._sampler.join()
+            self._sampler = None
+        self._root = None
+
+    def collapsed(self):
+        """
+        Возвращает стеки в формате collapsed (Brendan Gregg).
+
+        Returns:
+            str: Строки 'кадр;кадр;кадр количество'.
+        """
+        return ''.join(f'{stack} {count}\n'
+                       for stack, count in self.counts.items())
+
+
+def get_config():
+    """
+    Возвращает настройки включения профилировщика.
+
+    Настройки хранятся в кеше и меняются в админ-панели.
+
+    Returns:
+        dict: {'enabled': bool, 'rate': процент запросов,
+        'path': регулярное выражение пути или ''}.
+    """
+    return {**DEFAULT_CONFIG, **cache.get(CONFIG_KEY, {})}
+
+
+def set_config(enabled, rate, path):
+    """
+    Сохраняет настройки включения профилировщика.
+
+    Args:
+        enabled (bool): Включён ли профилировщик.
+        rate (float): Процент профилируемых запросов (0-100).
+        path (str): Регулярное выражение пути или '' для всех путей.
+
+    Raises:
+        re.error: Если регулярное выражение некорректно.
+    """
+    re.compile(path)
+    cache.set(CONFIG_KEY, {'enabled': enabled, 'rate': rate, 'path': path},
+              None)
+
+
+def profile_path(name):
+    """
+    Возвращает путь к файлу профиля.
+
+    Args:
+        name (str): Имя профиля (имя представления).
+
+    Returns:
+        Path: Файл '<имя>.collapsed' в каталоге профилей.
+    """
+    filename = re.sub(r'[^\w.-]', '_', name)
+    return get_profile_dir() / f'{filename}.collapsed'
+
+
+def save_profile(name, profiler):
+    """
+    Дописывает стеки запроса в файл профиля.
+
+    Запросы только дописываются в конец файла, а суммируются
+    при чтении (read_profile()), поэтому процессы сервера
+    не мешают друг другу.
+
+    Args:
+        name (str): Имя профиля (имя представления).
+        profiler (SamplingProfiler): Остановленный профилировщик.
+    """
+    if not profiler.counts:
+        return
+    path = profile_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open('a', encoding='utf-8') as file:
+        file.write(profiler.collapsed())
+
+
+def read_profile(name):
+    """
+    Читает профиль и суммирует одинаковые стеки.
+
+    Args:
+        name (str): Имя профиля.
+
+    Returns:
+        Counter: Количество сэмплов по стекам (пустой, если профиля нет).
+    """
+    counts = Counter()
+    path = profile_path(name)
+    if not path.exists():
+        return counts
+    for line in path.read_text(encoding='utf-8').splitlines():
+        stack, _, count = line.rpartition(' ')
+        if stack and count.isdigit():
+            counts[stack] += int(count)
+    return counts
+
+
+def list_profiles():
+    """
+    Возвращает собранные профили.
+
+    Returns:
+        list: Словари {'name', 'size', 'modified'} по убыванию
+        времени изменения.
+    """
+    directory = get_profile_dir()
+    if not directory.exists():
+        return []
+    files = sorted(directory.glob('*.collapsed'),
+                   key=lambda path: path.stat().st_mtime, reverse=True)
+    return [{
+        'name': path.stem,
+        'size': path.stat().st_size,
+        'modified': datetime.fromtimestamp(path.stat().st_mtime,
+                                          tz=timezone.utc),
+    } for path in files]
+
+
+def delete_profile(name):
+    """
+    Удаляет профиль.
+
+    Args:
+        name (str): Имя профиля.
+    """
+    profile_path(name).unlink(missing_ok=True)
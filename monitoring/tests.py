@@ -0,0 +1,284 @@
+import json
+import tempfile
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from catalog.models import Category, Product
+from users.models import User
+from .flamegraph import flame_graph
+from .metrics import RequestMetrics, slow_requests
+from .profiler import (
+    SamplingProfiler, get_config, list_profiles, read_profile, save_profile,
+    set_config,
+)
+
+
+class InstrumentationMiddlewareTests(TestCase):
+    """Тесты метрик запросов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Телефоны', slug='phones')
+        for i in range(3):
+            Product.objects.create(
+                product_name=f'Телефон {i}', slug=f'phone-{i}',
+                price=1000 + i, stock=5, category=category)
+
+    def setUp(self):
+        cache.clear()
+
+    def server_timing(self, response):
+        return dict(
+            (part.split(';', 1) + [''])[:2]
+            for part in response['Server-Timing'].split(', '))
+
+    def test_server_timing_header_positive(self):
+        """Тест 1: ответ содержит Server-Timing с метриками БД и шаблонов"""
+        response = self.client.get(reverse('catalog:product_list'))
+
+        timing = self.server_timing(response)
+        self.assertEqual(set(timing), {'total', 'db', 'tpl', 'cache'})
+        self.assertRegex(timing['db'], r'dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertNotEqual(timing['tpl'], 'dur=0.0')
+
+    def test_cache_hits_counted_positive(self):
+        """Тест 2: попадания в кеш карточек видны в метриках"""
+        url = reverse('catalog:product_list')
+        first = self.server_timing(self.client.get(url))
+        second = self.server_timing(self.client.get(url))
+
+        self.assertIn('misses=3', first['cache'])
+        self.assertIn('hits=3', second['cache'])
+
+    def test_json_log_line_positive(self):
+        """Тест 3: метрики пишутся в журнал строкой JSON"""
+        with self.assertLogs('monitoring.requests', 'INFO') as logs:
+            self.client.get(reverse('catalog:product_list'))
+
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry['path'], '/')
+        self.assertEqual(entry['status'], 200)
+        self.assertGreater(entry['queries'], 0)
+        self.assertEqual(entry['cache_misses'], 3)
+        self.assertIsNone(entry['user_id'])
+
+    def test_duplicate_queries_detected_positive(self):
+        """Тест 4: повторы одного SQL считаются признаком N+1"""
+        metrics = RequestMetrics()
+        with connection.execute_wrapper(metrics):
+            for product in Product.objects.order_by('pk'):
+                Category.objects.get(pk=product.category_id)
+
+        data = metrics.as_dict(0.1)
+        self.assertEqual(data['queries'], 4)
+        self.assertEqual(data['duplicate_queries'], 2)
+        self.assertEqual(data['top_duplicate']['count'], 3)
+        self.assertIn('catalog_category', data['top_duplicate']['sql'])
+
+    def test_no_duplicates_negative(self):
+        """Тест 5: разные запросы не считаются повторами"""
+        metrics = RequestMetrics()
+        with connection.execute_wrapper(metrics):
+            list(Product.objects.select_related('category'))
+
+        data = metrics.as_dict(0.1)
+        self.assertEqual(data['duplicate_queries'], 0)
+        self.assertNotIn('top_duplicate', data)
+
+    @override_settings(MONITORING_SLOW_REQUEST_MS=0,
+                       MONITORING_SLOW_REQUESTS=2)
+    def test_slow_requests_ring_buffer_positive(self):
+        """Тест 6: буфер хранит последние медленные запросы"""
+        for path in ('/?page=1', '/?page=2', '/?page=3'):
+            self.client.get(path)
+
+        paths = {entry['path'] for entry in slow_requests()}
+        self.assertEqual(paths, {'/?page=2', '/?page=3'})
+
+    @override_settings(MONITORING_SLOW_REQUEST_MS=60000)
+    def test_fast_request_not_remembered_negative(self):
+        """Тест 7: быстрые запросы в буфер не попадают"""
+        self.client.get(reverse('catalog:product_list'))
+
+        self.assertEqual(slow_requests(), [])
+
+    @override_settings(MONITORING_SLOW_REQUEST_MS=0)
+    def test_admin_page_positive(self):
+        """Тест 8: медленные запросы видны в админ-панели и очищаются"""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@shop.ru', 'pass123')
+        self.client.get('/?q=slow')
+        self.client.force_login(admin)
+
+        response = self.client.get(reverse('monitoring:slow_requests'))
+        self.assertContains(response, '/?q=slow')
+
+        self.client.post(reverse('monitoring:slow_requests'))
+        paths = [entry['path'] for entry in slow_requests()]
+        self.assertEqual(paths, [reverse('monitoring:slow_requests')])
+
+    def test_admin_page_requires_staff_negative(self):
+        """Тест 9: страница недоступна без входа в админ-панель"""
+        response = self.client.get(reverse('monitoring:slow_requests'))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('admin:login'), response.url)
+
+    def test_user_not_loaded_by_middleware_positive(self):
+        """Тест 10: пользователь пишется в журнал, только если загружен"""
+        user = User.objects.create_user('buyer', 'buyer@shop.ru', 'pass123')
+        self.client.force_login(user)
+
+        with self.assertLogs('monitoring.requests', 'INFO') as logs, \
+                CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('catalog:autocomplete'), {'q': 'Тел'})
+            self.client.get(reverse('catalog:product_list'))
+
+        entries = [json.loads(r.getMessage()) for r in logs.records]
+        self.assertIsNone(entries[0]['user_id'])
+        self.assertEqual(entries[1]['user_id'], user.pk)
+        # все запросы учтены в метриках, лишних после ответа нет
+        self.assertEqual(len(queries),
+                         sum(entry['queries'] for entry in entries))
+
+
+def busy_loop(seconds):
+    deadline = time.process_time() + seconds
+    total = 0
+    while time.process_time() < deadline:
+        total += sum(range(100))
+    return total
+
+
+class ProfilerTests(TestCase):
+    """Тесты сэмплирующего профилировщика"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Телефоны', slug='phones')
+        for i in range(20):
+            Product.objects.create(
+                product_name=f'Телефон {i}', slug=f'phone-{i}',
+                price=1000 + i, stock=5, category=category)
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = self.settings(MONITORING_PROFILE_DIR=directory.name,
+                                 MONITORING_PROFILER_INTERVAL=0.0005,
+                                 MONITORING_PROFILER_REFRESH=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_sampling_collects_stacks_positive(self):
+        """Тест 1: стеки пишутся от вызвавшей start() функции"""
+        profiler = SamplingProfiler()
+        profiler.start()
+        busy_loop(0.05)
+        profiler.stop()
+
+        self.assertGreater(sum(profiler.counts.values()), 10)
+        stack = profiler.counts.most_common(1)[0][0]
+        self.assertTrue(stack.startswith('monitoring.tests:busy_loop'))
+        self.assertNotIn('test_sampling_collects_stacks_positive', stack)
+
+    def test_stop_restores_signal_handler_positive(self):
+        """Тест 2: после stop() сэмплы больше не собираются"""
+        profiler = SamplingProfiler()
+        profiler.start()
+        busy_loop(0.01)
+        profiler.stop()
+        samples = sum(profiler.counts.values())
+        busy_loop(0.02)
+
+        self.assertEqual(sum(profiler.counts.values()), samples)
+
+    def test_profiles_are_aggregated_positive(self):
+        """Тест 3: одинаковые стеки разных запросов суммируются"""
+        for _ in range(2):
+            profiler = SamplingProfiler()
+            profiler.counts.update({'a:f;b:g': 2, 'a:f': 1})
+            save_profile('catalog:product_list', profiler)
+
+        self.assertEqual(read_profile('catalog:product_list'),
+                         {'a:f;b:g': 4, 'a:f': 2})
+        self.assertEqual([p['name'] for p in list_profiles()],
+                         ['catalog_product_list'])
+
+    def test_flame_graph_positive(self):
+        """Тест 4: flame graph содержит кадры с экранированными именами"""
+        svg = flame_graph({'a:<module>;b:g': 3, 'a:<module>;c:h': 1})
+
+        self.assertIn('<svg', svg)
+        self.assertEqual(svg.count('<rect'), 4)
+        self.assertIn('a:&lt;module&gt; (4 сэмпл., 100.0%)', svg)
+        self.assertIn('b:g (3 сэмпл., 75.0%)', svg)
+        self.assertEqual(flame_graph({}), '')
+
+    def test_middleware_profiles_matching_requests_positive(self):
+        """Тест 5: запросы подходящего пути попадают в профиль"""
+        set_config(enabled=True, rate=100, path=r'^/$')
+        for _ in range(5):
+            self.client.get(reverse('catalog:product_list'))
+
+        stacks = read_profile('catalog:product_list')
+        self.assertTrue(stacks)
+        self.assertTrue(any('catalog.views:product_list' in stack
+                            for stack in stacks))
+
+    def test_middleware_skips_other_paths_negative(self):
+        """Тест 6: запросы других путей и при выключенном профилировщике
+        не профилируются"""
+        set_config(enabled=True, rate=100, path=r'^/orders/')
+        self.client.get(reverse('catalog:product_list'))
+        set_config(enabled=False, rate=100, path='')
+        self.client.get(reverse('catalog:product_list'))
+
+        self.assertEqual(list_profiles(), [])
+
+    def test_admin_toggle_and_flame_graph_positive(self):
+        """Тест 7: админ включает профилировщик и видит flame graph"""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@shop.ru', 'pass123')
+        self.client.force_login(admin)
+
+        response = self.client.post(reverse('monitoring:profiler'), {
+            'enabled': 'on', 'rate': '100', 'path': '^/$'})
+        self.assertRedirects(response, reverse('monitoring:profiler'))
+        self.assertEqual(get_config(),
+                         {'enabled': True, 'rate': 100.0, 'path': '^/$'})
+
+        profiler = SamplingProfiler()
+        profiler.counts.update({'catalog.views:product_list': 5})
+        save_profile('catalog:product_list', profiler)
+        url = reverse('monitoring:profile', args=['catalog_product_list'])
+        self.assertContains(self.client.get(reverse('monitoring:profiler')),
+                            url)
+        self.assertContains(self.client.get(url), '<svg')
+        download = self.client.get(url, {'download': 1})
+        self.assertEqual(download.content,
+                         b'catalog.views:product_list 5\n')
+
+    def test_admin_invalid_pattern_negative(self):
+        """Тест 8: некорректное регулярное выражение не сохраняется"""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@shop.ru', 'pass123')
+        self.client.force_login(admin)
+
+        response = self.client.post(reverse('monitoring:profiler'), {
+            'enabled': 'on', 'rate': '10', 'path': '(unclosed'})
+
+        self.assertContains(response, 'Некорректное выражение')
+        self.assertFalse(get_config()['enabled'])
+
+    def test_admin_requires_staff_negative(self):
+        """Тест 9: страница профилировщика недоступна без входа"""
+        response = self.client.get(reverse('monitoring:profiler'))
+
+        self.assertEqual(response.status_code, 302)
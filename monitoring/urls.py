@@ -0,0 +1,14 @@
+from django.contrib import admin
+from django.urls import path
+from . import views
+
+app_name = 'monitoring'
+
+urlpatterns = [
+    path('slow-requests/', admin.site.admin_view(views.slow_request_list),
+         name='slow_requests'),
+    path('profiler/', admin.site.admin_view(views.profiler),
+         name='profiler'),
+    path('profiler/<str:name>/', admin.site.admin_view(views.profile_detail),
+         name='profile'),
+]
@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.contrib import admin, messages
+from django.http import Http404, HttpResponse
+from django.shortcuts import redirect, render
+
+from .flamegraph import flame_graph
+from .forms import ProfilerConfigForm
+from .metrics import clear_slow_requests, get_slow_request_ms, slow_requests
+from .profiler import (
+    delete_profile, get_config, list_profiles, profile_path, read_profile,
+    set_config,
+)
+
+
+def slow_request_list(request):
+    """
+    Отображает самые медленные запросы в админ-панели.
+
+    POST-запрос очищает буфер.
+
+    Args:
+        request (HttpRequest): Объект запроса.
+
+    Returns:
+        HttpResponse: Рендер шаблона 'monitoring/slow_requests.html'
+        или редирект после очистки.
+    """
+    if request.method == 'POST':
+        clear_slow_requests()
+        return redirect('monitoring:slow_requests')
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Медленные запросы',
+        'threshold': get_slow_request_ms(),
+        'entries': slow_requests(),
+    }
+    return render(request, 'monitoring/slow_requests.html', context)
+
+
+def profiler(request):
+    """
+    Отображает настройки профилировщика и собранные профили.
+
+    POST-запрос сохраняет настройки включения.
+
+    Args:
+        request (HttpRequest): Объект запроса.
+
+    Returns:
+        HttpResponse: Рендер шаблона 'monitoring/profiler.html'
+        или редирект после сохранения.
+    """
+    if request.method == 'POST':
+        form = ProfilerConfigForm(request.POST)
+        if form.is_valid():
+            set_config(**form.cleaned_data)
+            messages.success(request, 'Настройки профилировщика сохранены')
+            return redirect('monitoring:profiler')
+    else:
+        form = ProfilerConfigForm(initial=get_config())
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Профилировщик',
+        'available': getattr(settings, 'MONITORING_PROFILER', False),
+        'form': form,
+        'profiles': list_profiles(),
+    }
+    return render(request, 'monitoring/profiler.html', context)
+
+
+def profile_detail(request, name):
+    """
+    Отображает flame graph профиля представления.
+
+    Параметр 'download' отдаёт профиль файлом в формате collapsed
+    (для flamegraph.pl, speedscope и т.п.), POST-запрос удаляет профиль.
+
+    Args:
+        request (HttpRequest): Объект запроса.
+        name (str): Имя профиля.
+
+    Returns:
+        HttpResponse: Рендер шаблона 'monitoring/profile.html',
+        файл профиля или редирект после удаления.
+
+    Raises:
+        Http404: Если профиля нет.
+    """
+    if not profile_path(name).exists():
+        raise Http404('Профиль не найден')
+    if request.method == 'POST':
+        delete_profile(name)
+        return redirect('monitoring:profiler')
+    if 'download' in request.GET:
+        response = HttpResponse(profile_path(name).read_bytes(),
+                                content_type='text/plain; charset=utf-8')
+        response['Content-Disposition'] = (
+            f'attachment; filename="{profile_path(name).name}"')
+        return response
+    counts = read_profile(name)
+    context = {
+        **admin.site.each_context(request),
+        'title': f'Профиль {name}',
+        'name': name,
+        'samples': sum(counts.values()),
+        'flame_graph': flame_graph(counts),
+    }
+    return render(request, 'monitoring/profile.html', context)
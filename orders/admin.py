@@ -1,4 +1,9 @@
 from django.contrib import admin
+from django.db.models import F
+
+from catalog.admin_utils import (
+    BoundedRelatedFieldListFilter, EstimatedCountMixin, ExportMixin,
+)
 from .models import Order, OrderItem
 
 
@@ -10,14 +15,29 @@ class OrderItemInline(admin.TabularInline):
         model (Model): Модель OrderItem.
         extra (int): Количество дополнительных пустых форм.
         readonly_fields (list): Поля только для чтения.
+
+    Методы:
+        get_queryset(): Подгружает товары позиций вместе с брендами.
     """
     model = OrderItem
     extra = 0
     readonly_fields = ['product', 'price', 'quantity']
 
+    def get_queryset(self, request):
+        """
+        Возвращает позиции заказа вместе с товарами и брендами.
+
+        Args:
+            request (HttpRequest): Объект запроса.
+
+        Returns:
+            QuerySet: Позиции с select_related по товару и бренду.
+        """
+        return super().get_queryset(request).select_related('product__brand')
+
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(EstimatedCountMixin, ExportMixin, admin.ModelAdmin):
     """
     Админ-класс для модели Order.
 
@@ -26,13 +46,19 @@ class OrderAdmin(admin.ModelAdmin):
         list_filter (list): Поля для фильтрации.
         search_fields (list): Поля для поиска.
         readonly_fields (list): Поля только для чтения.
+        raw_id_fields (list): Связи, выбираемые по ID, а не списком.
         inlines (list): Встроенные формы.
         fieldsets (tuple): Группировка полей в форме редактирования.
+        export_name (str): Выгрузка позиций заказов с полями заказа.
     """
+    export_name = 'orders'
     list_display = ['number', 'user', 'total', 'status', 'created', 'is_paid']
-    list_filter = ['status', 'is_paid', 'payment', 'created']
+    list_filter = ['status', 'is_paid', 'payment', 'created',
+                   ('user', BoundedRelatedFieldListFilter)]
+    list_select_related = ['user']
     search_fields = ['number', 'user__username', 'email', 'phone']
     readonly_fields = ['number', 'created', 'total']
+    raw_id_fields = ['user']
     inlines = [OrderItemInline]
     fieldsets = (
         ('Основное', {
@@ -48,13 +74,48 @@ class OrderAdmin(admin.ModelAdmin):
 
 
 @admin.register(OrderItem)
-class OrderItemAdmin(admin.ModelAdmin):
+class OrderItemAdmin(EstimatedCountMixin, admin.ModelAdmin):
     """
     Админ-класс для модели OrderItem.
 
     Атрибуты:
         list_display (list): Поля для отображения в списке.
         list_filter (list): Поля для фильтрации.
+        raw_id_fields (list): Связи, выбираемые по ID, а не списком.
+
+    Методы:
+        get_queryset(): Добавляет к позициям стоимость.
+        sum(): Возвращает стоимость позиции.
     """
     list_display = ['order', 'product', 'price', 'quantity', 'sum']
     list_filter = ['order__status']
+    list_select_related = ['order', 'product__brand']
+    raw_id_fields = ['order', 'product']
+
+    def get_queryset(self, request):
+        """
+        Возвращает позиции со стоимостью, посчитанной в БД.
+
+        Args:
+            request (HttpRequest): Объект запроса.
+
+        Returns:
+            QuerySet: Позиции с аннотацией line_sum.
+        """
+        return super().get_queryset(request).annotate(
+            line_sum=F('price') * F('quantity'))
+
+    def sum(self, obj):
+        """
+        Возвращает стоимость позиции.
+
+        Args:
+            obj (OrderItem): Экземпляр позиции заказа.
+
+        Returns:
+            Decimal: Цена, умноженная на количество.
+        """
+        return obj.line_sum
+
+    sum.short_description = 'Сумма'
+    sum.admin_order_field = 'line_sum'
@@ -0,0 +1,44 @@
+# Generated by Django 6.0 on 2026-10-18 13:40
+
+from datetime import datetime
+
+from django.db import migrations, models
+
+
+def fill_order_numbers(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    OrderNumber = apps.get_model('orders', 'OrderNumber')
+    last = {}
+    for number in Order.objects.filter(
+            number__startswith='ORDER-').values_list('number', flat=True):
+        try:
+            _, day, value = number.split('-')
+            day = datetime.strptime(day, '%y%m%d').date()
+            value = int(value)
+        except ValueError:
+            continue
+        last[day] = max(last.get(day, 0), value)
+    OrderNumber.objects.bulk_create(
+        OrderNumber(day=day, value=value) for day, value in last.items())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderNumber',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+                ('value', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'счётчик номеров заказов',
+                'verbose_name_plural': 'счётчики номеров заказов',
+            },
+        ),
+        migrations.RunPython(fill_order_numbers, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,79 @@
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.db.models import F
 from django.conf import settings
 from django.utils import timezone
 
 
+class OrderNumber(models.Model):
+    """
+    Счётчик номеров заказов за день.
+
+    Каждому дню соответствует одна строка, номер заказа выделяется
+    атомарным увеличением её значения, без подсчёта заказов
+    и без повторных попыток при конфликте.
+
+    Атрибуты:
+        day (DateField): День, для которого ведётся счёт.
+        value (PositiveIntegerField): Последний выделенный номер.
+
+    Методы:
+        allocate(): Выделяет следующий номер за день.
+    """
+    day = models.DateField(primary_key=True)
+    value = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'счётчик номеров заказов'
+        verbose_name_plural = 'счётчики номеров заказов'
+
+    @classmethod
+    def allocate(cls, day):
+        """
+        Выделяет следующий номер заказа за указанный день.
+
+        На PostgreSQL и SQLite 3.35+ выполняется одним запросом
+        INSERT ... ON CONFLICT DO UPDATE ... RETURNING: строка счётчика
+        создаётся или увеличивается атомарно, параллельные заказы
+        получают разные номера. На остальных БД счётчик увеличивается
+        через UPDATE с F() в отдельной транзакции.
+
+        Строка счётчика остаётся заблокированной до конца транзакции,
+        поэтому номер нужно выделять до долгих транзакций (см.
+        Order.next_number()), иначе все заказы дня выстраиваются
+        в очередь за одной блокировкой. Номера отменённых заказов
+        пропускаются.
+
+        Args:
+            day (date): День заказа.
+
+        Returns:
+            int: Выделенный номер (начиная с 1).
+        """
+        using = router.db_for_write(cls)
+        connection = connections[using]
+        features = connection.features
+        if (features.can_return_columns_from_insert
+                and features.supports_update_conflicts):
+            table = connection.ops.quote_name(cls._meta.db_table)
+            day_column = connection.ops.quote_name('day')
+            value_column = connection.ops.quote_name('value')
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {table} ({day_column}, {value_column}) '
+                    f'VALUES (%s, 1) ON CONFLICT ({day_column}) '
+                    f'DO UPDATE SET {value_column} = '
+                    f'{table}.{value_column} + 1 '
+                    f'RETURNING {value_column}',
+                    [day])
+                return cursor.fetchone()[0]
+
+        with transaction.atomic(using=using):
+            counters = cls.objects.using(using)
+            counters.get_or_create(day=day)
+            counters.filter(day=day).update(value=F('value') + 1)
+            return counters.get(day=day).value
+
+
 class Order(models.Model):
     """
     Модель заказа.
@@ -79,6 +150,11 @@ class Order(models.Model):
         ordering = ['-created']
         verbose_name = 'заказ'
         verbose_name_plural = 'заказы'
+        indexes = [
+            # список заказов пользователя
+            models.Index(fields=['user', '-created'],
+                         name='orders_order_user_created'),
+        ]
 
     def __str__(self):
         """
@@ -89,21 +165,36 @@ class Order(models.Model):
         """
         return f'Заказ #{self.number}'
 
+    @classmethod
+    def next_number(cls):
+        """
+        Выделяет номер нового заказа.
+
+        Номер генерируется в формате: ORDER-YYMMDD-XXXX, порядковый
+        номер за день выделяет OrderNumber.allocate(). Вне транзакции
+        upsert счётчика фиксируется сам по себе (autocommit), поэтому
+        блокировка снимается сразу после выделения без лишних
+        запросов на точку сохранения.
+
+        Returns:
+            str: Номер заказа.
+        """
+        today = timezone.now().date()
+        return f'ORDER-{today:%y%m%d}-{OrderNumber.allocate(today):04d}'
+
     def save(self, *args, **kwargs):
         """
         Сохраняет заказ, генерируя уникальный номер при создании.
 
-        Номер генерируется в формате: ORDER-YYMMDD-XXXX
+        Если номер не выделен заранее (Order.next_number()),
+        он выделяется здесь, в транзакции вызывающего кода.
 
         Args:
             *args: Аргументы для родительского метода save.
             **kwargs: Ключевые аргументы для родительского метода save.
         """
         if not self.number:
-            date_str = timezone.now().strftime('%y%m%d')
-            last = Order.objects.filter(
-                number__startswith=f'ORDER-{date_str}').count()
-            self.number = f'ORDER-{date_str}-{last + 1:04d}'
+            self.number = self.next_number()
         super().save(*args, **kwargs)
 
 
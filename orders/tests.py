@@ -1,8 +1,18 @@
-from django.test import TestCase
-from django.db import IntegrityError
+from datetime import date
+from unittest.mock import patch
 
-from .models import Order, OrderItem
-from catalog.models import Product, Category, Brand
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import IntegrityError, connection
+from django.urls import reverse
+
+from .models import Order, OrderItem, OrderNumber
+from cart.models import Cart, CartItem
+from catalog.models import (
+    Brand, Category, InsufficientStock, Product, ProductQuerySet,
+)
 from users.models import User
 
 
@@ -68,6 +78,29 @@ class OrderModelTest(TestCase):
 
         self.assertIn('Заказ #', str(order))
 
+    def test_order_numbers_sequential_positive(self):
+        """Позитивный тест: номера за день выдаются подряд без повторов"""
+        numbers = [
+            Order.objects.create(
+                user=self.user, total=100, full_name='Покупатель',
+                email='buyer@mail.ru', phone='89160000000',
+                address='Москва').number
+            for _ in range(3)
+        ]
+
+        self.assertEqual(len(set(numbers)), 3)
+        self.assertEqual([n[-4:] for n in numbers], ['0001', '0002', '0003'])
+
+    def test_order_number_allocate_per_day_positive(self):
+        """Позитивный тест: счётчик ведётся отдельно для каждого дня"""
+        first = date(2026, 1, 1)
+        second = date(2026, 1, 2)
+
+        self.assertEqual(OrderNumber.allocate(first), 1)
+        self.assertEqual(OrderNumber.allocate(first), 2)
+        self.assertEqual(OrderNumber.allocate(second), 1)
+        self.assertEqual(OrderNumber.objects.get(day=first).value, 2)
+
     def test_order_with_items_positive(self):
         """Позитивный тест: создание заказа с товарами"""
         order = Order.objects.create(
@@ -323,3 +356,245 @@ class OrderItemModelTest(TestCase):
         self.assertFalse(Order.objects.filter(id=order_id).exists())
 
         self.assertFalse(OrderItem.objects.filter(id=order_item_id).exists())
+
+
+class CreateOrderStockTest(TestCase):
+    """Тесты списания остатков при оформлении заказа"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='buyer',
+            email='buyer@shop.ru',
+            password='pass123'
+        )
+        self.client.force_login(self.user)
+
+        category = Category.objects.create(name='Телефоны', slug='phones')
+        brand = Brand.objects.create(name='Apple', slug='apple')
+        self.phone = Product.objects.create(
+            product_name='iPhone 15', slug='iphone-15', price=90000,
+            stock=5, category=category, brand=brand)
+        self.case = Product.objects.create(
+            product_name='Чехол', slug='case', price=1000,
+            stock=1, category=category, brand=brand)
+
+        self.cart = Cart.objects.create(user=self.user)
+        self.form_data = {
+            'full_name': 'Иван Иванов',
+            'email': 'ivan@mail.ru',
+            'phone': '89991234567',
+            'address': 'Москва',
+            'payment': 'cash',
+        }
+
+    def test_stock_decremented_positive(self):
+        """Позитивный тест: остатки уменьшаются на количество в заказе"""
+        CartItem.objects.create(cart=self.cart, product=self.phone,
+                                quantity=2)
+        CartItem.objects.create(cart=self.cart, product=self.case,
+                                quantity=1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('orders:create'),
+                                        self.form_data)
+
+        self.assertEqual(response.status_code, 302)
+        self.phone.refresh_from_db()
+        self.case.refresh_from_db()
+        self.assertEqual(self.phone.stock, 3)
+        self.assertEqual(self.case.stock, 0)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertFalse(self.cart.items.exists())
+
+    def test_stock_update_keeps_other_fields_positive(self):
+        """Позитивный тест: списание не перезаписывает цену товара"""
+        CartItem.objects.create(cart=self.cart, product=self.phone,
+                                quantity=1)
+        stale = Product.objects.get(pk=self.phone.pk)
+        Product.objects.filter(pk=self.phone.pk).update(price=80000)
+
+        Product.objects.reserve_stock({stale.pk: 1})
+
+        self.phone.refresh_from_db()
+        self.assertEqual(self.phone.price, 80000)
+        self.assertEqual(self.phone.stock, 4)
+
+    def test_reserve_stock_insufficient_negative(self):
+        """Негативный тест: резервирование сверх остатка отклоняется"""
+        with self.assertRaises(InsufficientStock) as error:
+            Product.objects.reserve_stock({self.phone.pk: 1,
+                                           self.case.pk: 2})
+
+        self.assertEqual(error.exception.product_ids, [self.case.pk])
+
+    def test_reserve_stock_exact_amount_positive(self):
+        """Позитивный тест: можно выкупить весь остаток товара"""
+        Product.objects.reserve_stock({self.phone.pk: 5, self.case.pk: 1})
+
+        self.assertEqual(
+            list(Product.objects.order_by('pk').values_list(
+                'stock', flat=True)),
+            [0, 0])
+
+    def test_prices_from_locked_rows_positive(self):
+        """Позитивный тест: цены позиций и сумма берутся при списании"""
+        CartItem.objects.create(cart=self.cart, product=self.phone,
+                                quantity=2)
+        CartItem.objects.create(cart=self.cart, product=self.case,
+                                quantity=1)
+        reserve_stock = ProductQuerySet.reserve_stock
+
+        def reserve_after_price_change(queryset, quantities):
+            # цену меняют после загрузки корзины, но до блокировки строк
+            Product.objects.filter(pk=self.phone.pk).update(price=95000)
+            return reserve_stock(queryset, quantities)
+
+        with patch.object(ProductQuerySet, 'reserve_stock',
+                          reserve_after_price_change):
+            self.client.post(reverse('orders:create'), self.form_data)
+
+        order = Order.objects.get()
+        self.assertEqual(
+            sorted(order.items.values_list('price', flat=True)),
+            [1000, 95000])
+        self.assertEqual(order.total, 191000)
+
+    def test_oversell_rolls_back_negative(self):
+        """Негативный тест: при нехватке товара заказ не создаётся"""
+        CartItem.objects.create(cart=self.cart, product=self.phone,
+                                quantity=2)
+        CartItem.objects.create(cart=self.cart, product=self.case,
+                                quantity=1)
+        # Товар раскупили после открытия страницы оформления.
+        self.client.get(reverse('orders:create'))
+        Product.objects.filter(pk=self.case.pk).update(stock=0)
+
+        response = self.client.post(reverse('orders:create'),
+                                    self.form_data)
+
+        self.assertRedirects(response, reverse('cart:view'),
+                             fetch_redirect_response=False)
+        self.phone.refresh_from_db()
+        self.assertEqual(self.phone.stock, 5)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(self.cart.items.count(), 2)
+        errors = [str(m) for m in get_messages(response.wsgi_request)]
+        self.assertEqual(errors,
+                         ['Недостаточно товара: Чехол (в наличии 0 шт.)'])
+
+    def test_number_allocated_before_checkout_positive(self):
+        """Позитивный тест: номер выделяется вне транзакции заказа"""
+        CartItem.objects.create(cart=self.cart, product=self.case,
+                                quantity=1)
+
+        def sold_out(queryset, quantities):
+            raise InsufficientStock(sorted(quantities))
+
+        with patch.object(ProductQuerySet, 'reserve_stock', sold_out):
+            self.client.post(reverse('orders:create'), self.form_data)
+        self.client.post(reverse('orders:create'), self.form_data)
+
+        # откат заказа не возвращает номер: счётчик уже зафиксирован
+        self.assertTrue(Order.objects.get().number.endswith('-0002'))
+
+    def checkout_queries(self, lines):
+        """Оформляет заказ из lines позиций и возвращает число запросов"""
+        products = Product.objects.bulk_create(
+            Product(product_name=f'Товар {i}', slug=f'bulk-{lines}-{i}',
+                    price=100, stock=10, category=self.phone.category,
+                    brand=self.phone.brand)
+            for i in range(lines))
+        CartItem.objects.bulk_create(
+            CartItem(cart=self.cart, product=product, quantity=2)
+            for product in products)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('orders:create'), self.form_data)
+        return len(queries)
+
+    def test_checkout_queries_constant_positive(self):
+        """Позитивный тест: число запросов не зависит от размера корзины"""
+        small = self.checkout_queries(1)
+        large = self.checkout_queries(30)
+
+        self.assertEqual(small, large)
+        order = Order.objects.latest('id')
+        self.assertEqual(order.items.count(), 30)
+        self.assertEqual(order.total, 6000)
+        self.assertEqual(
+            set(Product.objects.filter(slug__startswith='bulk-30-')
+                .values_list('stock', flat=True)),
+            {8})
+
+
+class OrderAdminTest(TestCase):
+    """Тесты списков заказов в админ-панели"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            'admin', 'admin@shop.ru', 'pass123')
+        self.client.force_login(self.admin)
+        category = Category.objects.create(name='Телефоны', slug='phones')
+        brand = Brand.objects.create(name='Apple', slug='apple')
+        self.products = [
+            Product.objects.create(
+                product_name=f'Телефон {i}', slug=f'phone-{i}',
+                price=100, stock=10, category=category, brand=brand)
+            for i in range(3)
+        ]
+
+    def add_orders(self, count):
+        start = Order.objects.count()
+        for i in range(start, start + count):
+            user = User.objects.create(username=f'user{i}')
+            order = Order.objects.create(
+                user=user, full_name='Иван', email='ivan@mail.ru',
+                phone='89991234567', address='Москва', total=300)
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=product, price=100,
+                          quantity=i + 1)
+                for product in self.products
+            ])
+        return order
+
+    def page_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_constant_positive(self):
+        """Позитивный тест: заказы и позиции выводятся без N+1"""
+        urls = [reverse('admin:orders_order_changelist'),
+                reverse('admin:orders_orderitem_changelist')]
+        self.add_orders(2)
+        small = [self.page_queries(url) for url in urls]
+        self.add_orders(10)
+        large = [self.page_queries(url) for url in urls]
+
+        self.assertEqual(small, large)
+
+    def test_order_inline_queries_positive(self):
+        """Позитивный тест: товары позиций в форме заказа грузятся JOIN"""
+        order = self.add_orders(1)
+        url = reverse('admin:orders_order_change', args=[order.pk])
+        self.page_queries(url)
+        before = self.page_queries(url)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, price=100, quantity=1)
+            for product in self.products
+        ])
+
+        self.assertEqual(self.page_queries(url), before)
+
+    def test_item_sum_sortable_positive(self):
+        """Позитивный тест: сортировка позиций по сумме"""
+        self.add_orders(2)
+        response = self.client.get(
+            reverse('admin:orders_orderitem_changelist'), {'o': '-5'})
+
+        sums = [item.line_sum for item in response.context['cl'].result_list]
+        self.assertEqual(sums, sorted(sums, reverse=True))
+        self.assertEqual(sums[0], 200)
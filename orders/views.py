@@ -3,10 +3,29 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db import transaction
 from cart.models import Cart, CartItem
+from catalog.cache import invalidate_products
+from catalog.models import InsufficientStock, Product
 from .models import Order, OrderItem
 from .forms import OrderForm
 
 
+def stock_error_messages(request, product_ids):
+    """
+    Добавляет сообщение об ошибке для каждого товара, которого не хватило.
+
+    Args:
+        request (HttpRequest): Объект запроса.
+        product_ids (list): ID товаров с недостаточным остатком.
+    """
+    products = Product.objects.filter(pk__in=product_ids).only(
+        'product_name', 'stock').order_by('pk')
+    for product in products:
+        messages.error(
+            request,
+            f'Недостаточно товара: {product.product_name} '
+            f'(в наличии {product.stock} шт.)')
+
+
 @login_required
 def create_order(request):
     """
@@ -22,6 +41,16 @@ def create_order(request):
         - Уменьшает остатки на складе.
         - Очищает корзину.
 
+    Остатки списываются условным UPDATE (см. ProductQuerySet.reserve_stock)
+    внутри транзакции, поэтому параллельные заказы не продают больше,
+    чем есть на складе. Проверка перед отображением формы носит
+    информационный характер.
+
+    Число запросов в транзакции не зависит от размера корзины:
+    товары загружаются вместе с позициями, цены позиций и сумма
+    заказа берутся из строк, заблокированных при списании остатков,
+    позиции заказа создаются одним bulk_create().
+
     Args:
         request (HttpRequest): Объект запроса.
 
@@ -29,46 +58,62 @@ def create_order(request):
         HttpResponse: Страница создания заказа или редирект.
     """
     cart = get_object_or_404(Cart, user=request.user)
-    items = cart.items.all()
+    items = list(cart.items.select_related('product', 'product__brand'))
 
-    if not items.exists():
+    if not items:
         messages.warning(request, 'Корзина пуста')
-        return redirect('cart:detail')
+        return redirect('cart:view')
 
-    for item in items:
-        if item.quantity > item.product.stock:
-            messages.error(
-                request, f'Недостаточно товара: {
-                    item.product.product_name}')
-            return redirect('cart:detail')
+    shortage = [item.product_id for item in items
+                if item.quantity > item.product.stock]
+    if shortage:
+        stock_error_messages(request, shortage)
+        return redirect('cart:view')
 
     if request.method == 'POST':
         form = OrderForm(request.POST)
         if form.is_valid():
             try:
+                # номер выделяется до транзакции заказа, чтобы счётчик дня
+                # не был заблокирован на всё время оформления
+                number = Order.next_number()
                 with transaction.atomic():
+                    quantities = {}
+                    for item in items:
+                        quantities[item.product_id] = (
+                            quantities.get(item.product_id, 0)
+                            + item.quantity)
+                    # цены берутся из строк, заблокированных при списании
+                    prices = Product.objects.reserve_stock(quantities)
+
                     order = form.save(commit=False)
+                    order.number = number
                     order.user = request.user
                     order.cart = cart
-                    order.total = cart.total()
+                    order.total = sum(
+                        prices[item.product_id] * item.quantity
+                        for item in items)
                     order.save()
 
-                    for item in items:
-                        OrderItem.objects.create(
+                    OrderItem.objects.bulk_create([
+                        OrderItem(
                             order=order,
                             product=item.product,
-                            price=item.product.price,
+                            price=prices[item.product_id],
                             quantity=item.quantity
                         )
+                        for item in items
+                    ])
 
-                        item.product.stock -= item.quantity
-                        item.product.save()
-
-                    items.delete()
+                    cart.items.all().delete()
+                    invalidate_products(quantities)
 
                     messages.success(request, f'Заказ #{order.number} создан!')
                     return redirect('orders:detail', order_id=order.id)
 
+            except InsufficientStock as e:
+                stock_error_messages(request, e.product_ids)
+                return redirect('cart:view')
             except Exception as e:
                 messages.error(request, f'Ошибка: {str(e)}')
     else:
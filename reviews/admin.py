@@ -1,16 +1,27 @@
 from django.contrib import admin
+
+from catalog.admin_utils import (
+    BoundedRelatedFieldListFilter, CachedAllValuesFieldListFilter,
+    EstimatedCountMixin, ExportMixin,
+)
 from .models import Review
 
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(EstimatedCountMixin, ExportMixin, admin.ModelAdmin):
+    export_name = 'reviews'
     list_display = [
         'id',
         'product',
         'user',
         'rating',
         'created_at']  # таблица с столбцами
-    list_filter = ['rating', 'created_at', 'product']
+    # фильтр по товару выводит не весь каталог, а самые обсуждаемые
+    list_filter = [('rating', CachedAllValuesFieldListFilter), 'created_at',
+                   ('product', BoundedRelatedFieldListFilter)]
+    list_select_related = ['product__brand', 'user']
+    search_fields = ['product__product_name', 'user__username']
+    raw_id_fields = ['product', 'user']
     readonly_fields = ['created_at']  # только читать
     list_per_page = 20
 
@@ -8,6 +8,15 @@ class ReviewsConfig(AppConfig):
     Атрибуты:
         default_auto_field (str): Тип поля для автоматического создания первичного ключа.
         name (str): Имя приложения.
+
+    Методы:
+        ready(): Подключает сигналы пересчёта рейтинга товаров.
     """
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
+
+    def ready(self):
+        """
+        Подключает обработчики сигналов приложения.
+        """
+        from . import signals  # noqa: F401
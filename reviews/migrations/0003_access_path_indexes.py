@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_access_path_indexes'),
+        ('reviews', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['product', 'user'],
+                               name='reviews_review_product_user'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['product', '-created_at'],
+                               name='reviews_review_product_created'),
+        ),
+    ]
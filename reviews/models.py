@@ -51,6 +51,14 @@ class Review(models.Model):
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
         ordering = ['-created_at']  # сортировка по убыванию даты
+        indexes = [
+            # проверка, оставлял ли пользователь отзыв на товар
+            models.Index(fields=['product', 'user'],
+                         name='reviews_review_product_user'),
+            # отзывы товара в порядке добавления
+            models.Index(fields=['product', '-created_at'],
+                         name='reviews_review_product_created'),
+        ]
 
     def __str__(self):
         """
@@ -0,0 +1,96 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from catalog.cache import invalidate_products
+from catalog.models import Product
+from .models import Review
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_product(sender, instance, **kwargs):
+    """
+    Запоминает товар и оценку отзыва до сохранения.
+
+    Нужно, чтобы изменить агрегаты рейтинга на разницу между старой
+    и новой оценкой, в том числе когда в админке отзыв переносят
+    на другой товар.
+
+    Args:
+        sender (type): Модель Review.
+        instance (Review): Сохраняемый отзыв.
+        **kwargs: Дополнительные аргументы сигнала.
+    """
+    instance._previous = None
+    if instance.pk:
+        instance._previous = Review.objects.filter(
+            pk=instance.pk).values_list('product_id', 'rating').first()
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    """
+    Изменяет агрегаты рейтинга товара после сохранения отзыва
+    и сбрасывает кеш его карточки.
+
+    Args:
+        sender (type): Модель Review.
+        instance (Review): Сохранённый отзыв.
+        created (bool): True, если отзыв создан.
+        **kwargs: Дополнительные аргументы сигнала.
+    """
+    previous = None if created else getattr(instance, '_previous', None)
+    if previous is None:
+        Product.shift_rating_stats(instance.product_id, 1, instance.rating)
+        invalidate_products([instance.product_id])
+        return
+    product_id, rating = previous
+    if product_id == instance.product_id:
+        if rating != instance.rating:
+            Product.shift_rating_stats(product_id, 0,
+                                       instance.rating - rating)
+        invalidate_products([product_id])
+        return
+    Product.shift_rating_stats(product_id, -1, -rating)
+    Product.shift_rating_stats(instance.product_id, 1, instance.rating)
+    invalidate_products([product_id, instance.product_id])
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, origin=None, **kwargs):
+    """
+    Изменяет агрегаты рейтинга товара после удаления отзыва
+    и сбрасывает кеш его карточки.
+
+    При каскадном удалении (удалили товар или пользователя)
+    товары собираются и пересчитываются один раз после фиксации
+    транзакции, а не двумя запросами на каждый отзыв.
+
+    Args:
+        sender (type): Модель Review.
+        instance (Review): Удалённый отзыв.
+        origin (Model | QuerySet | None): Что удаляли изначально.
+        **kwargs: Дополнительные аргументы сигнала.
+    """
+    if origin is None or isinstance(origin, Review) or (
+            isinstance(origin, QuerySet) and origin.model is Review):
+        Product.shift_rating_stats(instance.product_id, -1,
+                                   -instance.rating)
+        invalidate_products([instance.product_id])
+        return
+    product_ids = getattr(origin, '_rating_product_ids', None)
+    if product_ids is None:
+        product_ids = origin._rating_product_ids = set()
+        transaction.on_commit(lambda: rebuild_ratings(product_ids))
+    product_ids.add(instance.product_id)
+
+
+def rebuild_ratings(product_ids):
+    """
+    Пересчитывает агрегаты рейтинга товаров после каскадного удаления.
+
+    Args:
+        product_ids (set): ID товаров, у которых удалялись отзывы.
+    """
+    Product.update_rating_stats(product_ids)
+    invalidate_products(product_ids)
@@ -1,8 +1,13 @@
 # tests/test_reviews.py
 import pytest
+from io import StringIO
 from django.contrib.auth import get_user_model
 from django.contrib.messages import get_messages
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from catalog.models import Product, Category  # Добавляем импорт Category
 from reviews.models import Review
@@ -339,3 +344,179 @@ def test_full_review_workflow(client):
 
     # Проверяем, что отзыв удален
     assert not Review.objects.filter(id=review.id).exists()
+
+
+@pytest.mark.django_db
+class TestProductRatingStats:
+    """Тесты денормализованных агрегатов рейтинга товара"""
+
+    def setup_method(self):
+        self.user = User.objects.create_user(
+            username='rater1', password='testpass123')
+        self.other_user = User.objects.create_user(
+            username='rater2', password='testpass123')
+        self.category = Category.objects.create(
+            name='Test Category', slug='test-category')
+        self.product = Product.objects.create(
+            product_name='Test Product',
+            slug='test-product',
+            price=1000.00,
+            category=self.category
+        )
+
+    def test_stats_updated_on_create_and_delete(self):
+        review = Review.objects.create(
+            product=self.product, user=self.user, rating=5)
+        Review.objects.create(
+            product=self.product, user=self.other_user, rating=2)
+
+        self.product.refresh_from_db()
+        assert self.product.reviews_count == 2
+        assert self.product.rating_sum == 7
+        assert self.product.average_rating == 3.5
+
+        review.delete()
+        self.product.refresh_from_db()
+        assert self.product.reviews_count == 1
+        assert self.product.average_rating == 2.0
+
+    def test_stats_follow_review_moved_to_other_product(self):
+        other = Product.objects.create(
+            product_name='Other', slug='other',
+            price=10, category=self.category)
+        review = Review.objects.create(
+            product=self.product, user=self.user, rating=4)
+
+        review.product = other
+        review.save()
+
+        self.product.refresh_from_db()
+        other.refresh_from_db()
+        assert self.product.reviews_count == 0
+        assert self.product.average_rating == 0.0
+        assert other.reviews_count == 1
+        assert other.average_rating == 4.0
+
+    def test_stats_are_incremental(self):
+        # агрегаты меняются на приращение, а не пересчитываются:
+        # отзыв, добавленный параллельно (без сигнала), не теряется
+        review = Review.objects.create(
+            product=self.product, user=self.user, rating=2)
+        Product.objects.filter(pk=self.product.pk).update(
+            rating_count=2, rating_sum=7)
+
+        review.rating = 4
+        review.save()
+
+        self.product.refresh_from_db()
+        assert self.product.reviews_count == 2
+        assert self.product.rating_sum == 9
+        assert self.product.average_rating == 4.5
+
+    def test_cascade_delete_recomputes_once(
+            self, django_capture_on_commit_callbacks):
+        products = [
+            Product.objects.create(
+                product_name=f'Товар {i}', slug=f'product-{i}',
+                price=10, category=self.category)
+            for i in range(5)]
+        for product in products:
+            Review.objects.create(product=product, user=self.user, rating=5)
+            Review.objects.create(product=product, user=self.other_user,
+                                  rating=3)
+
+        with CaptureQueriesContext(connection) as queries, \
+                django_capture_on_commit_callbacks(execute=True):
+            self.user.delete()
+
+        updates = [q for q in queries.captured_queries
+                   if q['sql'].startswith('UPDATE "catalog_product"')]
+        assert len(updates) == 1
+        assert set(Product.objects.filter(pk__in=[p.pk for p in products])
+                   .values_list('rating_count', 'rating_sum')) == {(1, 3)}
+
+    def test_rating_properties_do_not_query(self, django_assert_num_queries):
+        Review.objects.create(product=self.product, user=self.user, rating=4)
+        product = Product.objects.get(pk=self.product.pk)
+
+        with django_assert_num_queries(0):
+            assert product.average_rating == 4.0
+            assert product.reviews_count == 1
+
+    def test_rebuild_ratings_command(self):
+        Review.objects.create(product=self.product, user=self.user, rating=3)
+        Product.objects.update(rating=0.0, rating_count=0, rating_sum=0)
+
+        call_command('rebuild_ratings', batch_size=1, stdout=StringIO())
+
+        self.product.refresh_from_db()
+        assert self.product.reviews_count == 1
+        assert self.product.rating_sum == 3
+        assert self.product.average_rating == 3.0
+
+    def test_rebuild_ratings_invalidates_cards(
+            self, django_capture_on_commit_callbacks):
+        from catalog.cache import render_product_cards
+        cache.clear()
+        Review.objects.create(product=self.product, user=self.user, rating=3)
+        Product.objects.update(rating=0.0, rating_count=0, rating_sum=0)
+        render_product_cards(Product.objects.for_listing())
+
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command('rebuild_ratings', stdout=StringIO())
+
+        card = render_product_cards(Product.objects.for_listing())[0]
+        assert '3,0 ⭐ (1 отзывов)' in card
+
+    def test_review_invalidates_product_card(self, django_capture_on_commit_callbacks):
+        from django.core.cache import cache
+        from catalog.cache import render_product_cards
+        cache.clear()
+        render_product_cards(Product.objects.for_listing())
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Review.objects.create(product=self.product, user=self.user,
+                                  rating=4)
+
+        card = render_product_cards(Product.objects.for_listing())[0]
+        assert '4,0 ⭐ (1 отзывов)' in card
+
+
+@pytest.mark.django_db
+class TestReviewAdmin:
+    """Тесты списка отзывов в админ-панели"""
+
+    def add_reviews(self, count):
+        category, _ = Category.objects.get_or_create(
+            name='Test Category', slug='test-category')
+        start = Review.objects.count()
+        for i in range(start, start + count):
+            user = User.objects.create(username=f'user{i}')
+            product = Product.objects.create(
+                product_name=f'Товар {i}', slug=f'product-{i}',
+                price=100, category=category)
+            Review.objects.create(product=product, user=user, rating=5)
+
+    def changelist_queries(self, client):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('admin:reviews_review_changelist'))
+        assert response.status_code == 200
+        return len(queries)
+
+    def test_changelist_queries_constant(self, admin_client):
+        """Число запросов не растёт с числом отзывов"""
+        self.add_reviews(2)
+        small = self.changelist_queries(admin_client)
+        self.add_reviews(10)
+
+        assert self.changelist_queries(admin_client) == small
+
+    def test_search_by_product(self, admin_client):
+        """Поиск отзывов по названию товара вместо фильтра по товару"""
+        self.add_reviews(3)
+        response = admin_client.get(
+            reverse('admin:reviews_review_changelist'), {'q': 'Товар 1'})
+
+        assert [r.product.product_name
+                for r in response.context['cl'].result_list] == ['Товар 1']
@@ -1,6 +1,7 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db import transaction
 from catalog.models import Product
 from .models import Review
 from .forms import ReviewForm
@@ -39,7 +40,9 @@ def add_review(request, product_id):
             review = form.save(commit=False)
             review.product = product
             review.user = request.user
-            review.save()
+            # отзыв и агрегаты рейтинга товара сохраняются вместе
+            with transaction.atomic():
+                review.save()
             messages.success(request, 'Отзыв добавлен!')
             return redirect('catalog:product_detail', slug=product.slug)
         else:
@@ -66,6 +69,7 @@ def delete_review(request, review_id):
     """
     review = get_object_or_404(Review, id=review_id, user=request.user)
     product_slug = review.product.slug
-    review.delete()
+    with transaction.atomic():
+        review.delete()
     messages.success(request, 'Отзыв удален!')
     return redirect('catalog:product_detail', slug=product_slug)
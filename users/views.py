@@ -83,8 +83,8 @@ def profile(request):
     cart, created = Cart.objects.get_or_create(user=user)
 # created - был ли взяты данные из бд или создались новые ( просто флаг
 # как в асемблере)
-    cart_items = CartItem.objects.filter(cart=cart)
-    cart_total = cart.total() if cart_items.exists() else 0
+    cart_items = CartItem.objects.filter(cart=cart).select_related('product')
+    cart_total = cart.total()
 
     if request.method == 'POST':
         form = ProfileForm(request.POST, request.FILES, instance=user)